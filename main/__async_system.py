@@ -0,0 +1,75 @@
+"""  module for awaiting the role system classes from asyncio code.
+
+AsyncSystem is a thread-offload wrapper, not a native asyncio HTTP client: it
+wraps a user, administrator or SuperAdmin system class and exposes every command
+of it as a coroutine that runs the blocking call on a thread pool. The event loop
+is never blocked, but at most `max_workers` commands (default `Config.pool_size`,
+the size of the shared transport pool) are in flight per instance, further
+commands wait in the executor queue. For more parallel commands raise
+`max_workers` together with `Config.pool_size`.
+
+This is not the native asyncio client with hundreds of in-flight commands per
+event loop: every running command holds an OS thread, because the motion
+pipeline (trajectory, IK, speed planning, upload) is the blocking code of the
+role system classes and the requirements have no asyncio HTTP client.
+Motions of different robots can run concurrently on one AsyncSystem, the last
+point of every robot is kept separately (`system.last_point(robot_data)`).
+
+"""
+
+from typing import Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+
+class AsyncSystem():
+    """ Coroutine facade over a blocking role system, concurrency is capped at `max_workers` threads """
+
+    def __init__(self, system:Any, max_workers:int=None) -> None:
+        self._system = system
+        max_workers = system.config.pool_size if max_workers is None else max_workers
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="URLanguage")
+
+    @property
+    def max_workers(self) -> int:
+        """ Upper bound of commands running at the same time, the rest are queued """
+        return self._max_workers
+
+    @property
+    def system(self) -> Any:
+        """ Blocking role system, e.g. for passing to Spline or TriggerHandler """
+        return self._system
+
+    async def run(self, func:Callable, *args, **kwargs) -> Any:
+        """ Await any blocking callable on the system executor, e.g. `Spline.start_move` """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name:str) -> Any:
+        attr = getattr(self._system, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def command(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return command
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncSystem":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+class AsyncRole():
+    """ Role returned by `auth.Auth.async_*`, mirrors the role modules `system` factory """
+
+    def __init__(self, role:Any) -> None:
+        self._role = role
+
+    def system(self, host:str, port:int, *token:str, max_workers:int=None) -> AsyncSystem:
+        return AsyncSystem(self._role.system(host, port, *token), max_workers=max_workers)
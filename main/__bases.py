@@ -1,7 +1,7 @@
-import requests
-
 from data_types import RobotData
 from utils.config import Config
+from utils.transport import Transport
+from utils.kinematics import KinematicsCache
 
 class Bases():
     # tool creation is located in the admin console
@@ -10,23 +10,23 @@ class Bases():
         self._port = port
         self._token = token
         self.config = Config()
+        self._transport = Transport.get(host, port)
+        self._kinematics_cache = KinematicsCache.get_shared(host, port)
         
     def get_base(self, base_name:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/get-base"
         data = {
             "id": base_name,
             "token": self._token
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()["data"]
+        return self._transport.post("/api/get-base", json=data).json()["data"]
     
     def set_robot_base(self, robot_data:RobotData, tool_id:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/set-robot-base"
         data = {
             "robot": robot_data.name,
             "code": robot_data.code,
             "id": tool_id,
             "token": self._token
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
\ No newline at end of file
+        response = self._transport.post("/api/set-robot-base", json=data).json()
+        self._kinematics_cache.set_base(robot_data.name, tool_id)
+        return response
\ No newline at end of file
@@ -1,10 +1,17 @@
-from typing import Union
+from typing import Any, Union
+from concurrent.futures import ThreadPoolExecutor
+import threading
 
-import requests
+import numpy as np
 
-from data_types import RobotData, AnglePos, XYZPos, ReturnData
-from utils.trajectory_creator import TrajectoryConstructor
+from data_types import RobotData, AnglePos, XYZPos, ReturnData, Trajectory
+from utils.trajectory_creator import TrajectoryConstructor, MotionProgram
 from utils.config import Config
+from utils.transport import Transport
+from utils.metrics import MetricsRegistry
+from utils.kinematics import LocalKinematics, KinematicsCache
+from utils.wire import WireArray
+from utils import wire
 
 class Robot():
     
@@ -13,79 +20,158 @@ class Robot():
         self._port = port
         self._token = token
         self.last_point_position = None
+        # Последняя точка по роботам: движения разных роботов через один объект (AsyncSystem) не мешают друг другу
+        self._last_points:dict[str, XYZPos] = {}
+        self._last_points_lock = threading.Lock()
         self.config = Config()
+        self._transport = Transport.get(host, port)
+        self._local_kinematics:dict[str, LocalKinematics] = {}
+        self._kinematics_cache = KinematicsCache.get_shared(host, port)
+
+    @property
+    def transport(self) -> Transport:
+        """ Pooled transport shared by every system object connected to the same host/port """
+        return self._transport
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        """ Per endpoint request metrics and local stage timings, see utils.metrics """
+        return self._transport.metrics
+
+    @property
+    def kinematics_cache(self) -> KinematicsCache:
+        """ Cache of `xyz_to_angle` / `angle_to_xyz` results with hit and miss counters """
+        return self._kinematics_cache
         
+    def last_point(self, robot_data:RobotData) -> Union[XYZPos, None]:
+        """ Last point of the last motion sent for this robot, None before the first one """
+        with self._last_points_lock:
+            return self._last_points.get(robot_data.name)
+
+    def _set_last_point(self, robot_data:RobotData, point:XYZPos) -> None:
+        with self._last_points_lock:
+            self._last_points[robot_data.name] = point
+            self.last_point_position = point
+
     def _speed_multiplier(self, speed_list:list, multiplier:float):
         for index, value in enumerate(speed_list):
             speed_list[index] = value * multiplier
         return speed_list
     
     def get_angles_count(self, robot_data:RobotData) -> int:
-        url = f"https://{self._host}:{self._port}/api/get-angles-count"
         data = {
             "robot": robot_data.name,
             "token": self._token
         }
-        verify = self.config.verify
-        response = requests.post(url, verify=verify, json=data).json()["data"]
+        response = self._transport.post("/api/get-angles-count", json=data).json()["data"]
         return response
         
     def check_emergency(self, robot_data:RobotData) -> bool:
         if self.config.trajectory_send:
-            url = f"https://{self._host}:{self._port}/api/get-emergency"
             data = {
                 "robot": robot_data.name,
                 "token": self._token,
                 "code": robot_data.code
             }
-            verify = self.config.verify
-            response = requests.post(url, verify=verify, json=data).json()["data"]
+            response = self._transport.post("/api/get-emergency", json=data).json()["data"]
             return response
         return False
 
+    def _binary_wire(self, endpoint:str) -> bool:
+        return self.config.wire_format == "binary" and self._transport.supports(endpoint, wire.CONTENT_TYPE)
+
+    def _post_binary(self, endpoint:str, data:dict, arrays:list[WireArray]):
+        """ POST `data` with `arrays` in the binary format, None if the server doesn't accept it \n
+        Only 415 Unsupported Media Type means that, other errors (e.g. 400 for invalid data) are returned as is.
+        """
+        body = wire.encode(data, arrays, self.config.wire_dtype)
+        headers = {"Content-Type": wire.CONTENT_TYPE, "Accept": f"{wire.CONTENT_TYPE}, application/json"}
+        response = self._transport.post(endpoint, data=body, headers=headers)
+        if response.status_code == 415:
+            self._transport.mark_unsupported(endpoint, wire.CONTENT_TYPE)
+            return None
+        return response
+
     def set_robot_position(self, robot_data:RobotData, angles:Union[AnglePos, list[AnglePos]], is_multi_point:bool=False, last_point_position:Union[XYZPos, None]=None) -> dict:
         # Set position
-        url = f"https://{self._host}:{self._port}/api/set-position"
         data = {
             "robot": robot_data.name,
             "token": self._token,
             "code" : robot_data.code
             }
-        if not is_multi_point:
-            data["angles"] = angles.export_to(export_type=dict)
-        else:
-            converted_angles = []
-            for angle in angles:
-                converted_angles.append(angle.export_to(export_type=dict))
-            data["angles_data"] = converted_angles
+        request_data = None
+        if is_multi_point and self._binary_wire("/api/set-position"):
+            request_data = self._post_binary("/api/set-position", data, [WireArray.from_angles("angles_data", angles)])
+        if request_data is None:
+            if not is_multi_point:
+                data["angles"] = angles.export_to(export_type=dict)
+            else:
+                converted_angles = []
+                for angle in angles:
+                    converted_angles.append(angle.export_to(export_type=dict))
+                data["angles_data"] = converted_angles
+            request_data = self._transport.post("/api/set-position", json=data)
         if last_point_position is not None:
-            self.last_point_position = last_point_position
-        verify = self.config.verify
-        request_data = requests.post(url, verify=verify, json=data)
-        return request_data.json(), request_data.status_code
+            self._set_last_point(robot_data, last_point_position)
+        return wire.read_response(request_data), request_data.status_code
     
     def set_robot_speed(self, robot_data:RobotData, angles_speed:Union[AnglePos, list[AnglePos]], is_multi_point:bool=False) -> dict:
         # Set motor speed
-        url = f"https://{self._host}:{self._port}/api/set-speed"
         data = {
             "robot": robot_data.name,
             "token": self._token,
             "code" : robot_data.code
             }
-        if not is_multi_point:
-            data["angles"] = angles_speed.export_to(export_type=dict)
-        else:
-            data["angles_data"] = angles_speed
-            converted_speeds = []
-            for angle_speed in angles_speed:
-                converted_speeds.append(angle_speed.export_to(export_type=dict))
-            data["angles_data"] = converted_speeds
-        verify = self.config.verify
-        request_data = requests.post(url, verify=verify, json=data)
-        return request_data.json(), request_data.status_code
+        request_data = None
+        if is_multi_point and self._binary_wire("/api/set-speed"):
+            request_data = self._post_binary("/api/set-speed", data, [WireArray.from_angles("angles_data", angles_speed)])
+        if request_data is None:
+            if not is_multi_point:
+                data["angles"] = angles_speed.export_to(export_type=dict)
+            else:
+                converted_speeds = []
+                for angle_speed in angles_speed:
+                    converted_speeds.append(angle_speed.export_to(export_type=dict))
+                data["angles_data"] = converted_speeds
+            request_data = self._transport.post("/api/set-speed", json=data)
+        return wire.read_response(request_data), request_data.status_code
         
+    def submit_motion(self, robot_data:RobotData, angles:Union[AnglePos, list[AnglePos]], angles_speed:Union[AnglePos, list[AnglePos]],
+                      is_multi_point:bool=False, last_point_position:Union[XYZPos, None]=None) -> tuple[tuple, tuple]:
+        """ Set positions, speeds and send markers with one request \n
+        Older servers without /api/set-motion get the `set_robot_position` + `set_robot_speed` pair,
+        the result is ((position response, code), (speed response, code)) in both cases.
+        """
+        if self.config.combined_motion and self._transport.supports("/api/set-motion"):
+            data = {
+                "robot": robot_data.name,
+                "token": self._token,
+                "code" : robot_data.code
+                }
+            request_data = None
+            if is_multi_point and self._binary_wire("/api/set-motion"):
+                request_data = self._post_binary("/api/set-motion", data, [WireArray.from_angles("angles_data", angles),
+                                                                          WireArray.from_angles("speeds_data", angles_speed)])
+            if request_data is None:
+                if not is_multi_point:
+                    data["angles"] = angles.export_to(export_type=dict)
+                    data["speeds"] = angles_speed.export_to(export_type=dict)
+                else:
+                    data["angles_data"] = [angle.export_to(export_type=dict) for angle in angles]
+                    data["speeds_data"] = [angle_speed.export_to(export_type=dict) for angle_speed in angles_speed]
+                request_data = self._transport.post("/api/set-motion", json=data)
+            if self._transport.route_missing(request_data):
+                self._transport.mark_unsupported("/api/set-motion")
+            else:
+                if last_point_position is not None:
+                    self._set_last_point(robot_data, last_point_position)
+                result = (wire.read_response(request_data), request_data.status_code)
+                return result, result
+        position = self.set_robot_position(robot_data, angles, is_multi_point=is_multi_point, last_point_position=last_point_position)
+        speed = self.set_robot_speed(robot_data, angles_speed, is_multi_point=is_multi_point)
+        return position, speed
+
     def move_xyz(self, robot_data:RobotData, position:XYZPos, coordinate_system:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/set-cartesian-position"
         position = {
             "x": position.x,
             "y": position.y,
@@ -101,29 +187,48 @@ class Robot():
             "token": self._token,
             "code" : robot_data.code
             }
-        verify = self.config.verify
-        response = requests.post(url, verify=verify, json=data)
+        response = self._transport.post("/api/set-cartesian-position", json=data)
         return ReturnData(responce=response.text, code=response.status_code, trjectory=position)
 
-    def xyz_to_angle(self, robot_data:RobotData, positions:Union[XYZPos, list[XYZPos]], coordinate_system:str, is_multi_point:bool=False) -> Union[AnglePos, list[AnglePos]]:
-        new_positions = []
-        if isinstance(positions, list):
-            for pos in positions:
-                new_positions.append(pos.export_to(export_type=dict))
+    def set_local_kinematics(self, robot_data:RobotData, kinematics:Union[LocalKinematics, None]) -> None:
+        """ Compute `xyz_to_angle` and `angle_to_xyz` of the robot on the client, None returns them to the server """
+        if kinematics is None:
+            self._local_kinematics.pop(robot_data.name, None)
         else:
-            new_positions.append(positions.export_to(export_type=dict))
-            
-        url = f"https://{self._host}:{self._port}/api/cartesian-to-angles"
+            self._local_kinematics[robot_data.name] = kinematics
+        self._kinematics_cache.invalidate(robot_data.name)
+
+    def _get_local_kinematics(self, robot_data:RobotData, coordinate_system:str=None) -> Union[LocalKinematics, None]:
+        if self.config.kinematics_backend == "server":
+            return None
+        kinematics = self._local_kinematics.get(robot_data.name)
+        if kinematics is not None and coordinate_system is not None and not kinematics.supports(coordinate_system):
+            return None
+        return kinematics
+
+    def _cartesian_to_angles(self, robot_data:RobotData, positions:Trajectory, coordinate_system:str) -> list[dict]:
+        kinematics = self._get_local_kinematics(robot_data, coordinate_system)
+        if kinematics is not None:
+            return kinematics.xyz_to_angle(positions)
         data = {
             "robot": robot_data.name,
             "code" : robot_data.code,
             "coordinate_system": coordinate_system,
-            "positions_data": new_positions,
             "token": self._token
             }
-        verify = self.config.verify
-        print(requests.post(url, verify=verify, json=data).text)
-        result = requests.post(url, verify=verify, json=data).json()["data"]
+        if self._binary_wire("/api/cartesian-to-angles"):
+            response = self._post_binary("/api/cartesian-to-angles", data, [WireArray.from_trajectory("positions_data", positions)])
+            if response is not None:
+                return wire.read_response(response)["data"]
+        data["positions_data"] = positions.export_to(export_type=dict)
+        response = self._transport.post("/api/cartesian-to-angles", json=data)
+        return response.json()["data"]
+
+    def xyz_to_angle(self, robot_data:RobotData, positions:Union[XYZPos, list[XYZPos], Trajectory], coordinate_system:str, is_multi_point:bool=False) -> Union[AnglePos, list[AnglePos]]:
+        if not isinstance(positions, Trajectory):
+            positions = Trajectory.from_points(positions if isinstance(positions, list) else [positions])
+        result = self._kinematics_cache.resolve(robot_data.name, coordinate_system, positions.positions.tolist(),
+            lambda indices: self._cartesian_to_angles(robot_data, positions.take(indices), coordinate_system))
         if not is_multi_point:
             return AnglePos().from_dict(result[0], rewrite=True)
         else:
@@ -132,20 +237,28 @@ class Robot():
                 angles.append(AnglePos().from_dict(res))
             return angles
 
-    def angle_to_xyz(self, robot_data:RobotData, angles:list[AnglePos], is_multi_point:bool=False) -> dict:
-        new_angles = []
-        for angle_pos in angles:
-            new_angles.append(angle_pos.export_to(export_type=list))
-            
-        url = f"https://{self._host}:{self._port}/api/angles-to-cartesian"
+    def _angles_to_cartesian(self, robot_data:RobotData, angles:list[AnglePos]) -> list[dict]:
+        kinematics = self._get_local_kinematics(robot_data)
+        if kinematics is not None:
+            return kinematics.angle_to_xyz(angles)
         data = {
             "robot": robot_data.name,
             "token": self._token,
-            "code" : robot_data.code,
-            "angles_data": new_angles
+            "code" : robot_data.code
             }
-        verify = self.config.verify
-        result = requests.post(url, verify=verify, json=data).json()["data"]
+        if self._binary_wire("/api/angles-to-cartesian"):
+            response = self._post_binary("/api/angles-to-cartesian", data, [WireArray.from_angles("angles_data", angles)])
+            if response is not None:
+                return wire.read_response(response)["data"]
+        new_angles = []
+        for angle_pos in angles:
+            new_angles.append(angle_pos.export_to(export_type=list))
+        data["angles_data"] = new_angles
+        return self._transport.post("/api/angles-to-cartesian", json=data).json()["data"]
+
+    def angle_to_xyz(self, robot_data:RobotData, angles:list[AnglePos], is_multi_point:bool=False) -> dict:
+        result = self._kinematics_cache.resolve(robot_data.name, "angles", [angle_pos.joints() for angle_pos in angles],
+            lambda indices: self._angles_to_cartesian(robot_data, [angles[index] for index in indices]))
         if not is_multi_point:
             return XYZPos().from_dict(result[0])
         else:
@@ -176,15 +289,167 @@ class Robot():
                 speeds.append(abs(speed))
         return speeds
 
+    @staticmethod
+    def calculate_speeds(start_angles:AnglePos, angles:Union[list[AnglePos], np.ndarray], steps:Union[int, np.ndarray], multiplier:float=1) -> np.ndarray:
+        """ Vectorized `calculate_speed` for a whole path \n
+        Computes the speeds of every segment start_angles -> angles[0] -> ... -> angles[-1] in one NumPy op.
+        `angles` is a list of AnglePos or the (N, J) joint array from IK, the result is a (N, J) array.
+        `steps` is one step count for every segment or an (N, 1) array with one per segment.
+        """
+        if not isinstance(angles, np.ndarray):
+            angles = np.array([angle.joints() for angle in angles], dtype=np.float64)
+        start = np.array(start_angles.joints(), dtype=np.float64)
+        angles = angles.reshape(len(angles), -1)
+        if angles.shape[1] != start.shape[0]:
+            raise ValueError("Списки начальных и конечных углов должны иметь одинаковую длину")
+        joints = np.vstack([start, angles])
+        return np.abs(np.diff(joints, axis=0) / steps) * multiplier
+
+    def _get_current_angles(self, robot_data:RobotData) -> AnglePos:
+        data = {
+            "robot": robot_data.name,
+            "token": self._token
+            }
+        current_angles = self._transport.post("/api/get-position", json=data).json()["data"]
+        if isinstance(current_angles, list):
+            return AnglePos().from_dict(current_angles[-1])
+        return AnglePos().from_dict(current_angles)
+
+    def _plan_speeds(self, robot_data:RobotData, arc_points:list[AnglePos], steps:Union[int, np.ndarray], multiplier:float, start_angles:AnglePos=None) -> list[AnglePos]:
+        """ Speeds for uploading `arc_points`, starting from `start_angles` or the current robot position """
+        if len(arc_points) == 0:
+            return []
+        if start_angles is None:
+            start_angles = self._get_current_angles(robot_data)
+        speeds = self.calculate_speeds(start_angles, arc_points, steps, multiplier)
+        return [AnglePos(use_send=False).from_list(speed) for speed in speeds.tolist()]
+
+    def _trajectory_to_angles(self, robot_data:RobotData, trajectory:Trajectory, coordinate_system:str) -> list[AnglePos]:
+        arc_points = self.xyz_to_angle(robot_data, trajectory, coordinate_system, is_multi_point=True)
+        # Set send parameter from xyz point to angle point
+        for index, marker in enumerate(trajectory.send_markers()):
+            arc_points[index]["send"] = marker
+        return arc_points
+
+    def _simplified_angles(self, robot_data:RobotData, trajectory:Trajectory, coordinate_system:str,
+                           steps:int) -> tuple[np.ndarray, list[AnglePos], Union[int, np.ndarray]]:
+        """ Indices, angles and step counts of the points to upload \n
+        With `Config.simplify_chord_error` > 0 the Cartesian decimation runs before IK, only the kept points
+        are solved. Every kept segment is then checked in joint space at its middle dropped point (one batched
+        IK request per round): when the controller's joint interpolation misses it by more than
+        `Config.simplify_joint_error` degrees the point is kept too and both halves are checked again.
+        A kept point that replaces k segments gets k * `steps` steps, so the motion keeps its duration.
+        """
+        if self.config.simplify_chord_error <= 0 or len(trajectory) < 3:
+            return np.arange(len(trajectory)), self._trajectory_to_angles(robot_data, trajectory, coordinate_system), steps
+        indices = TrajectoryConstructor.simplify_indices(trajectory, self.config.simplify_chord_error, self.config.simplify_angle_error).tolist()
+        angles = dict(zip(indices, self._trajectory_to_angles(robot_data, trajectory.take(indices), coordinate_system)))
+        segments = [(start, end) for start, end in zip(indices[:-1], indices[1:]) if end - start > 1]
+        while segments:
+            middles = [(start + end) // 2 for start, end in segments]
+            probes = self._trajectory_to_angles(robot_data, trajectory.take(middles), coordinate_system)
+            deviation = TrajectoryConstructor.joint_deviation(
+                np.array([angles[start].joints() for start, _end in segments], dtype=np.float64),
+                np.array([angles[end].joints() for _start, end in segments], dtype=np.float64),
+                np.array([probe.joints() for probe in probes], dtype=np.float64))
+            split = []
+            for (start, end), middle, probe, error in zip(segments, middles, probes, deviation.tolist()):
+                if error > self.config.simplify_joint_error:
+                    angles[middle] = probe
+                    split.extend(segment for segment in ((start, middle), (middle, end)) if segment[1] - segment[0] > 1)
+            segments = split
+        indices = np.array(sorted(angles))
+        # Число исходных участков, которые заменяет каждая оставшаяся точка (первая - участок от старта)
+        spans = np.diff(indices, prepend=-1)
+        return indices, [angles[index] for index in indices.tolist()], steps * spans[:, np.newaxis]
+
+    def upload_trajectory(self, robot_data:RobotData, trajectory:Trajectory, coordinate_system:str, steps:int, speed_multiplier:float=1,
+                          chunk_size:int=None, last_point_position:XYZPos=None) -> ReturnData:
+        """ Convert `trajectory` to angles, plan speeds and upload both lists 
+
+        With `chunk_size` (default `Config.stream_chunk_size`) > 0 long trajectories are streamed:
+        chunk N+1 goes through IK and speed planning while chunk N is uploaded, so the robot
+        can start moving before the whole trajectory is computed. Chunks are uploaded in order,
+        positions then speeds, and the first failed chunk stops the stream.
+        Streamed responses and codes are lists with one item per uploaded chunk.
+        With `Config.simplify_chord_error` > 0 points are dropped before IK (`_simplified_angles`, per chunk
+        when streaming), the kept points get the steps of the dropped ones so the timing stays the same.
+        The returned ReturnData has the trajectory that was actually uploaded.
+        """
+        chunk_size = self.config.stream_chunk_size if chunk_size is None else chunk_size
+        if not isinstance(trajectory, Trajectory):
+            trajectory = Trajectory.from_points(trajectory)
+        if chunk_size <= 0 or len(trajectory) <= chunk_size:
+            # Текущая позиция запрашивается параллельно с IK
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                current_angles = executor.submit(self._get_current_angles, robot_data)
+                with self.metrics.stage("kinematics"):
+                    indices, arc_points, point_steps = self._simplified_angles(robot_data, trajectory, coordinate_system, steps)
+                start_angles = current_angles.result()
+            with self.metrics.stage("speeds"):
+                new_speeds = self._plan_speeds(robot_data, arc_points, point_steps, speed_multiplier, start_angles)
+            with self.metrics.stage("upload"):
+                (position_responce, pos_code), (speed_responce, speed_code) = self.submit_motion(robot_data, arc_points, new_speeds, True, last_point_position)
+            response_data = {"Set position": position_responce,
+                             "Set speed": speed_responce}
+            response_codes = {"Set position": pos_code,
+                              "Set speed": speed_code}
+            sent = trajectory if len(indices) == len(trajectory) else trajectory.take(indices.tolist())
+            return ReturnData(responce=response_data, code=response_codes, trjectory=sent)
+
+        failed = threading.Event()
+        def upload(arc_points:list[AnglePos], speeds:list[AnglePos], last_point:Union[XYZPos, None]) -> Union[tuple, None]:
+            if failed.is_set():
+                return None
+            with self.metrics.stage("upload"):
+                result = self.submit_motion(robot_data, arc_points, speeds, True, last_point)
+            if result[0][1] != 200 or result[1][1] != 200:
+                failed.set()
+            return result
+
+        uploads = []
+        sent_indices = []
+        # Один поток отправки сохраняет порядок участков, IK следующего участка считается параллельно
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="URLanguage-upload") as executor:
+            current_angles = executor.submit(self._get_current_angles, robot_data)
+            start_angles = None
+            for begin in range(0, len(trajectory), chunk_size):
+                if failed.is_set():
+                    break
+                end = begin + chunk_size
+                with self.metrics.stage("kinematics"):
+                    indices, arc_points, point_steps = self._simplified_angles(robot_data, trajectory[begin:end], coordinate_system, steps)
+                if start_angles is None:
+                    start_angles = current_angles.result()
+                with self.metrics.stage("speeds"):
+                    speeds = self.calculate_speeds(start_angles, arc_points, point_steps, speed_multiplier)
+                    new_speeds = [AnglePos(use_send=False).from_list(speed) for speed in speeds.tolist()]
+                sent_indices.extend((indices + begin).tolist())
+                start_angles = arc_points[-1]
+                last_point = last_point_position if end >= len(trajectory) else None
+                uploads.append(executor.submit(upload, arc_points, new_speeds, last_point))
+
+        response_data = {"Set position": [], "Set speed": []}
+        response_codes = {"Set position": [], "Set speed": []}
+        for future in uploads:
+            result = future.result()
+            if result is None:
+                break
+            (position_responce, pos_code), (speed_responce, speed_code) = result
+            response_data["Set position"].append(position_responce)
+            response_data["Set speed"].append(speed_responce)
+            response_codes["Set position"].append(pos_code)
+            response_codes["Set speed"].append(speed_code)
+        sent = trajectory if len(sent_indices) == len(trajectory) else trajectory.take(sent_indices)
+        return ReturnData(responce=response_data, code=response_codes, trjectory=sent)
+
     def ptp(self, robot_data:RobotData, angles:AnglePos, step_count:int=100) -> ReturnData:
-        url = f"https://{self._host}:{self._port}/api/get-position"
         data = {
             "robot": robot_data.name,
             "token": self._token,
             "code": robot_data.code
             }
-        verify = self.config.verify
-        current_angles = requests.post(url, verify=verify, json=data).json()["data"]
+        current_angles = self._transport.post("/api/get-position", json=data).json()["data"]
         
         start_angles:AnglePos
         if isinstance(current_angles, list):
@@ -194,8 +459,7 @@ class Robot():
         # Вычисление скоростей вращения для перемещения от начальной позиции к конечной
         speeds = AnglePos().from_list(self.calculate_speed(start_angles, angles, step_count))
 
-        position_responce, pos_code = self.set_robot_position(robot_data, angles)
-        speed_responce, speed_code = self.set_robot_speed(robot_data, speeds)
+        (position_responce, pos_code), (speed_responce, speed_code) = self.submit_motion(robot_data, angles, speeds)
         
         response_data = {"Set position": position_responce,
                          "Set speed": speed_responce}
@@ -207,77 +471,34 @@ class Robot():
     def lin(self, robot_data:RobotData, end_point:XYZPos, coordinate_system:str, num_points:int=25, triggers:dict=None, speed_multiplier:int=1, start:XYZPos=None, lin_step_count:int=25) -> ReturnData:
         if start is None:
             if self.config.trajectory_send:
-                url = f"https://{self._host}:{self._port}/api/get-cartesian-position"
                 data = {
                     "robot": robot_data.name,
                     "coordinate_system": coordinate_system,
                     "token": self._token
                     }
-                verify = self.config.verify
-                responce_data = requests.post(url, verify=verify, json=data).json()["data"]
+                responce_data = self._transport.post("/api/get-cartesian-position", json=data).json()["data"]
                 start = XYZPos().from_dict(responce_data)
             else:
-                if self.last_point_position is not None:
-                    start = self.last_point_position
-                else:
+                start = self.last_point(robot_data)
+                if start is None:
                     start = XYZPos().from_list([0, 0, 0])
         
-        arc_points = []
-        if end_point.smooth_endPoint is None:
-            full_trajectory_points = TrajectoryConstructor().generate_line_points(start, end_point, num_points)
-            
-        else:
-            cartesian_points = []
-            updating_end_point = end_point
-            cartesian_points = TrajectoryConstructor().find_smoothing_points(updating_end_point, cartesian_points)
+        with self.metrics.stage("trajectory"):
+            if end_point.smooth_endPoint is None:
+                full_trajectory_points = TrajectoryConstructor().generate_line_points(start, end_point, num_points)
             
-            # Create trajectory
-            full_trajectory_points = [start]
-            full_trajectory_points = TrajectoryConstructor().smooth_trajectory(robot_data, full_trajectory_points, cartesian_points, lin_step_count)
+            else:
+                # Цепочка сглаживаний компилируется в таблицу углов и строится за один проход
+                full_trajectory_points = MotionProgram.compile(end_point).build(robot_data, start, lin_step_count)
             
-        # Setting triggers in trajectory
-        if triggers is not None:
-            for trigger_id in triggers.keys():
-                full_trajectory_points = TrajectoryConstructor().set_trigger_point_in_trajectory(full_trajectory_points, \
-                    triggers[trigger_id], trigger_id)[2]
+            # Setting triggers in trajectory
+            if triggers is not None:
+                full_trajectory_points = TrajectoryConstructor().set_trigger_points(full_trajectory_points, triggers)
 
-        self.last_point_position = full_trajectory_points[-1]
+        self._set_last_point(robot_data, full_trajectory_points[-1])
             
         if self.config.trajectory_send:
-            arc_points = self.xyz_to_angle(robot_data, full_trajectory_points, coordinate_system, is_multi_point=True)
-            # Set send parameter from xyz point to angle point
-            for index, point in enumerate(full_trajectory_points):
-                arc_points[index]["send"] = point.send
-            
-            new_speeds:list = []
-            for index, point in enumerate(arc_points):
-                old_point:AnglePos = None
-                if index == 0:
-                    url = f"https://{self._host}:{self._port}/api/get-position"
-                    data = {
-                        "robot": robot_data.name,
-                        "token": self._token
-                        }
-                    verify = self.config.verify
-                    current_angles = requests.post(url, verify=verify, json=data).json()["data"]
-                    if isinstance(current_angles, list):
-                        old_point = AnglePos().from_dict(current_angles[-1])
-                    else:
-                        old_point = AnglePos().from_dict(current_angles)
-                else:
-                    old_point = arc_points[index-1]
-
-                speed = self._speed_multiplier(self.calculate_speed(old_point, point, lin_step_count), speed_multiplier)
-                new_speeds.append(AnglePos(use_send=False).from_list(speed))
-            
-            position_responce, pos_code = self.set_robot_position(robot_data, arc_points, is_multi_point=True)
-            speed_responce, speed_code = self.set_robot_speed(robot_data, new_speeds, is_multi_point=True)
-            
-            response_data = {"Set position": position_responce,
-                            "Set speed": speed_responce}
-            response_codes = {"Set position": pos_code,
-                            "Set speed": speed_code}
-            return ReturnData(responce=response_data, code=response_codes, trjectory=full_trajectory_points)
+            return self.upload_trajectory(robot_data, full_trajectory_points, coordinate_system, lin_step_count, speed_multiplier)
         else:
             return ReturnData(responce=None, code=None, trjectory=full_trajectory_points)
 
@@ -287,69 +508,29 @@ class Robot():
                 if arc_angle < 18:
                     raise ValueError("Arc angle must be greater than 18 degrees.")
             
-            if points_xyz[2].smooth_endPoint is None:
-                coords, _end_smoothing_point, _start_smoothing_point = TrajectoryConstructor().generate_arc_3d(
-                    points_xyz[0],
-                    points_xyz[1],
-                    points_xyz[2],
-                    count_points,
-                    arc_angle=arc_angle
-                    )
-                full_trajectory_points = coords
-            else:
-                points_xyz[2].circ_angle = arc_angle
-                # Find smoothing points
-                cartesian_points = [points_xyz]
-                updating_end_point:Union[list[XYZPos], XYZPos] = points_xyz
-                cartesian_points = TrajectoryConstructor().find_smoothing_points(updating_end_point, cartesian_points)
-                # Create trajectory
-                full_trajectory_points = [points_xyz[0]]
-                full_trajectory_points = TrajectoryConstructor().smooth_trajectory(robot_data, full_trajectory_points, cartesian_points, count_points)
-              
-            # Setting triggers in trajectory
-            if triggers is not None:
-                for trigger_id in triggers.keys():
-                    full_trajectory_points = TrajectoryConstructor().set_trigger_point_in_trajectory(full_trajectory_points, \
-                        triggers[trigger_id], trigger_id)[2]
+            with self.metrics.stage("trajectory"):
+                if points_xyz[2].smooth_endPoint is None:
+                    coords, _end_smoothing_point, _start_smoothing_point = TrajectoryConstructor().generate_arc_3d(
+                        points_xyz[0],
+                        points_xyz[1],
+                        points_xyz[2],
+                        count_points,
+                        arc_angle=arc_angle
+                        )
+                    full_trajectory_points = Trajectory.from_points(coords)
+                else:
+                    points_xyz[2].circ_angle = arc_angle
+                    # Create trajectory
+                    full_trajectory_points = MotionProgram.compile(points_xyz).build(robot_data, points_xyz[0], count_points)
               
-            self.last_point_position = full_trajectory_points[-1]
+                # Setting triggers in trajectory
+                if triggers is not None:
+                    full_trajectory_points = TrajectoryConstructor().set_trigger_points(full_trajectory_points, triggers)
+
+            self._set_last_point(robot_data, full_trajectory_points[-1])
             
             if self.config.trajectory_send:            
-                arc_points = self.xyz_to_angle(robot_data, full_trajectory_points, coordinate_system, is_multi_point=True)
-                # Set send parameter from xyz point to angle point
-                for index, point in enumerate(full_trajectory_points):
-                    arc_points[index]["send"] = point.send
-                    
-                new_speeds:list = []
-                for index, point in enumerate(arc_points):
-                    old_point:list = []
-                    if index == 0:
-                        url = f"https://{self._host}:{self._port}/api/get-position"
-                        data = {
-                            "robot": robot_data.name,
-                            "token": self._token
-                            }
-                        verify = self.config.verify
-                        current_angles = requests.post(url, verify=verify, json=data).json()["data"]
-                        
-                        if isinstance(current_angles, list):
-                            old_point = AnglePos().from_dict(current_angles[-1])
-                        else:
-                            old_point = AnglePos().from_dict(current_angles)
-                    else:
-                        old_point = arc_points[index-1]
-
-                    speed = self._speed_multiplier(self.calculate_speed(old_point, point, lin_step_count), speed_multiplier)
-                    new_speeds.append(AnglePos(use_send=False).from_list(speed))
-                    
-                position_responce, pos_code = self.set_robot_position(robot_data, arc_points, is_multi_point=True)
-                speed_responce, speed_code = self.set_robot_speed(robot_data, new_speeds, is_multi_point=True)
-                
-                response_data = {"Set position": position_responce,
-                            "Set speed": speed_responce}
-                response_codes = {"Set position": pos_code,
-                                "Set speed": speed_code}
-                return ReturnData(responce=response_data, code=response_codes, trjectory=full_trajectory_points)
+                return self.upload_trajectory(robot_data, full_trajectory_points, coordinate_system, lin_step_count, speed_multiplier)
             else:
                 return ReturnData(responce=None, code=None, trjectory=full_trajectory_points)
         else:
@@ -357,15 +538,13 @@ class Robot():
             
 
     def get_robot_log(self, robot_data:RobotData, timestamp:int=None) -> dict:
-        url = f"https://{self._host}:{self._port}/api/get-robot-logs"
         data = {
             "robot": robot_data.name,
             "token": self._token
             }
         if timestamp is not None:
             data["timestamp"] = timestamp
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
+        return self._transport.post("/api/get-robot-logs", json=data).json()
 
     # cut out due to unnecessary reasons
     # def get_last_log(self, robot_data:RobotData) -> dict:
@@ -377,52 +556,87 @@ class Robot():
     #     return requests.post(url, verify=verify, json=data).json()["data"][-1]
     
     def debug(self, robot_data:RobotData, text:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/add-robot-log"
         data = {
             "robot": robot_data.name,
             "text": text
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
+        return self._transport.post("/api/add-robot-log", json=data).json()
     
     def set_program(self, robot_data:RobotData, program:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/set-program"
         data = {
             "robot": robot_data.name,
             "program": program.encode().hex(),
             "token": self._token,
             "code" : robot_data.code
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
+        return self._transport.post("/api/set-program", json=data).json()
     
     def delete_program(self, robot_data:RobotData) -> dict:
-        url = f"https://{self._host}:{self._port}/api/delete-program"
         data = {
             "robot": robot_data.name,
             "token": self._token,
             "code" : robot_data.code
             }
-        verify = self.config.verify
-        print(requests.post(url, verify=verify, json=data))
-        return requests.post(url, verify=verify, json=data).json()
+        response = self._transport.post("/api/delete-program", json=data)
+        return response.json()
     
-    def get_position_id(self, robot_data:RobotData) -> dict:
-        url = f"https://{self._host}:{self._port}/api/get-position-id"
+    def get_position_id(self, robot_data:RobotData, timeout:float=None) -> dict:
         data = {
             "robot": robot_data.name,
             "token": self._token
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
+        return self._transport.post("/api/get-position-id", json=data, timeout=timeout).json()
     
+    def wait_position_id(self, robot_data:RobotData, last_position_id:Any=None, timeout:float=None) -> tuple[bool, Any]:
+        """ Long-poll the position id \n
+        The server answers as soon as the id differs from `last_position_id` or after `timeout` seconds
+        (default `Config.trigger_wait_timeout`). Returns (supported, position id), supported is False
+        on servers without /api/wait-position-id, use `get_position_id` polling there.
+        Other errors (e.g. an unknown robot) raise requests.HTTPError.
+        """
+        if not self._transport.supports("/api/wait-position-id"):
+            return False, None
+        timeout = self.config.trigger_wait_timeout if timeout is None else timeout
+        data = {
+            "robot": robot_data.name,
+            "token": self._token,
+            "last": last_position_id,
+            "timeout": timeout
+            }
+        response = self._transport.post("/api/wait-position-id", json=data, timeout=timeout + self.config.trigger_request_timeout)
+        if self._transport.route_missing(response):
+            self._transport.mark_unsupported("/api/wait-position-id")
+            return False, None
+        # Ошибка запроса (например неизвестный робот) - исключение, а не id None
+        response.raise_for_status()
+        return True, response.json()["data"]
+
+    def wait_position_ids(self, last_position_ids:dict[str, Any], timeout:float=None) -> tuple[bool, dict[str, Any]]:
+        """ Position ids of many robots in one request \n
+        `last_position_ids` maps robot names to the last seen id, the answer has only the robots
+        whose id differs, as soon as there is one or after `timeout` seconds (0 - answer at once).
+        Returns (supported, {robot name: position id}), other errors (e.g. an unknown robot) raise requests.HTTPError.
+        """
+        if not self._transport.supports("/api/wait-position-ids"):
+            return False, {}
+        timeout = self.config.trigger_wait_timeout if timeout is None else timeout
+        data = {
+            "robots": last_position_ids,
+            "token": self._token,
+            "timeout": timeout
+            }
+        response = self._transport.post("/api/wait-position-ids", json=data, timeout=timeout + self.config.trigger_request_timeout)
+        if self._transport.route_missing(response):
+            self._transport.mark_unsupported("/api/wait-position-ids")
+            return False, {}
+        response.raise_for_status()
+        return True, response.json()["data"]
+
     def set_position_id(self, robot_data:RobotData, position_id: int) -> dict:
-        url = f"https://{self._host}:{self._port}/api/set-position-id"
         data = {
             "robot": robot_data.name,
             "token": self._token,
             "code" : robot_data.code,
             "id" : position_id 
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
\ No newline at end of file
+        return self._transport.post("/api/set-position-id", json=data).json()
\ No newline at end of file
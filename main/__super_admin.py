@@ -4,8 +4,6 @@ The tokenizer class is used to automatically send a token to the system class af
 
 """
 
-import requests
-
 import __admin
 from utils.config import Config
 
@@ -30,46 +28,38 @@ class system(__admin.system):
         self.config = Config()
         
     def delete_user(self, name:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/delete-account"
         data = {
             "name": name,
             "token": self._token
             }
-        verify = self.config.verify
-        resp = requests.post(url, verify=verify, json=data).json()
+        resp = self._transport.post("/api/delete-account", json=data).json()
         return resp
 
     def add_user(self, name:str, password:str, role:str) -> dict:
         if password != "robot":
-            url = f"https://{self._host}:{self._port}/api/create-account"
             data = {
                 "name": name,
                 "password": password,
                 "user_role": role,
                 "token": self._token
                 }
-            verify = self.config.verify
-            resp = requests.post(url, verify=verify, json=data).json()
+            resp = self._transport.post("/api/create-account", json=data).json()
             return resp
         else:
             raise TypeError("The word robot cannot be used in the password because it is reserved")
     
     def get_user_accounts(self) -> str:
-        url = f"https://{self._host}:{self._port}/api/get-accounts"
         data = {"token": self._token}
-        verify = self.config.verify
-        resp = requests.post(url, verify=verify, json=data).json()
+        resp = self._transport.post("/api/get-accounts", json=data).json()
         return resp
     
     def change_password(self, name:str, password:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/change-password"
         data = {
             "name": name,
             "password": password,
             "token": self._token
         }
-        verify = self.config.verify
-        resp = requests.post(url, verify=verify, json=data).json()
+        resp = self._transport.post("/api/change-password", json=data).json()
         return resp
     
     # def get_robot_token(self, name:str) -> str:
@@ -84,47 +74,39 @@ class system(__admin.system):
     #     ↓↓↓↓↓↓
     
     def get_account_token(self, name:str, password:str) -> str:
-        url = f"https://{self._host}:{self._port}/api/get-token"
         data = {
             "name": name,
             "password": password,
             "token": self._token
         }
-        verify = self.config.verify
-        token = requests.post(url, verify=verify, json=data).json()["data"]["token"]
+        token = self._transport.post("/api/get-token", json=data).json()["data"]["token"]
         return token
     
     def change_token(self, name:str, password:str) -> dict:
         if password != "robot":
-            url = f"https://{self._host}:{self._port}/api/change-token"
             data = {
                 "name": name,
                 "password": password,
                 "token": self._token
             }
-            verify = self.config.verify
-            resp = requests.post(url, verify=verify, json=data).json()
+            resp = self._transport.post("/api/change-token", json=data).json()
             return resp
         else:
             raise TypeError("The word robot cannot be used in the password because it is reserved")
     
     def export_cache(self) -> dict:
-        url = f"https://{self._host}:{self._port}/api/export-cache"
         data = {
             "token": self._token
         }
-        verify = self.config.verify
-        resp = requests.post(url, verify=verify, json=data).json()["data"]
+        resp = self._transport.post("/api/export-cache", json=data).json()["data"]
         return resp
     
     def import_cache(self, robots:dict, tools:dict, frames:dict) -> dict:
-        url = f"https://{self._host}:{self._port}/api/import-cache"
         data = {
             "token": self._token,
             "robots": str(robots),
             "tools": str(tools),
             "frames": str(frames)
         }
-        verify = self.config.verify
-        resp = requests.post(url, verify=verify, json=data).json()
+        resp = self._transport.post("/api/import-cache", json=data).json()
         return resp
\ No newline at end of file
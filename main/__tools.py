@@ -1,9 +1,9 @@
 from typing import Any
 
-import requests
-
 from data_types import RobotData
 from utils.config import Config
+from utils.transport import Transport
+from utils.kinematics import KinematicsCache
 
 class Tools():
     # tool creation is located in the admin console
@@ -12,33 +12,33 @@ class Tools():
         self._port = port
         self._token = token
         self.config = Config()
+        self._transport = Transport.get(host, port)
+        self._kinematics_cache = KinematicsCache.get_shared(host, port)
 
     def get_tool_info(self, tool_id:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/get-tool"
         data = {
             "id": tool_id,
             "token": self._token
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
+        return self._transport.post("/api/get-tool", json=data).json()
     
     def set_tool_info(self, tool_id:str, config:Any) -> dict:
-        url = f"https://{self._host}:{self._port}/api/set-tool"
         data = {
             "id": tool_id,
             "config": config,
             "token": self._token
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
+        response = self._transport.post("/api/set-tool", json=data).json()
+        self._kinematics_cache.invalidate_tool(tool_id)
+        return response
     
     def set_robot_tool(self, robot_data:RobotData, tool_id:str) -> dict:
-        url = f"https://{self._host}:{self._port}/api/set-robot-tool"
         data = {
             "robot": robot_data.name,
             "code": robot_data.code,
             "id": tool_id,
             "token": self._token
             }
-        verify = self.config.verify
-        return requests.post(url, verify=verify, json=data).json()
+        response = self._transport.post("/api/set-robot-tool", json=data).json()
+        self._kinematics_cache.set_tool(robot_data.name, tool_id)
+        return response
@@ -4,8 +4,6 @@ The tokenizer class is used to automatically send a token to the system class af
 
 """
 
-import requests
-
 import __tools
 import __robot
 import __bases
@@ -33,15 +31,13 @@ class system(__robot.Robot, __tools.Tools, __bases.Bases):
         self.config = Config()
         
     def set_emergency(self, robot_data:RobotData, state:bool) -> dict:
-        url = f"https://{self._host}:{self._port}/api/set-emergency"
         data = {
             "robot": robot_data.name,
             "token": self._token,
             "state": str(state),
             "code" : robot_data.code
             }
-        verify = self.config.verify
-        resp = requests.post(url, verify=verify, json=data).json()
+        resp = self._transport.post("/api/set-emergency", json=data).json()
         return resp
         
 
@@ -9,12 +9,12 @@ the received token is transferred to the tokenizer class and the system class is
 
 import hashlib
 
-import requests
-
 import __user as User
 import __admin as Admin
 import __super_admin as SuperAdmin
+from __async_system import AsyncRole
 from utils.config import Config
+from utils.transport import Transport
 
 class Auth():
     
@@ -30,14 +30,12 @@ class Auth():
             if self.config.login_simulation:
                 return self.config.simulation_role, self.config.simulation_token
             else:
-                url = f"https://{self.ip}:{self.port}/api/get-account-data"
                 data = {
                     "name": name,
                     "password": hashlib.sha256(password.encode(encoding="utf-8")).hexdigest(), 
                     "server_token": self.server_token
                     }
-                verify = self.config.verify
-                response = requests.post(url, verify=verify, json=data).json()
+                response = Transport.get(self.ip, self.port).post("/api/get-account-data", json=data).json()
                 if response.get("status"):
                     return response.get("data").get("role"), response.get("data").get("token")
                 else:
@@ -68,3 +66,18 @@ class Auth():
                 return SuperAdmin
             else:
                 raise TypeError("You don't have enough rights")
+
+    def async_user(self, name, password) -> AsyncRole:
+        """ `user` with coroutine commands run on a thread pool, see __async_system """
+        role = self.user(name, password)
+        return AsyncRole(role) if role is not None else None
+
+    def async_admin(self, name, password) -> AsyncRole:
+        """ `admin` with coroutine commands run on a thread pool, see __async_system """
+        role = self.admin(name, password)
+        return AsyncRole(role) if role is not None else None
+
+    def async_super_admin(self, name, password) -> AsyncRole:
+        """ `super_admin` with coroutine commands run on a thread pool, see __async_system """
+        role = self.super_admin(name, password)
+        return AsyncRole(role) if role is not None else None
@@ -0,0 +1,66 @@
+"""  Memory benchmark for positions kept in memory
+
+Measures bytes per point with tracemalloc for the dict based layout used before
+`__slots__` (reproduced below) and for the current XYZPos, AnglePos and Trajectory.
+
+Run from the `main` folder: python benchmarks/memory.py
+
+"""
+
+import os
+import sys
+import inspect
+import tracemalloc
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+from data_types import XYZPos, AnglePos, Trajectory
+
+class LegacyXYZPos:
+    """ XYZPos layout before `__slots__` """
+
+    def __init__(self, x, y, z, a, b, c):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.a = a
+        self.b = b
+        self.c = c
+        self.smooth_distance = 5
+        self.smooth_endPoint = None
+        self.circ_angle = None
+        self.send = ""
+
+class LegacyAnglePos:
+    """ AnglePos layout before `__slots__` """
+
+    def __init__(self, values):
+        self.angles = {"send": ""}
+        for index, value in enumerate(values):
+            self.angles[f"J{index + 1}"] = value
+
+def bytes_per_point(factory, count:int) -> float:
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    points = factory(count)
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in end.compare_to(start, "filename"))
+    del points
+    return size / count
+
+def run(count:int=10000, joints:int=6) -> dict:
+    # Values are shifted floats so every point owns its own float objects, like real trajectories
+    results = {
+        "XYZPos (dict)": bytes_per_point(lambda n: [LegacyXYZPos(i + .1, i + .2, i + .3, i + .4, i + .5, i + .6) for i in range(n)], count),
+        "XYZPos (slots)": bytes_per_point(lambda n: [XYZPos.from_list([i + .1, i + .2, i + .3, i + .4, i + .5, i + .6]) for i in range(n)], count),
+        "Trajectory row": bytes_per_point(lambda n: Trajectory([[i + .1, i + .2, i + .3, i + .4, i + .5, i + .6] for i in range(n)]), count),
+        "AnglePos (dict)": bytes_per_point(lambda n: [LegacyAnglePos([i + j + .1 for j in range(joints)]) for i in range(n)], count),
+        "AnglePos (slots)": bytes_per_point(lambda n: [AnglePos().from_list([i + j + .1 for j in range(joints)]) for i in range(n)], count),
+    }
+    return results
+
+if __name__ == '__main__':
+    for name, size in run().items():
+        print(f"{name:<18} {size:>8.1f} bytes/point")
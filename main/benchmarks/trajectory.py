@@ -0,0 +1,256 @@
+"""  Benchmark suite for trajectory generation and motion submission
+
+Cases (each one parametrized by the lists given on the command line):
+    line, arc                  TrajectoryConstructor.generate_line_points / generate_arc_3d   (points)
+    smooth                     MotionProgram.compile + build of a smoothed LIN chain         (chains)
+    spline_scipy, catmull_rom  Spline._create_scypy_spline_points / _create_catmull_rom_spline_points (points)
+    speed, speeds              Robot.calculate_speed per point / Robot.calculate_speeds       (points)
+    triggers                   TrajectoryConstructor.set_trigger_points                       (points x triggers)
+    lin, circ                  end to end Robot.lin / Robot.circ against utils.mock_server    (points x triggers)
+
+For every case the wall time of `--repeat` runs (min/median/mean), the allocations of one
+run (tracemalloc peak and size still allocated after it) and the peak RSS of the process are measured.
+Cases run in their own process by default so the peak RSS belongs to that case only.
+Results are saved as JSON, `--compare` prints the median time ratio to an older result file.
+
+Run from the `main` folder:
+    python benchmarks/trajectory.py --points 10,100,1000,10000,100000 --output results.json
+    python benchmarks/trajectory.py --cases lin,circ --points 1000 --compare results.json
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Union
+import multiprocessing
+import statistics
+import subprocess
+import argparse
+import platform
+import datetime
+import tracemalloc
+import inspect
+import json
+import time
+import gc
+import os
+import sys
+
+import numpy as np
+import scipy
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+from data_types import XYZPos, AnglePos, RobotData, Spline, Trajectory, StaticData
+from utils.trajectory_creator import TrajectoryConstructor, MotionProgram
+from utils.config import Config
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss() -> Union[int, None]:
+    """ Peak resident set size of this process in bytes """
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+def control_points(count:int) -> list[XYZPos]:
+    return [XYZPos.from_list([200 + 50 * np.sin(index), 40 * index, 100 + 10 * np.cos(index), 0, 0, 90]) for index in range(count)]
+
+# Cases: setup(params) returns the function that is measured
+def setup_line(points:int, **_) -> Callable:
+    start, end = XYZPos.from_list([200, 200, 100, 90, 0, 0]), XYZPos.from_list([100, 100, 67, 90, 0, 90])
+    return lambda: TrajectoryConstructor.generate_line_points(start, end, points)
+
+def setup_arc(points:int, **_) -> Callable:
+    p1, p2, p3 = XYZPos.from_list([100, -100, 67]), XYZPos.from_list([200, 0, 67]), XYZPos.from_list([100, 100, 67])
+    return lambda: TrajectoryConstructor().generate_arc_3d(p1, p2, p3, points, arc_angle=270)
+
+def setup_smooth(chains:int, segment_points:int, **_) -> Callable:
+    robot_data = RobotData("bench", "0")
+
+    def run():
+        # Зигзаг из LIN участков, каждый сглаживается со следующим
+        chain = [XYZPos.from_list([200 + 100 * (index % 2), 100 * index, 67]) for index in range(chains + 1)]
+        for point, next_point in zip(chain, chain[1:]):
+            point.smooth_endPoint = next_point
+            point.smooth_distance = 20
+        return MotionProgram.compile(chain[0]).build(robot_data, XYZPos.from_list([100, -100, 67]), segment_points)
+    return run
+
+def setup_spline_scipy(points:int, **_) -> Callable:
+    spline = Spline(RobotData("bench", "0"), StaticData.CoordinatesSystem.WORLD, None, num_points=points).add_point(*control_points(10))
+    return spline._create_scypy_spline_points
+
+def setup_catmull_rom(points:int, **_) -> Callable:
+    spline = Spline(RobotData("bench", "0"), StaticData.CoordinatesSystem.WORLD, None, num_points=points).add_point(*control_points(10))
+    return spline._create_catmull_rom_spline_points
+
+def joint_path(points:int) -> list[AnglePos]:
+    return [AnglePos().from_list([index * .01 + joint for joint in range(6)]) for index in range(points)]
+
+def setup_speed(points:int, **_) -> Callable:
+    from __robot import Robot
+    angles = joint_path(points)
+
+    def run():
+        start = AnglePos().from_list([0] * 6)
+        for angle in angles:
+            Robot.calculate_speed(start, angle, 25)
+            start = angle
+    return run
+
+def setup_speeds(points:int, **_) -> Callable:
+    from __robot import Robot
+    angles = joint_path(points)
+    return lambda: Robot.calculate_speeds(AnglePos().from_list([0] * 6), angles, 25)
+
+def trigger_lengths(trajectory:Trajectory, triggers:int) -> dict:
+    length = trajectory.arc_length_index().length
+    return {f"trigger_{index}": length * (index + 1) / (triggers + 1) for index in range(triggers)}
+
+def setup_triggers(points:int, triggers:int, **_) -> Callable:
+    trajectory = setup_line(points)()
+    lengths = trigger_lengths(trajectory, triggers)
+    return lambda: TrajectoryConstructor.set_trigger_points(trajectory.copy(), lengths)
+
+def mock_system():
+    """ SuperAdmin system connected to a new in-process mock server """
+    from utils.mock_server import MockURSystem
+    import __super_admin as SuperAdmin
+    server = MockURSystem(port=0, step_time=0).start()
+    Config().scheme = "http"
+    system = SuperAdmin.system("127.0.0.1", server.port, server.accounts["SuperAdmin"]["token"])
+    system.add_robot(RobotData("bench", "0"), "bench", 6)
+    return system
+
+def setup_lin(points:int, triggers:int, **_) -> Callable:
+    system, robot_data = mock_system(), RobotData("bench", "0")
+    start, end = XYZPos.from_list([300, -100, 150, 0, 0, 0]), XYZPos.from_list([300, 100, 150, 0, 0, 0])
+    lengths = trigger_lengths(setup_line(points)(), triggers) if triggers else None
+    return lambda: system.lin(robot_data, end, StaticData.CoordinatesSystem.WORLD, points, triggers=lengths, start=start)
+
+def setup_circ(points:int, triggers:int, **_) -> Callable:
+    system, robot_data = mock_system(), RobotData("bench", "0")
+    circle = [XYZPos.from_list([300, -100, 150]), XYZPos.from_list([350, 0, 150]), XYZPos.from_list([300, 100, 150])]
+    lengths = trigger_lengths(Trajectory.from_points(setup_arc(points)()[0]), triggers) if triggers else None
+    return lambda: system.circ(robot_data, circle, StaticData.CoordinatesSystem.WORLD, points, triggers=lengths, arc_angle=270)
+
+CASES = {
+    "line": (setup_line, ("points",)),
+    "arc": (setup_arc, ("points",)),
+    "smooth": (setup_smooth, ("chains",)),
+    "spline_scipy": (setup_spline_scipy, ("points",)),
+    "catmull_rom": (setup_catmull_rom, ("points",)),
+    "speed": (setup_speed, ("points",)),
+    "speeds": (setup_speeds, ("points",)),
+    "triggers": (setup_triggers, ("points", "triggers")),
+    "lin": (setup_lin, ("points", "triggers")),
+    "circ": (setup_circ, ("points", "triggers")),
+    }
+
+def run_case(name:str, params:dict, repeat:int) -> dict:
+    setup, _ = CASES[name]
+    func = setup(**params)
+    func()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    _current, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+    return {
+        "name": name,
+        "params": {key: params[key] for key in CASES[name][1]},
+        "repeat": repeat,
+        "time_min": min(times),
+        "time_median": statistics.median(times),
+        "time_mean": statistics.fmean(times),
+        "alloc_peak": alloc_peak,
+        "alloc_retained": allocated,
+        "rss_peak": peak_rss(),
+        }
+
+def case_grid(names:list[str], args:argparse.Namespace) -> list[tuple[str, dict]]:
+    grid = []
+    for name in names:
+        axes = CASES[name][1]
+        combinations = [{"segment_points": args.segment_points}]
+        for axis in axes:
+            combinations = [dict(combination, **{axis: value}) for combination in combinations for value in getattr(args, axis)]
+        grid.extend((name, combination) for combination in combinations)
+    return grid
+
+def metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=parentdir, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        }
+
+def case_key(result:dict) -> str:
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+def compare(results:list[dict], path:str) -> None:
+    with open(path, encoding="utf-8") as file:
+        previous = {case_key(result): result for result in json.load(file)["results"]}
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is not None:
+            print(f"{result['name']:<13} {json.dumps(result['params']):<40} {old['time_median'] / result['time_median']:>7.2f}x faster")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trajectory generation and motion submission benchmarks")
+    numbers = lambda value: [int(item) for item in value.split(",")]
+    parser.add_argument("--cases", type=lambda value: value.split(","), default=list(CASES))
+    parser.add_argument("--points", type=numbers, default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--chains", type=numbers, default=[1, 4, 16])
+    parser.add_argument("--triggers", type=numbers, default=[0, 10, 100])
+    parser.add_argument("--segment-points", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-isolate", action="store_true", help="run every case in this process")
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    results = []
+    for name, params in case_grid(args.cases, args):
+        if args.no_isolate:
+            result = run_case(name, params, args.repeat)
+        else:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(run_case, name, params, args.repeat).result()
+        results.append(result)
+        rss = f"{result['rss_peak'] / 2 ** 20:8.1f} MiB" if result["rss_peak"] is not None else "       -    "
+        print(f"{name:<13} {json.dumps(result['params']):<40} {result['time_median'] * 1000:>10.3f} ms"
+              f" {result['alloc_peak'] / 2 ** 20:>9.2f} MiB alloc {rss} rss")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"meta": metadata(), "results": results}, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
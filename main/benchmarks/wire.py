@@ -0,0 +1,60 @@
+"""  Encode/decode benchmark of trajectory payloads
+
+Compares the JSON body of `set_robot_position` (list of AnglePos dicts) with the
+binary format of utils.wire in float64 and float32: payload size and encode/decode
+time of a 6 joint trajectory.
+
+Run from the `main` folder: python benchmarks/wire.py [points]
+
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+from data_types import AnglePos
+from utils.wire import WireArray, encode, decode
+
+def best_time(func, repeat:int=5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def make_angles(count:int, joints:int=6) -> list[AnglePos]:
+    angles = [AnglePos().from_list([index * .001 + joint for joint in range(joints)]) for index in range(count)]
+    for index in range(0, count, 1000):
+        angles[index]["send"] = f"trigger_{index}"
+    return angles
+
+def run(count:int=20000, joints:int=6) -> dict:
+    angles = make_angles(count, joints)
+    fields = {"robot": "robot", "token": "token", "code": "code"}
+
+    def encode_json():
+        return json.dumps(dict(fields, angles_data=[angle.export_to(export_type=dict) for angle in angles])).encode("utf-8")
+
+    def decode_json(body):
+        return json.loads(body)["angles_data"]
+
+    results = {}
+    body = encode_json()
+    results["json"] = {"bytes": len(body), "encode": best_time(encode_json), "decode": best_time(lambda: decode_json(body))}
+    for dtype in ("float64", "float32"):
+        def encode_binary():
+            return encode(fields, [WireArray.from_angles("angles_data", angles)], dtype)
+        body = encode_binary()
+        results[dtype] = {"bytes": len(body), "encode": best_time(encode_binary), "decode": best_time(lambda: decode(body))}
+    return results
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for name, result in run(count).items():
+        print(f"{name:<8} {result['bytes'] / 1024:>10.1f} KiB  encode {result['encode'] * 1000:>8.2f} ms  decode {result['decode'] * 1000:>8.2f} ms")
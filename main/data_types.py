@@ -1,13 +1,13 @@
 """ Classes for creating robots positions or robot data"""
 
 from typing import Union, TYPE_CHECKING, Any
+from collections.abc import MutableMapping
 from dataclasses import dataclass
 
-import requests
-from scipy.interpolate import CubicSpline
 import numpy as np
 
 from utils.config import Config
+from utils import splines
 
 if TYPE_CHECKING:
     import __super_admin as super_admin
@@ -15,6 +15,7 @@ if TYPE_CHECKING:
     import __user as user
 
 class XYZPos:
+    __slots__ = ("x", "y", "z", "a", "b", "c", "smooth_distance", "smooth_endPoint", "circ_angle", "send")
     
     def __init__(self, smooth_distance:float=5, smooth_endPoint:Union['XYZPos', list['XYZPos'],None]=None, circ_angle:Union[float, None]=None, send:str=None, **kwargs):
         self.x:float = kwargs.get('x')
@@ -33,33 +34,37 @@ class XYZPos:
     
     def __eq__(self, value:"XYZPos"):
         return self.x == value.x and self.y == value.y and self.z == value.z
+
+    @classmethod
+    def _create(cls, x:float, y:float, z:float, a:float, b:float, c:float, send:str=None) -> "XYZPos":
+        """ Fast constructor without kwargs parsing, same defaults as `__init__` """
+        point = object.__new__(cls)
+        point.x = x
+        point.y = y
+        point.z = z
+        point.a = 0 if a is None else a
+        point.b = 0 if b is None else b
+        point.c = 0 if c is None else c
+        point.smooth_distance = 5
+        point.smooth_endPoint = None
+        point.circ_angle = None
+        point.send = "" if send is None else send
+        return point
         
     @classmethod
     def from_dict(cls, data:dict):
-        new_x = data['x']
-        new_y = data['y']
-        new_z = data['z']
         new_send = data.get("send")
         if (isinstance(data['a'], (int, float)) and isinstance(data['b'], (int, float)) and isinstance(data['c'], (int, float))):
-            new_a = data['a']
-            new_b = data['b']
-            new_c = data['c']
-            return cls(x=new_x, y=new_y, z=new_z, a=new_c, b=new_b, c=new_a, send=new_send)
+            return cls._create(data['x'], data['y'], data['z'], data['c'], data['b'], data['a'], new_send)
         else:
-            return cls(x=new_x, y=new_y, z=new_z, a=0, b=0, c=0, send=new_send)
+            return cls._create(data['x'], data['y'], data['z'], 0, 0, 0, new_send)
     
     @classmethod
     def from_list(cls, data:list):
-        new_x = data[0]
-        new_y = data[1]
-        new_z = data[2]
         if len(data) > 3:
-            new_a = data[3]
-            new_b = data[4]
-            new_c = data[5]
-            return cls(x=new_x, y=new_y, z=new_z, a=new_c, b=new_b, c=new_a)
+            return cls._create(data[0], data[1], data[2], data[5], data[4], data[3])
         else:
-            return cls(x=new_x, y=new_y, z=new_z, a=0, b=0, c=0)
+            return cls._create(data[0], data[1], data[2], 0, 0, 0)
         
     def export_to(self, export_type:Union[list, dict]):
         if isinstance(export_type, dict) or export_type is dict:
@@ -77,36 +82,109 @@ class XYZPos:
         else:
             raise ValueError('Export type must be a list or dictionary')  
         
+class AngleView(MutableMapping):
+    """ Live dict-like view of an `AnglePos` \n
+    Reads and writes go straight to the position, `pos.angles["J1"] = 10` changes `pos`.
+    """
+    __slots__ = ("_position",)
+
+    def __init__(self, position:"AnglePos"):
+        self._position = position
+
+    def __getitem__(self, key:str) -> Any:
+        if key not in self._position._keys:
+            raise KeyError(key)
+        return self._position[key]
+
+    def __setitem__(self, key:str, value:Any) -> None:
+        if not isinstance(key, str):
+            raise TypeError("Angle keys can only be of type string")
+        self._position[key] = value
+
+    def __delitem__(self, key:str) -> None:
+        position = self._position
+        if key not in position._keys:
+            raise KeyError(key)
+        index = position._keys.index(key)
+        position._keys = position._layout(position._keys[:index] + position._keys[index + 1:])
+        del position._values[index]
+
+    def __iter__(self):
+        return iter(self._position._keys)
+
+    def __len__(self) -> int:
+        return len(self._position._keys)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
 class AnglePos:
+    """ Joint angles keyed by "J1".."Jn" plus "send" \n
+    Keys and values are kept in two parallel sequences instead of a dict,
+    the keys tuple is shared by every AnglePos with the same layout.
+    `angles` is a live `AngleView`, `export_to(dict)` and `from_dict` copy.
+    """
+    __slots__ = ("_keys", "_values")
+    _layouts:dict = {}
+    _joint_names:dict = {}
     
     def __init__(self, send:str=None, use_send:bool=True, *args):
-        self.angles = {}
+        keys = []
+        self._values = []
         if use_send:
-            self.angles["send"] = "" if send is None else send
+            keys.append("send")
+            self._values.append("" if send is None else send)
         for index, arg in enumerate(args):
             if not isinstance(arg, (int, float)):
                 raise TypeError('All arguments must be numbers')
             else:
-                self.angles[f"J{index}"] = arg
+                keys.append(f"J{index}")
+                self._values.append(arg)
+        self._keys = self._layout(keys)
+
+    @classmethod
+    def _layout(cls, keys) -> tuple:
+        keys = tuple(keys)
+        return cls._layouts.setdefault(keys, keys)
+
+    @classmethod
+    def _joints(cls, count:int) -> tuple:
+        names = cls._joint_names.get(count)
+        if names is None:
+            names = cls._joint_names[count] = tuple(f"J{index + 1}" for index in range(count))
+        return names
+
+    @property
+    def angles(self) -> AngleView:
+        return AngleView(self)
+
+    @angles.setter
+    def angles(self, data:dict) -> None:
+        self._keys = self._layout(data.keys())
+        self._values = list(data.values())
                 
     def __len__(self):
-        return len(self.angles.keys())
+        return len(self._keys)
     
     def __getitem__(self, key:str) -> Union[Any, None]:
         if isinstance(key, str):
-            return self.angles.get(key)
+            if key in self._keys:
+                return self._values[self._keys.index(key)]
+            return None
         elif isinstance(key, int):
-            return self.export_to(list)[key]
+            return self._values[key]
         else:
             raise TypeError("Subscription argument can only be of type string or int")
     
     def __setitem__(self, key:str, value:Any) -> None:
         if isinstance(key, str):
-            self.angles[key] = value
+            if key in self._keys:
+                self._values[self._keys.index(key)] = value
+            else:
+                self._keys = self._layout(self._keys + (key,))
+                self._values.append(value)
         elif isinstance(key, int):
-            values = list(self.angles.keys())
-            str_key = values.index(key)
-            self.angles[str_key] = value
+            self._values[key] = value
         else:
             raise TypeError("Subscription argument can only be of type string or int")
         
@@ -114,38 +192,206 @@ class AnglePos:
         return str(self.angles)
         
     def from_dict(self, data:dict, rewrite:bool=False):
+        """ Import data from dict \n
+        The values are copied, later changes of `data` don't affect the position
+        """
         if rewrite:
             self.angles = data
         else:
             for key, value in data.items():
-                self.angles[key] = value
+                self[key] = value
                 
-        if "send" not in list(self.angles.keys()):
-            self.angles["send"] = ""
+        if "send" not in self._keys:
+            self["send"] = ""
         return self
     
     def from_list(self, data:list):
         """ Import data from list \n
         Used only for angles parameters, not `send` parameter
         """
-        for index, arg in enumerate(data):
+        for arg in data:
             if not isinstance(arg, (int, float)):
                 raise TypeError('All arguments must be numbers')
-            else:
-                self.angles[f"J{index + 1}"] = arg
+        names = self._joints(len(data))
+        if self._keys.count("send") == len(self._keys):
+            # Fresh object: append the joints without per key lookups
+            self._keys = self._layout(self._keys + names)
+            self._values.extend(data)
+        else:
+            for name, arg in zip(names, data):
+                self[name] = arg
         return self
                 
+    def joints(self) -> list:
+        """ Joint values without the `send` parameter """
+        return [value for key, value in zip(self._keys, self._values) if key != "send"]
+                
     def export_to(self, export_type:Union[list, dict]):
+        """ Copy of the data as list or dict, change the position through `angles` or subscription """
         if isinstance(export_type, dict) or export_type is dict:
-            return self.angles
+            return dict(zip(self._keys, self._values))
         elif isinstance(export_type, list) or export_type is list:
-            return list(self.angles.values())
+            return list(self._values)
         else:
             raise ValueError('Export type must be a list or dictionary')
-           
+
+class ArcLengthIndex:
+    """ Cumulative length of a trajectory for O(log n) distance queries \n
+    Uses the same metric as `TrajectoryConstructor.distance_between_points` (all six columns).
+    """
+
+    def __init__(self, positions:np.ndarray):
+        self.positions = positions
+        if len(positions) == 0:
+            self.cumulative = np.zeros(0)
+        else:
+            segments = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+            self.cumulative = np.concatenate([[0.0], np.cumsum(segments)])
+
+    @property
+    def length(self) -> float:
+        return float(self.cumulative[-1]) if len(self.cumulative) else 0.0
+
+    def trigger_indices(self, lengths:Union[list[float], np.ndarray]) -> np.ndarray:
+        """ Index of the first point whose following segment ends further than `length`, for every length """
+        found = np.searchsorted(self.cumulative, np.asarray(lengths, dtype=np.float64), side="right")
+        if np.any(found >= len(self.cumulative)):
+            raise ValueError("The specified length exceeds the trajectory length.")
+        return np.maximum(found - 1, 0)
+
+    def trigger_index(self, length:float) -> int:
+        return int(self.trigger_indices([length])[0])
+
+    def point_at(self, distance:float) -> XYZPos:
+        """ Point interpolated at `distance` from the start \n
+        Beyond the ends the first or the last segment is extended, as `TrajectoryConstructor.point_on_trajectory` always did.
+        """
+        if len(self.cumulative) == 0:
+            raise ValueError("Trajectory is empty")
+        if len(self.cumulative) == 1:
+            return XYZPos.from_list(self.positions[0].tolist())
+        index = min(max(int(np.searchsorted(self.cumulative, distance, side="right")), 1), len(self.cumulative) - 1)
+        start, end = self.cumulative[index - 1], self.cumulative[index]
+        fraction = (distance - start) / (end - start) if end > start else 0.0
+        row = self.positions[index - 1] + (self.positions[index] - self.positions[index - 1]) * fraction
+        return XYZPos.from_list(row.tolist())
+
+class Trajectory:
+    """ Array backed trajectory \n
+    Positions are stored in one contiguous (N, 6) float64 array using the `XYZPos.export_to(list)`
+    layout, `send` markers are stored sparse as {index: marker}.
+    XYZPos objects are only created when points are accessed.
+    """
+
+    def __init__(self, positions:Union[np.ndarray, list, None]=None, send:Union[dict, None]=None):
+        if positions is None:
+            positions = np.empty((0, 6))
+        self.positions:np.ndarray = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 6)
+        self.send:dict[int, str] = {} if send is None else {int(index): marker for index, marker in send.items() if marker}
+        self._arc_length_index:Union[ArcLengthIndex, None] = None
+
+    @classmethod
+    def from_points(cls, points:Union["Trajectory", list[XYZPos]]) -> "Trajectory":
+        if isinstance(points, Trajectory):
+            return points.copy()
+        positions = np.array([[point.x, point.y, point.z, point.c, point.b, point.a] for point in points], dtype=np.float64)
+        send = {index: point.send for index, point in enumerate(points) if point.send}
+        return cls(positions, send)
+
+    def copy(self) -> "Trajectory":
+        return Trajectory(self.positions.copy(), dict(self.send))
+
+    def __len__(self):
+        return self.positions.shape[0]
+
+    def __str__(self):
+        return f"Trajectory: {len(self)} points, send markers {self.send}"
+
+    def _normalize_index(self, index:int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Trajectory index out of range")
+        return index
+
+    def _point(self, index:int, row:list) -> XYZPos:
+        point = XYZPos.from_list(row)
+        point.send = self.send.get(index, "")
+        return point
+
+    def __getitem__(self, index:Union[int, slice]) -> Union[XYZPos, "Trajectory"]:
+        if isinstance(index, slice):
+            indices = range(len(self))[index]
+            send = {new_index: self.send[old_index] for new_index, old_index in enumerate(indices) if old_index in self.send}
+            return Trajectory(self.positions[index], send)
+        index = self._normalize_index(index)
+        return self._point(index, self.positions[index].tolist())
+
+    def markers(self) -> list[str]:
+        """ Send markers in the order the robot passes them """
+        return [self.send[index] for index in sorted(self.send)]
+
+    def take(self, indices:list[int]) -> "Trajectory":
+        """ New trajectory made of the points at `indices` """
+        send = {new_index: self.send[old_index] for new_index, old_index in enumerate(indices) if old_index in self.send}
+        return Trajectory(self.positions[list(indices)], send)
+
+    def __setitem__(self, index:int, point:XYZPos) -> None:
+        index = self._normalize_index(index)
+        self.positions[index] = [point.x, point.y, point.z, point.c, point.b, point.a]
+        self._arc_length_index = None
+        self.set_send(index, point.send)
+
+    def __iter__(self):
+        for index, row in enumerate(self.positions.tolist()):
+            yield self._point(index, row)
+
+    def __add__(self, other:Union["Trajectory", list[XYZPos]]) -> "Trajectory":
+        other = Trajectory.from_points(other) if not isinstance(other, Trajectory) else other
+        send = dict(self.send)
+        send.update({index + len(self): marker for index, marker in other.send.items()})
+        return Trajectory(np.vstack([self.positions, other.positions]), send)
+
+    def arc_length_index(self) -> ArcLengthIndex:
+        """ Cumulative length index, computed once and reused until a point is replaced """
+        if self._arc_length_index is None:
+            self._arc_length_index = ArcLengthIndex(self.positions)
+        return self._arc_length_index
+
+    def set_send(self, index:int, marker:str) -> None:
+        index = self._normalize_index(index)
+        if marker:
+            self.send[index] = marker
+        else:
+            self.send.pop(index, None)
+
+    def send_markers(self) -> list[str]:
+        """ Dense list of `send` markers, one per point """
+        markers = [""] * len(self)
+        for index, marker in self.send.items():
+            markers[index] = marker
+        return markers
+
+    def export_to(self, export_type:Union[list, dict]) -> list:
+        """ Export every point like `XYZPos.export_to` without creating XYZPos objects """
+        markers = self.send_markers()
+        rows = self.positions.tolist()
+        if isinstance(export_type, dict) or export_type is dict:
+            return [{'x': row[0], 'y': row[1], 'z': row[2], 'a': row[3], 'b': row[4], 'c': row[5], 'send': marker}
+                    for row, marker in zip(rows, markers)]
+        elif isinstance(export_type, list) or export_type is list:
+            return [row + [marker] for row, marker in zip(rows, markers)]
+        else:
+            raise ValueError('Export type must be a list or dictionary')
+
 class Spline:
+    """ Cubic spline motion through the added points \n
+    By default `num_points` are placed uniformly in the spline parameter, with `arc_length=True` they
+    are placed at uniform distance along the path, with `spacing` (mm) at most that far apart.
+    """
     
-    def __init__(self, robot_data: "RobotData", coordinate_system:str, system: Union["super_admin.system", "admin.system", "user.system"], points_count: int = 25, speed_multiplier: float = 1, num_points: int = 50):
+    def __init__(self, robot_data: "RobotData", coordinate_system:str, system: Union["super_admin.system", "admin.system", "user.system"], points_count: int = 25, speed_multiplier: float = 1, num_points: int = 50,
+                 arc_length:bool = False, spacing:float = None):
         self.points: list[XYZPos] = []
         self.system = system
         self.robot_data = robot_data
@@ -153,10 +399,16 @@ class Spline:
         self.lin_step_count = points_count
         self.speed_multiplier = speed_multiplier
         self.num_points = num_points
+        self.arc_length = arc_length
+        self.spacing = spacing
         self.config = Config()
         
-    def add_point(self, *point: XYZPos) -> "Spline":
-        self.points.extend(point)
+    def add_point(self, *point: Union[XYZPos, Trajectory]) -> "Spline":
+        for item in point:
+            if isinstance(item, Trajectory):
+                self.points.extend(item)
+            else:
+                self.points.append(item)
         return self
     
     def catmull_rom_spline(self, P0, P1, P2, P3, t):
@@ -172,24 +424,16 @@ class Spline:
         return P0 * f1 + P1 * f2 + P2 * f3 + P3 * f4
 
     def catmull_rom_chain(self, points):
-        """ Генерирует гладкий сплайн через все заданные точки """
-        new_points = []
-
-        for i in range(1, len(points) - 2):  # Берем по 4 точки для интерполяции
-            P0, P1, P2, P3 = points[i - 1], points[i], points[i + 1], points[i + 2]
-            for t in np.linspace(0, 1, self.num_points // (len(points) - 3)):
-                new_point = self.catmull_rom_spline(P0, P1, P2, P3, t)
-                new_points.append(new_point)
-
-        return np.array(new_points)
+        """ Генерирует гладкий сплайн через все заданные точки (одно матричное произведение на все сегменты) """
+        return splines.catmull_rom_chain(points, self.num_points // (len(points) - 3))
 
-    def _create_catmull_rom_spline_points(self) -> list[XYZPos]:
+    def _create_catmull_rom_spline_points(self) -> Trajectory:
         """ Преобразует точки в сглаженный сплайн Катмулл-Рома """
         if len(self.points) < 4:
             raise ValueError("Для сглаженного сплайна требуется минимум 4 точки.")
 
         # Преобразуем точки в массив NumPy
-        converted_points = np.array([point.export_to(export_type=list)[0:-1] for point in self.points])
+        converted_points = Trajectory.from_points(self.points).positions
 
         # Добавляем фиктивные крайние точки (чтобы не терять сегменты)
         extended_points = np.vstack([converted_points[0], converted_points, converted_points[-1]])
@@ -197,79 +441,22 @@ class Spline:
         # Генерируем сглаженный сплайн
         new_points = self.catmull_rom_chain(extended_points)
 
-        # Конвертируем обратно в список XYZPos
-        return [XYZPos().from_list(point) for point in new_points]
+        return Trajectory(new_points)
 
-    def _create_scypy_spline_points(self) -> list[XYZPos]:
+    def _create_scypy_spline_points(self) -> Trajectory:
         # Преобразуем все точки в numpy-массив
-        converted_points = [point.export_to(export_type=list) for point in self.points]
-        points = np.array(converted_points)
-        # Разделяем координаты и углы
-        x, y, z = points[:, 0], points[:, 1], points[:, 2]
-        a, b, c = points[:, 3], points[:, 4], points[:, 5]
-        # Создаем параметр t для интерполяции (равномерное распределение)
-        t = np.linspace(0, 1, len(points))
-        
-        # Интерполяция кубическими сплайнами по каждой координате и углу
-        cs_x = CubicSpline(t, x)
-        cs_y = CubicSpline(t, y)
-        cs_z = CubicSpline(t, z)
-        cs_a = CubicSpline(t, a)
-        cs_b = CubicSpline(t, b)
-        cs_c = CubicSpline(t, c)
-        # Новый параметр t с нужным количеством точек
-        t_fine = np.linspace(0, 1, self.num_points)
-        # Вычисляем новые значения по сплайнам
-        x_new = cs_x(t_fine)
-        y_new = cs_y(t_fine)
-        z_new = cs_z(t_fine)
-        a_new = cs_a(t_fine)
-        b_new = cs_b(t_fine)
-        c_new = cs_c(t_fine)
-        # Формируем новые точки
-        new_points = np.array([x_new, y_new, z_new, a_new, b_new, c_new]).T
-        # Преобразуем массив в список объектов XYZPos
-        result_points = [XYZPos().from_list(p.tolist()) for p in new_points]
-
-        return result_points
+        points = Trajectory.from_points(self.points).positions
+        if self.arc_length or self.spacing is not None:
+            return Trajectory(splines.cubic_spline_arc_length(points, self.num_points, self.spacing))
+        # Один сплайн по всем шести столбцам через кэшированную базисную матрицу
+        return Trajectory(splines.cubic_spline(points, self.num_points))
             
     def start_move(self) -> "ReturnData":
-        full_trajectory_points = self._create_scypy_spline_points()
+        with self.system.metrics.stage("trajectory"):
+            full_trajectory_points = self._create_scypy_spline_points()
         if self.config.trajectory_send:
-            arc_points = self.system.xyz_to_angle(self.robot_data, full_trajectory_points, self.coordinate_system, is_multi_point=True)
-            # Set send parameter from xyz point to angle point
-            for index, point in enumerate(full_trajectory_points):
-                    arc_points[index]["send"] = point.send
-                    
-            new_speeds:list = []
-            for index, point in enumerate(arc_points):
-                old_point:AnglePos = None
-                if index == 0:
-                    url = f"https://{self.system._host}:{str(self.system._port)}/GetCurentPosition"
-                    data = {
-                        "robot": self.robot_data.name,
-                        "token": self.system._token
-                        }
-                    verify = self.config.verify
-                    current_angles = requests.post(url, verify=verify, json=data).json()["data"]
-                    
-                    if isinstance(current_angles, list):
-                        old_point = AnglePos().from_dict(current_angles[-1])
-                    else:
-                        old_point = AnglePos().from_dict(current_angles)
-                else:
-                    old_point = arc_points[index-1]
-                speed = self.system._speed_multiplier(self.system.calculate_speed(old_point, point, self.lin_step_count), self.speed_multiplier)
-                new_speeds.append(AnglePos(use_send=False).from_list(speed))
-                
-            position_responce = self.system.set_robot_position(self.robot_data, arc_points, is_multi_point=True, last_point_position=self.points[-1])
-            speed_responce = self.system.set_robot_speed(self.robot_data, new_speeds, is_multi_point=True)
-            
-            response_data = {"Set position": position_responce[0],
-                            "Set speed": speed_responce[0]}
-            response_codes = {"Set position": position_responce[1],
-                            "Set speed": speed_responce[1]}
-            return ReturnData(responce=response_data, code=response_codes, trjectory=full_trajectory_points)
+            return self.system.upload_trajectory(self.robot_data, full_trajectory_points, self.coordinate_system,
+                                                 self.lin_step_count, self.speed_multiplier, last_point_position=self.points[-1])
         else:
             return ReturnData(responce=None, code=None, trjectory=full_trajectory_points)
 
@@ -285,7 +472,7 @@ class RobotData:
 class ReturnData():
     responce: Union[str, dict, None]
     code: Union[str, dict, None]
-    trjectory: list[XYZPos] = None
+    trjectory: Union[list[XYZPos], Trajectory] = None
     
 class StaticData:
     
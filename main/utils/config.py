@@ -1,4 +1,11 @@
-config_data = {"trajectory_send": True, "verify": True, "login_simulation": False, "simulation_role": "SuperAdmin", "simulation_token": ""}
+config_data = {"trajectory_send": True, "verify": True, "login_simulation": False, "simulation_role": "SuperAdmin", "simulation_token": "",
+               "pool_size": 10, "keep_alive": True, "kinematics_backend": "auto",
+               "ik_cache_size": 1024, "stream_chunk_size": 0,
+               "combined_motion": True, "wire_format": "json", "wire_dtype": "float64",
+               "compression": "none", "compression_threshold": 1024, "scheme": "https",
+               "trigger_mode": "auto", "trigger_wait_timeout": 0.5,
+               "trigger_request_timeout": 5.0, "simplify_chord_error": 0.0, "simplify_angle_error": 0.5,
+               "simplify_joint_error": 0.05}
 
 class Config:
     _config_data = config_data
@@ -56,4 +63,212 @@ class Config:
         if isinstance(value, str):
             self._config_data["simulation_token"] = value
         else:
-            raise TypeError("Invalid type for simulation_token. Expected string.")
\ No newline at end of file
+            raise TypeError("Invalid type for simulation_token. Expected string.")
+        
+    @property
+    def pool_size(self) -> int:
+        return self._config_data["pool_size"]
+    
+    @pool_size.setter
+    def pool_size(self, value:int) -> None:
+        if isinstance(value, int) and value > 0:
+            self._config_data["pool_size"] = value
+        else:
+            raise TypeError("Invalid type for pool_size. Expected positive int.")
+        
+    @property
+    def keep_alive(self) -> bool:
+        return self._config_data["keep_alive"]
+    
+    @keep_alive.setter
+    def keep_alive(self, value:bool) -> None:
+        if isinstance(value, bool):
+            self._config_data["keep_alive"] = value
+        else:
+            raise TypeError("Invalid type for keep_alive. Expected bool.")
+        
+    @property
+    def kinematics_backend(self) -> str:
+        """ "auto" - use local kinematics when it is set for the robot, "server" - always use the server """
+        return self._config_data["kinematics_backend"]
+    
+    @kinematics_backend.setter
+    def kinematics_backend(self, value:str) -> None:
+        if value in ("auto", "server"):
+            self._config_data["kinematics_backend"] = value
+        else:
+            raise TypeError("Invalid value for kinematics_backend. Expected 'auto' or 'server'.")
+        
+    @property
+    def ik_cache_size(self) -> int:
+        """ Max count of cached kinematics results per server, 0 disables the cache """
+        return self._config_data["ik_cache_size"]
+    
+    @ik_cache_size.setter
+    def ik_cache_size(self, value:int) -> None:
+        if isinstance(value, int) and value >= 0:
+            self._config_data["ik_cache_size"] = value
+        else:
+            raise TypeError("Invalid type for ik_cache_size. Expected non-negative int.")
+    
+    @property
+    def stream_chunk_size(self) -> int:
+        """ Points per uploaded chunk of long trajectories, 0 sends the whole trajectory at once """
+        return self._config_data["stream_chunk_size"]
+    
+    @stream_chunk_size.setter
+    def stream_chunk_size(self, value:int) -> None:
+        if isinstance(value, int) and value >= 0:
+            self._config_data["stream_chunk_size"] = value
+        else:
+            raise TypeError("Invalid type for stream_chunk_size. Expected non-negative int.")
+    
+    @property
+    def combined_motion(self) -> bool:
+        """ Send positions and speeds with one /api/set-motion request when the server supports it """
+        return self._config_data["combined_motion"]
+    
+    @combined_motion.setter
+    def combined_motion(self, value:bool) -> None:
+        if isinstance(value, bool):
+            self._config_data["combined_motion"] = value
+        else:
+            raise TypeError("Invalid type for combined_motion. Expected bool.")
+    
+    @property
+    def wire_format(self) -> str:
+        """ "binary" sends trajectory point lists packed (utils.wire), servers without support get JSON """
+        return self._config_data["wire_format"]
+    
+    @wire_format.setter
+    def wire_format(self, value:str) -> None:
+        if value in ("json", "binary"):
+            self._config_data["wire_format"] = value
+        else:
+            raise TypeError("Invalid value for wire_format. Expected 'json' or 'binary'.")
+    
+    @property
+    def wire_dtype(self) -> str:
+        return self._config_data["wire_dtype"]
+    
+    @wire_dtype.setter
+    def wire_dtype(self, value:str) -> None:
+        if value in ("float64", "float32"):
+            self._config_data["wire_dtype"] = value
+        else:
+            raise TypeError("Invalid value for wire_dtype. Expected 'float64' or 'float32'.")
+    
+    @property
+    def compression(self) -> str:
+        """ Request body compression: "none", "gzip" or "zstd" (needs the zstandard package) """
+        return self._config_data["compression"]
+    
+    @compression.setter
+    def compression(self, value:str) -> None:
+        if value in ("none", "gzip", "zstd"):
+            self._config_data["compression"] = value
+        else:
+            raise TypeError("Invalid value for compression. Expected 'none', 'gzip' or 'zstd'.")
+    
+    @property
+    def compression_threshold(self) -> int:
+        """ Request bodies smaller than this count of bytes are sent uncompressed """
+        return self._config_data["compression_threshold"]
+    
+    @compression_threshold.setter
+    def compression_threshold(self, value:int) -> None:
+        if isinstance(value, int) and value >= 0:
+            self._config_data["compression_threshold"] = value
+        else:
+            raise TypeError("Invalid type for compression_threshold. Expected non-negative int.")
+    
+    @property
+    def scheme(self) -> str:
+        """ "http" for servers without TLS, e.g. utils.mock_server started without a certificate """
+        return self._config_data["scheme"]
+    
+    @scheme.setter
+    def scheme(self, value:str) -> None:
+        if value in ("https", "http"):
+            self._config_data["scheme"] = value
+        else:
+            raise TypeError("Invalid value for scheme. Expected 'https' or 'http'.")
+    
+    @property
+    def trigger_mode(self) -> str:
+        """ "auto" waits for position id changes with long-poll and falls back to polling, "poll" always polls """
+        return self._config_data["trigger_mode"]
+    
+    @trigger_mode.setter
+    def trigger_mode(self, value:str) -> None:
+        if value in ("auto", "poll"):
+            self._config_data["trigger_mode"] = value
+        else:
+            raise TypeError("Invalid value for trigger_mode. Expected 'auto' or 'poll'.")
+    
+    @property
+    def trigger_wait_timeout(self) -> float:
+        """ Seconds the server may hold one long-poll request \n
+        Trigger threads check their stop event between requests, so this also bounds how long
+        `end_handling` waits for an idle long-poll. A change is answered at once either way.
+        """
+        return self._config_data["trigger_wait_timeout"]
+    
+    @trigger_wait_timeout.setter
+    def trigger_wait_timeout(self, value:float) -> None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+            self._config_data["trigger_wait_timeout"] = float(value)
+        else:
+            raise TypeError("Invalid type for trigger_wait_timeout. Expected positive number.")
+    
+    @property
+    def trigger_request_timeout(self) -> float:
+        """ Seconds to wait for the answer of a trigger poll (added to trigger_wait_timeout for long-poll) """
+        return self._config_data["trigger_request_timeout"]
+    
+    @trigger_request_timeout.setter
+    def trigger_request_timeout(self, value:float) -> None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+            self._config_data["trigger_request_timeout"] = float(value)
+        else:
+            raise TypeError("Invalid type for trigger_request_timeout. Expected positive number.")
+    
+    @property
+    def simplify_chord_error(self) -> float:
+        """ Largest position error (mm) of the commanded poses when dropping trajectory points, 0 keeps every point \n
+        Holds for the dropped poses, not for the TCP path between kept points, see `simplify_joint_error`.
+        """
+        return self._config_data["simplify_chord_error"]
+    
+    @simplify_chord_error.setter
+    def simplify_chord_error(self, value:float) -> None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+            self._config_data["simplify_chord_error"] = float(value)
+        else:
+            raise TypeError("Invalid type for simplify_chord_error. Expected non-negative number.")
+    
+    @property
+    def simplify_angle_error(self) -> float:
+        """ Largest orientation error (degrees) when dropping trajectory points """
+        return self._config_data["simplify_angle_error"]
+    
+    @simplify_angle_error.setter
+    def simplify_angle_error(self, value:float) -> None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+            self._config_data["simplify_angle_error"] = float(value)
+        else:
+            raise TypeError("Invalid type for simplify_angle_error. Expected positive number.")
+    
+    @property
+    def simplify_joint_error(self) -> float:
+        """ Largest joint angle error (degrees) of a dropped point from the joint-space move between the kept points \n
+        Checked at the middle dropped point of every kept segment, 0.05 is about 0.4 mm at 500 mm reach.
+        """
+        return self._config_data["simplify_joint_error"]
+    
+    @simplify_joint_error.setter
+    def simplify_joint_error(self, value:float) -> None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+            self._config_data["simplify_joint_error"] = float(value)
+        else:
+            raise TypeError("Invalid type for simplify_joint_error. Expected positive number.")
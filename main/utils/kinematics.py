@@ -0,0 +1,211 @@
+"""  Client side kinematics backend
+
+LocalKinematics loads the same kinematics package that is uploaded to the server
+with `__admin.system.add_kinematics` and computes inverse and forward kinematics
+locally for a whole batch of points, so `xyz_to_angle` and `angle_to_xyz`
+don't have to send the point list to the server.
+KinematicsCache keeps recent results of both directions, so repeated poses
+are not computed again.
+
+The package file (`module`, default "kinematics.py") must define two functions:
+    inverse(positions) -> angles   # (N, 6) x, y, z, a, b, c -> (N, J) J1..Jn
+    forward(angles) -> positions   # (N, J) J1..Jn -> (N, 6) x, y, z, a, b, c
+Set `vectorized=False` when the functions take one point at a time.
+Other modules of the package are importable only while the file is loaded,
+import them at module level.
+
+"""
+
+from typing import Union, Callable
+from collections import OrderedDict
+import importlib.util
+import threading
+import os
+import sys
+
+import numpy as np
+
+from data_types import AnglePos, XYZPos, Trajectory, StaticData
+from utils.config import Config
+
+class LocalKinematics:
+
+    def __init__(self, path:str, module:str="kinematics.py", inverse:str="inverse", forward:str="forward",
+                 vectorized:bool=True, coordinate_systems:tuple=(StaticData.CoordinatesSystem.FLANGE, StaticData.CoordinatesSystem.WORLD)) -> None:
+        """ `coordinate_systems` are the frames the package computes in, other frames are sent to the server """
+        self.path = os.path.abspath(path)
+        self.vectorized = vectorized
+        self.coordinate_systems = coordinate_systems
+        self._module = self._load(os.path.join(self.path, module))
+        self._inverse:Callable = getattr(self._module, inverse)
+        self._forward:Callable = getattr(self._module, forward)
+
+    def _load(self, file_path:str):
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"Kinematics module '{file_path}' not found")
+        name = f"urlanguage_kinematics_{abs(hash(file_path))}"
+        spec = importlib.util.spec_from_file_location(name, file_path)
+        module = importlib.util.module_from_spec(spec)
+        # Папка пакета в sys.path только на время загрузки: соседние модули пакета импортируются на уровне модуля
+        added = self.path not in sys.path
+        if added:
+            sys.path.insert(0, self.path)
+        try:
+            spec.loader.exec_module(module)
+        finally:
+            if added:
+                sys.path.remove(self.path)
+        return module
+
+    def supports(self, coordinate_system:str) -> bool:
+        return coordinate_system in self.coordinate_systems
+
+    def _apply(self, func:Callable, values:np.ndarray) -> np.ndarray:
+        if self.vectorized:
+            result = np.asarray(func(values), dtype=np.float64)
+        else:
+            result = np.array([func(row) for row in values], dtype=np.float64)
+        return result.reshape(len(values), -1)
+
+    def inverse(self, positions:Union[XYZPos, list[XYZPos], Trajectory]) -> np.ndarray:
+        """ (N, J) joint array for the positions """
+        if isinstance(positions, XYZPos):
+            positions = [positions]
+        # Trajectory rows already use the x, y, z, a, b, c layout the server receives
+        values = Trajectory.from_points(positions).positions
+        return self._apply(self._inverse, values)
+
+    def forward(self, angles:Union[list[AnglePos], np.ndarray]) -> np.ndarray:
+        """ (N, 6) x, y, z, a, b, c array for the joint angles """
+        if not isinstance(angles, np.ndarray):
+            angles = np.array([angle.joints() for angle in angles], dtype=np.float64)
+        return self._apply(self._forward, angles.reshape(len(angles), -1))
+
+    def xyz_to_angle(self, positions:Union[XYZPos, list[XYZPos], Trajectory]) -> list[dict]:
+        """ Same data as the /api/cartesian-to-angles endpoint returns """
+        joints = self.inverse(positions)
+        names = AnglePos._joints(joints.shape[1])
+        return [dict(zip(names, row)) for row in joints.tolist()]
+
+    def angle_to_xyz(self, angles:Union[list[AnglePos], np.ndarray]) -> list[dict]:
+        """ Same data as the /api/angles-to-cartesian endpoint returns """
+        return [dict(zip(("x", "y", "z", "a", "b", "c"), row)) for row in self.forward(angles).tolist()]
+
+class KinematicsCache:
+    """ Bounded LRU cache of kinematics results \n
+    Keys are robot, frame (coordinate system for IK, "angles" for FK), robot tool, robot base
+    and the pose rounded to `precision` decimals. One cache is shared per host/port.
+    """
+    _caches:dict = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, size:int=None, precision:int=4) -> None:
+        """ `size` None follows `Config.ik_cache_size` """
+        self.config = Config()
+        self._size = size
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self._entries:OrderedDict = OrderedDict()
+        self._frames:dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_shared(cls, host:str, port:int) -> "KinematicsCache":
+        with cls._caches_lock:
+            cache = cls._caches.get((host, port))
+            if cache is None:
+                cache = cls._caches[(host, port)] = cls()
+            return cache
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self.config.ik_cache_size if self._size is None else self._size
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "size": self.size}
+
+    def _frame_of(self, robot_name:str) -> tuple:
+        """ (tool, base) of the robot, read under the lock like every other cache state """
+        with self._lock:
+            frames = self._frames.get(robot_name, {})
+            return frames.get("tool"), frames.get("base")
+
+    def key(self, robot_name:str, frame:str, values:list, frames:tuple=None) -> tuple:
+        tool, base = self._frame_of(robot_name) if frames is None else frames
+        return (robot_name, frame, tool, base, tuple(round(value, self.precision) for value in values))
+
+    def get(self, key:tuple) -> Union[dict, None]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key:tuple, value:dict) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def resolve(self, robot_name:str, frame:str, rows:list[list], compute:Callable[[list[int]], list]) -> list:
+        """ Results for every row, `compute(indices)` is called once for the rows that are not cached """
+        if self.size <= 0:
+            return compute(list(range(len(rows))))
+        frames = self._frame_of(robot_name)
+        keys = [self.key(robot_name, frame, row, frames) for row in rows]
+        results = [self.get(key) for key in keys]
+        pending:dict[tuple, list[int]] = {}
+        for index, value in enumerate(results):
+            if value is None:
+                pending.setdefault(keys[index], []).append(index)
+        if pending:
+            computed = compute([indices[0] for indices in pending.values()])
+            for (key, indices), value in zip(pending.items(), computed):
+                self.put(key, value)
+                for index in indices:
+                    results[index] = value
+        return results
+
+    def _drop(self, match:Callable[[tuple], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+
+    def invalidate(self, robot_name:str=None) -> None:
+        """ Drop entries of one robot or the whole cache """
+        if robot_name is None:
+            with self._lock:
+                self._entries.clear()
+        else:
+            self._drop(lambda key: key[0] == robot_name)
+
+    def invalidate_tool(self, tool_id:str) -> None:
+        """ Tool data changed, entries made with an unknown tool may use it too """
+        self._drop(lambda key: key[2] in (tool_id, None))
+
+    def invalidate_base(self, base_name:str) -> None:
+        self._drop(lambda key: key[3] in (base_name, None))
+
+    def _set_frame(self, robot_name:str, name:str, value:str) -> None:
+        # Смена кадра и сброс записей робота - одна операция под замком
+        with self._lock:
+            self._frames.setdefault(robot_name, {})[name] = value
+            for key in [key for key in self._entries if key[0] == robot_name]:
+                del self._entries[key]
+
+    def set_tool(self, robot_name:str, tool_id:str) -> None:
+        self._set_frame(robot_name, "tool", tool_id)
+
+    def set_base(self, robot_name:str, base_name:str) -> None:
+        self._set_frame(robot_name, "base", base_name)
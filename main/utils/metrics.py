@@ -0,0 +1,189 @@
+"""  Metrics of the requests and of the local motion stages
+
+Every Transport owns a MetricsRegistry (`system.metrics`). Per endpoint it counts
+requests by status code, keeps a latency histogram, bytes out/in, new connections
+and the time spent encoding the body. Robot adds the local stages of a motion
+command ("trajectory", "kinematics", "speeds", "upload"), so a slow `lin` can be
+split into trajectory math, IK, JSON encoding and network time.
+utils.triggers.TriggerDispatcher adds "trigger_latency" (position id change to
+callback start) and "trigger_callback".
+
+Hooks get every event as it happens: hook("request", {...}) and hook("stage", {...}).
+An exception in a hook is logged (logger "utils.metrics") and does not fail the request.
+`export_prometheus` returns a snapshot in the Prometheus text format, several
+registries (servers) can be exported together with `prometheus_text`.
+
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Iterator, TYPE_CHECKING
+import threading
+import logging
+import time
+
+if TYPE_CHECKING:
+    from utils.transport import RequestTiming
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+class Histogram:
+
+    def __init__(self, buckets:tuple=DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value:float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """ (le, count) pairs as Prometheus buckets """
+        result, total = [], 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+    def export(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "buckets": dict(self.cumulative())}
+
+class EndpointMetrics:
+
+    def __init__(self, buckets:tuple) -> None:
+        self.codes:dict[int, int] = {}
+        self.latency = Histogram(buckets)
+        self.bytes_out = 0
+        self.bytes_raw_out = 0
+        self.bytes_in = 0
+        self.new_connections = 0
+        self.encode_time = 0.0
+
+    def export(self) -> dict:
+        return {"codes": dict(self.codes), "latency": self.latency.export(), "bytes_out": self.bytes_out,
+                "bytes_raw_out": self.bytes_raw_out, "bytes_in": self.bytes_in,
+                "new_connections": self.new_connections, "encode_time": self.encode_time}
+
+class MetricsRegistry:
+
+    def __init__(self, labels:dict=None, buckets:tuple=DEFAULT_BUCKETS) -> None:
+        self.labels = labels or {}
+        self.buckets = buckets
+        self.endpoints:dict[str, EndpointMetrics] = {}
+        self.stages:dict[str, Histogram] = {}
+        self.hooks:list[Callable[[str, dict], None]] = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook:Callable[[str, dict], None]) -> None:
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook:Callable[[str, dict], None]) -> None:
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    def _emit(self, event:str, data:dict) -> None:
+        for hook in list(self.hooks):
+            try:
+                hook(event, data)
+            except Exception:
+                # Запрос уже выполнен, ошибка хука не должна его ломать
+                logger.exception("Metrics hook %r failed on %s event", hook, event)
+
+    def observe_request(self, timing:"RequestTiming") -> None:
+        with self._lock:
+            metrics = self.endpoints.get(timing.endpoint)
+            if metrics is None:
+                metrics = self.endpoints[timing.endpoint] = EndpointMetrics(self.buckets)
+            metrics.codes[timing.status_code] = metrics.codes.get(timing.status_code, 0) + 1
+            metrics.latency.observe(timing.elapsed)
+            metrics.bytes_out += timing.request_size
+            metrics.bytes_raw_out += timing.raw_request_size
+            metrics.bytes_in += timing.response_size
+            metrics.new_connections += int(timing.new_connection)
+            metrics.encode_time += timing.encode_time
+        self._emit("request", dict(timing.__dict__, **self.labels))
+
+    def observe_stage(self, stage:str, seconds:float) -> None:
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        self._emit("stage", dict({"stage": stage, "seconds": seconds}, **self.labels))
+
+    @contextmanager
+    def stage(self, stage:str) -> Iterator[None]:
+        """ Time the block as a local stage, e.g. `with system.metrics.stage("trajectory"):` """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.endpoints.clear()
+            self.stages.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "labels": dict(self.labels),
+                "endpoints": {endpoint: metrics.export() for endpoint, metrics in self.endpoints.items()},
+                "stages": {stage: histogram.export() for stage, histogram in self.stages.items()},
+                }
+
+    def export_prometheus(self) -> str:
+        return prometheus_text([self])
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels:dict) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def prometheus_text(registries:list[MetricsRegistry], prefix:str="urlanguage") -> str:
+    """ Prometheus text format snapshot of one or more registries """
+    families:dict[str, tuple[str, str, list[str]]] = {}
+
+    def add(name:str, kind:str, help_text:str, labels:dict, value:float) -> None:
+        family = families.setdefault(name, (kind, help_text, []))
+        family[2].append(f"{name}{_labels(labels)} {value}")
+
+    def add_histogram(name:str, help_text:str, labels:dict, histogram:dict) -> None:
+        family = families.setdefault(name, ("histogram", help_text, []))
+        for bound, count in histogram["buckets"].items():
+            family[2].append(f"{name}_bucket{_labels(dict(labels, le=bound))} {count}")
+        family[2].append(f"{name}_sum{_labels(labels)} {histogram['sum']}")
+        family[2].append(f"{name}_count{_labels(labels)} {histogram['count']}")
+
+    for registry in registries:
+        snapshot = registry.snapshot()
+        for endpoint, metrics in sorted(snapshot["endpoints"].items()):
+            labels = dict(snapshot["labels"], endpoint=endpoint)
+            for code, count in sorted(metrics["codes"].items()):
+                add(f"{prefix}_requests_total", "counter", "Requests sent to the server", dict(labels, code=code), count)
+            add_histogram(f"{prefix}_request_duration_seconds", "Request latency including the network", labels, metrics["latency"])
+            add(f"{prefix}_request_bytes_total", "counter", "Request body bytes sent", labels, metrics["bytes_out"])
+            add(f"{prefix}_request_raw_bytes_total", "counter", "Request body bytes before compression", labels, metrics["bytes_raw_out"])
+            add(f"{prefix}_response_bytes_total", "counter", "Response body bytes received", labels, metrics["bytes_in"])
+            add(f"{prefix}_new_connections_total", "counter", "Requests that opened a new connection", labels, metrics["new_connections"])
+            add(f"{prefix}_encode_seconds_total", "counter", "Time spent encoding request bodies", labels, metrics["encode_time"])
+        for stage, histogram in sorted(snapshot["stages"].items()):
+            add_histogram(f"{prefix}_stage_duration_seconds", "Local motion stage duration", dict(snapshot["labels"], stage=stage), histogram)
+
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
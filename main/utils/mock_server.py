@@ -0,0 +1,721 @@
+"""  Offline mock of the URSystem server
+
+MockURSystem answers the /api endpoints used by the role system classes from
+memory, so load tests, benchmarks and CI can run without a robot or URSystem.
+It has accounts, robots, tools, bases, logs, emergency state and a simple
+kinematic chain (base rotation, shoulder and elbow with link lengths, wrist
+joints J4..J6 equal to a, b, c) for cartesian-to-angles and angles-to-cartesian.
+Uploaded points are executed one per `step_time` seconds, so get-position and
+get-position-id change like on a moving robot. /api/wait-position-id is the
+long-poll variant: it is answered as soon as the position id differs from "last",
+/api/wait-position-ids does the same for many robots in one request.
+
+`latency` (+ seeded random `jitter`) delays every answer and `payload_size`
+pads every JSON answer with that many bytes. `binary=False` or a shorter
+`encodings` tuple make it answer 415 to binary or compressed bodies like an
+older server. Unknown routes get a plain-text 404 like a server without the
+endpoint, unknown robots, accounts, tools and bases a 422 API answer.
+Without certfile/keyfile the server is plain HTTP, set `Config().scheme = "http"`
+to connect to it.
+
+    with MockURSystem(port=5000) as server:
+        system = auth.Auth("127.0.0.1", 5000, server.server_token).super_admin("SuperAdmin", "12345").system("127.0.0.1", 5000)
+
+Run standalone from the `main` folder: python utils/mock_server.py --port 5000 --latency 0.01
+
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dataclasses import dataclass, field
+from collections import deque
+from typing import Any, Union
+import argparse
+import hashlib
+import secrets
+import random
+import inspect
+import ast
+import gzip
+import json
+import os
+import ssl
+import sys
+import threading
+import time
+
+import numpy as np
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+from data_types import StaticData
+from utils import wire
+
+class MockError(Exception):
+
+    def __init__(self, info:str, code:int=400) -> None:
+        super().__init__(info)
+        self.info = info
+        self.code = code
+
+class MockKinematics:
+    """ Base rotation J1, planar shoulder J2 / elbow J3 and wrist J4..J6 = a, b, c (degrees, mm) """
+
+    def __init__(self, base_height:float=100, shoulder:float=250, elbow:float=250) -> None:
+        self.base_height = base_height
+        self.shoulder = shoulder
+        self.elbow = elbow
+
+    def inverse(self, positions:np.ndarray) -> np.ndarray:
+        """ (N, 6) x, y, z, a, b, c -> (N, 6) J1..J6 """
+        x, y, z = positions[:, 0], positions[:, 1], positions[:, 2] - self.base_height
+        radius = np.hypot(x, y)
+        cos_elbow = (radius ** 2 + z ** 2 - self.shoulder ** 2 - self.elbow ** 2) / (2 * self.shoulder * self.elbow)
+        elbow = np.arccos(np.clip(cos_elbow, -1, 1))
+        shoulder = np.arctan2(z, radius) - np.arctan2(self.elbow * np.sin(elbow), self.shoulder + self.elbow * np.cos(elbow))
+        joints = np.degrees(np.column_stack([np.arctan2(y, x), shoulder, elbow]))
+        return np.column_stack([joints, positions[:, 3:6]])
+
+    def forward(self, angles:np.ndarray) -> np.ndarray:
+        """ (N, J) J1..Jn -> (N, 6) x, y, z, a, b, c """
+        angles = np.column_stack([angles, np.zeros((len(angles), max(0, 6 - angles.shape[1])))])
+        base, shoulder, elbow = np.radians(angles[:, 0]), np.radians(angles[:, 1]), np.radians(angles[:, 2])
+        radius = self.shoulder * np.cos(shoulder) + self.elbow * np.cos(shoulder + elbow)
+        z = self.base_height + self.shoulder * np.sin(shoulder) + self.elbow * np.sin(shoulder + elbow)
+        return np.column_stack([radius * np.cos(base), radius * np.sin(base), z, angles[:, 3:6]])
+
+@dataclass
+class MockRobot:
+    name: str
+    code: str
+    password: str
+    angle_count: int
+    kinematics: str = "None"
+    angles: list = None
+    home: list = None
+    tool: Union[str, None] = None
+    base: Union[str, None] = None
+    emergency: bool = False
+    program: Union[str, None] = None
+    position_id: Any = ""
+    queue: deque = field(default_factory=deque)
+    speeds: deque = field(default_factory=deque)
+    moved_at: float = 0
+    logs: list = field(default_factory=list)
+
+    def __post_init__(self):
+        self.angles = [0.0] * self.angle_count if self.angles is None else self.angles
+        self.home = list(self.angles) if self.home is None else self.home
+
+    def export(self) -> dict:
+        return {"name": self.name, "angle_count": self.angle_count, "kinematics": self.kinematics, "tool": self.tool,
+                "base": self.base, "emergency": self.emergency, "position": self.joints(self.angles), "home": self.joints(self.home)}
+
+    @staticmethod
+    def joints(values:list) -> dict:
+        return {f"J{index + 1}": value for index, value in enumerate(values)}
+
+class MockURSystem:
+
+    def __init__(self, host:str="127.0.0.1", port:int=5000, server_token:str="mock-server-token",
+                 latency:float=0, jitter:float=0, payload_size:int=0, step_time:float=0.01,
+                 certfile:str=None, keyfile:str=None, seed:int=0, binary:bool=True,
+                 encodings:tuple=("gzip", "zstd")) -> None:
+        self.host = host
+        self.port = port
+        self.server_token = server_token
+        self.latency = latency
+        self.jitter = jitter
+        self.payload_size = payload_size
+        self.step_time = step_time
+        self.certfile = certfile
+        self.keyfile = keyfile
+        # Как у старых серверов: без формата или сжатия ответ 415 Unsupported Media Type
+        self.binary = binary
+        self.encodings = tuple(encoding for encoding in encodings if encoding != "zstd" or zstandard is not None)
+        self.kinematics = MockKinematics()
+        self.requests:dict[str, int] = {}
+        self.accounts:dict[str, dict] = {}
+        self.robots:dict[str, MockRobot] = {}
+        self.tools:dict[str, dict] = {}
+        self.bases:dict[str, dict] = {}
+        self.kinematics_packages:set = set()
+        self.logs:list[dict] = []
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        # Уведомляется после каждого запроса, ожидающие wait-position-id проверяют id заново
+        self._changed = threading.Condition()
+        self._server = None
+        self._thread = None
+        self.add_account("SuperAdmin", "12345", StaticData.Roles.SUPER_ADMIN)
+        self._routes = {
+            "/api/get-account-data": self._get_account_data,
+            "/api/get-token": self._get_token,
+            "/api/change-token": self._change_token,
+            "/api/change-password": self._change_password,
+            "/api/create-account": self._create_account,
+            "/api/delete-account": self._delete_account,
+            "/api/get-accounts": self._get_accounts,
+            "/api/create-robot": self._create_robot,
+            "/api/delete-robot": self._delete_robot,
+            "/api/get-robots": self._get_robots,
+            "/api/get-robot": self._get_robot,
+            "/api/get-angles-count": self._get_angles_count,
+            "/api/set-home-position": self._set_home_position,
+            "/api/get-emergency": self._get_emergency,
+            "/api/set-emergency": self._set_emergency,
+            "/api/get-position": self._get_position,
+            "/api/get-cartesian-position": self._get_cartesian_position,
+            "/api/set-position": self._set_position,
+            "/api/set-speed": self._set_speed,
+            "/api/set-motion": self._set_motion,
+            "/api/set-cartesian-position": self._set_cartesian_position,
+            "/api/cartesian-to-angles": self._cartesian_to_angles,
+            "/api/angles-to-cartesian": self._angles_to_cartesian,
+            "/api/get-position-id": self._get_position_id,
+            "/api/wait-position-id": self._wait_position_id,
+            "/api/wait-position-ids": self._wait_position_ids,
+            "/api/set-position-id": self._set_position_id,
+            "/api/set-program": self._set_program,
+            "/api/delete-program": self._delete_program,
+            "/api/get-robot-logs": self._get_robot_logs,
+            "/api/add-robot-log": self._add_robot_log,
+            "/api/get-system-logs": self._get_system_logs,
+            "/api/create-tool": self._create_tool,
+            "/api/delete-tool": self._delete_tool,
+            "/api/get-tool": self._get_tool,
+            "/api/set-tool": self._set_tool,
+            "/api/set-tool-calibration": self._set_tool_calibration,
+            "/api/set-robot-tool": self._set_robot_tool,
+            "/api/create-base": self._create_base,
+            "/api/delete-base": self._delete_base,
+            "/api/get-base": self._get_base,
+            "/api/get-bases": self._get_bases,
+            "/api/set-base": self._set_base,
+            "/api/set-robot-base": self._set_robot_base,
+            "/api/add-kinematic": self._add_kinematic,
+            "/api/bind-kinematic": self._bind_kinematic,
+            "/api/export-cache": self._export_cache,
+            "/api/import-cache": self._import_cache,
+            }
+
+    # Server lifecycle
+    def start(self) -> "MockURSystem":
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        if self.certfile is not None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.certfile, self.keyfile)
+            self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MockURSystem", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> "MockURSystem":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f"{'https' if self.certfile else 'http'}://{self.host}:{self.port}"
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело пишутся отдельно, без TCP_NODELAY keep-alive ответы ждут delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                code, content_type, response = server.handle(self.path, dict(self.headers.items()), body)
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+        return Handler
+
+    # Requests
+    def handle(self, path:str, headers:dict, body:bytes) -> tuple[int, str, bytes]:
+        """ (status code, content type, body) of the answer to POST `path` """
+        headers = {key.lower(): value for key, value in headers.items()}
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        route = self._routes.get(path)
+        if route is None:
+            # Как у веб-сервера без маршрута: не ответ API, клиент считает эндпоинт отсутствующим
+            return 404, "text/plain", b"Not found"
+        encoding = headers.get("content-encoding")
+        if (encoding is not None and encoding not in self.encodings) or \
+                (not self.binary and headers.get("content-type", "").startswith(wire.CONTENT_TYPE)):
+            return 415, "application/json", self._answer(False, "Unsupported Media Type")
+        try:
+            data = self._read_body(headers, body)
+        except Exception:
+            return 400, "application/json", self._answer(False, "Invalid body")
+        try:
+            if route in (self._wait_position_id, self._wait_position_ids):
+                result = route(data)
+            else:
+                with self._lock:
+                    result = route(data)
+                with self._changed:
+                    self._changed.notify_all()
+        except MockError as error:
+            return error.code, "application/json", self._answer(False, error.info)
+        except Exception as error:
+            # Ошибка в маршруте (например нет поля в запросе) - ответ 500, а не обрыв соединения
+            return 500, "application/json", self._answer(False, f"{type(error).__name__}: {error}")
+        if wire.CONTENT_TYPE in headers.get("accept", "") and isinstance(result, list) and result and isinstance(result[0], dict):
+            columns = tuple(result[0].keys())
+            array = wire.WireArray("data", np.array([[row[column] for column in columns] for row in result], dtype=np.float64), columns)
+            return 200, wire.CONTENT_TYPE, wire.encode({"status": True, "info": "OK"}, [array])
+        return 200, "application/json", self._answer(True, "OK", result)
+
+    def _read_body(self, headers:dict, body:bytes) -> dict:
+        encoding = headers.get("content-encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "zstd":
+            body = zstandard.ZstdDecompressor().decompress(body)
+        if headers.get("content-type", "").startswith(wire.CONTENT_TYPE):
+            fields, arrays = wire.decode(body)
+            for array in arrays:
+                fields[array.name] = array.to_dicts()
+            return fields
+        if headers.get("content-type", "").startswith("multipart/"):
+            return {}
+        return json.loads(body) if body else {}
+
+    def _answer(self, status:bool, info:str, data:Any=None) -> bytes:
+        answer = {"status": status, "info": info, "data": data}
+        if self.payload_size:
+            answer["padding"] = "x" * self.payload_size
+        return json.dumps(answer).encode("utf-8")
+
+    def _log(self, text:str, robot:MockRobot=None, log_type:str="INFO") -> None:
+        entry = {"timestamp": time.time(), "type": log_type, "text": text}
+        (robot.logs if robot is not None else self.logs).append(entry)
+
+    # Accounts
+    def add_account(self, name:str, password:str, role:str) -> str:
+        token = secrets.token_hex(16)
+        self.accounts[name] = {"password": hashlib.sha256(str(password).encode("utf-8")).hexdigest(), "role": role, "token": token}
+        return token
+
+    def _role(self, data:dict) -> str:
+        for account in self.accounts.values():
+            if account["token"] == data.get("token"):
+                return account["role"]
+        for robot in self.robots.values():
+            if robot.password == data.get("token"):
+                return StaticData.Roles.ROBOT
+        raise MockError("Invalid token", 403)
+
+    def _check(self, data:dict, *roles:str) -> None:
+        role = self._role(data)
+        if roles and role not in roles and role != StaticData.Roles.SUPER_ADMIN:
+            raise MockError("You don't have enough rights", 403)
+
+    def _admin(self, data:dict) -> None:
+        self._check(data, StaticData.Roles.ADMIN)
+
+    def _super_admin(self, data:dict) -> None:
+        self._check(data, StaticData.Roles.SUPER_ADMIN)
+
+    def _get_account_data(self, data:dict) -> dict:
+        if data.get("server_token") != self.server_token:
+            raise MockError("Invalid server token", 403)
+        account = self.accounts.get(data.get("name"))
+        if account is None or account["password"] != data.get("password"):
+            raise MockError("Wrong login or password", 403)
+        return {"role": account["role"], "token": account["token"]}
+
+    def _account(self, data:dict) -> dict:
+        account = self.accounts.get(data.get("name"))
+        if account is None:
+            raise MockError("Account not found", 422)
+        return account
+
+    def _get_token(self, data:dict) -> dict:
+        self._super_admin(data)
+        return {"token": self._account(data)["token"]}
+
+    def _change_token(self, data:dict) -> str:
+        self._super_admin(data)
+        account = self._account(data)
+        account["token"] = secrets.token_hex(16)
+        return account["token"]
+
+    def _change_password(self, data:dict) -> None:
+        self._super_admin(data)
+        self._account(data)["password"] = hashlib.sha256(str(data["password"]).encode("utf-8")).hexdigest()
+
+    def _create_account(self, data:dict) -> None:
+        if data.get("user_role") == StaticData.Roles.USER:
+            self._admin(data)
+        else:
+            self._super_admin(data)
+        if data["name"] in self.accounts:
+            raise MockError("Account already exists")
+        self.add_account(data["name"], data["password"], data["user_role"])
+
+    def _delete_account(self, data:dict) -> None:
+        self._super_admin(data)
+        self._account(data)
+        del self.accounts[data["name"]]
+
+    def _get_accounts(self, data:dict) -> dict:
+        self._super_admin(data)
+        return {name: {"role": account["role"]} for name, account in self.accounts.items()}
+
+    # Robots
+    def _robot(self, data:dict, check_code:bool=False) -> MockRobot:
+        robot = self.robots.get(data.get("robot"))
+        if robot is None:
+            raise MockError("Robot not found", 422)
+        if check_code and data.get("code") != robot.code:
+            raise MockError("Invalid robot code", 403)
+        self._advance(robot)
+        return robot
+
+    def _advance(self, robot:MockRobot) -> None:
+        """ Execute the uploaded points that were due since the last request """
+        now = time.monotonic()
+        if not robot.queue:
+            robot.moved_at = now
+            return
+        steps = len(robot.queue) if self.step_time <= 0 else int((now - robot.moved_at) / self.step_time)
+        for _ in range(min(steps, len(robot.queue))):
+            angles, send = robot.queue.popleft()
+            if robot.speeds:
+                robot.speeds.popleft()
+            robot.angles = angles
+            # Как на роботе: id - последняя пройденная метка send
+            if send:
+                robot.position_id = send
+        robot.moved_at = now if not robot.queue else robot.moved_at + steps * self.step_time
+
+    def _create_robot(self, data:dict) -> None:
+        self._admin(data)
+        if data["robot"] in self.robots:
+            raise MockError("Robot already exists")
+        self.robots[data["robot"]] = MockRobot(data["robot"], data["code"], data["password"], int(data["angle"]), data.get("id", "None"))
+        self._log(f"Robot {data['robot']} created")
+
+    def _delete_robot(self, data:dict) -> None:
+        self._admin(data)
+        self._robot(data)
+        del self.robots[data["robot"]]
+
+    def _get_robots(self, data:dict) -> dict:
+        self._check(data)
+        return {name: robot.export() for name, robot in self.robots.items()}
+
+    def _get_robot(self, data:dict) -> dict:
+        self._check(data)
+        return self._robot(data).export()
+
+    def _get_angles_count(self, data:dict) -> int:
+        self._check(data)
+        return self._robot(data).angle_count
+
+    def _set_home_position(self, data:dict) -> None:
+        self._admin(data)
+        robot = self._robot(data, check_code=True)
+        robot.home = [float(data.get(f"J{index + 1}", 0)) for index in range(robot.angle_count)]
+
+    def _get_emergency(self, data:dict) -> bool:
+        self._check(data)
+        return self._robot(data).emergency
+
+    def _set_emergency(self, data:dict) -> None:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        robot.emergency = str(data.get("state")).lower() == "true"
+        if robot.emergency:
+            robot.queue.clear()
+            robot.speeds.clear()
+        self._log(f"Emergency {robot.emergency}", robot, "WARNING")
+
+    def _get_position(self, data:dict) -> dict:
+        self._check(data)
+        return MockRobot.joints(self._robot(data).angles)
+
+    def _get_cartesian_position(self, data:dict) -> dict:
+        self._check(data)
+        robot = self._robot(data)
+        position = self.kinematics.forward(np.array([robot.angles], dtype=np.float64))[0]
+        position = self._from_frame(robot, data.get("coordinate_system"), position[None, :])[0]
+        return dict(zip(("x", "y", "z", "a", "b", "c"), position.tolist()))
+
+    # Motion
+    def _joint_values(self, robot:MockRobot, angles:dict) -> list:
+        return [float(angles.get(f"J{index + 1}", 0)) for index in range(robot.angle_count)]
+
+    def _queue_positions(self, robot:MockRobot, points:list) -> None:
+        if robot.emergency:
+            raise MockError("The robot is in emergency stop", 409)
+        if not robot.queue:
+            robot.moved_at = time.monotonic()
+        for angles in points:
+            robot.queue.append((self._joint_values(robot, angles), angles.get("send", "")))
+
+    def _set_position(self, data:dict) -> int:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        self._queue_positions(robot, data["angles_data"] if "angles_data" in data else [data["angles"]])
+        return len(robot.queue)
+
+    def _set_speed(self, data:dict) -> int:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        for speeds in (data["angles_data"] if "angles_data" in data else [data["angles"]]):
+            robot.speeds.append(self._joint_values(robot, speeds))
+        return len(robot.speeds)
+
+    def _set_motion(self, data:dict) -> int:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        points = data["angles_data"] if "angles_data" in data else [data["angles"]]
+        speeds = data["speeds_data"] if "speeds_data" in data else [data["speeds"]]
+        if len(points) != len(speeds):
+            raise MockError("Positions and speeds have different length")
+        self._queue_positions(robot, points)
+        for speed in speeds:
+            robot.speeds.append(self._joint_values(robot, speed))
+        return len(robot.queue)
+
+    def _set_cartesian_position(self, data:dict) -> int:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        angles = self._inverse(robot, [data["position"]], data.get("coordinate_system"))
+        self._queue_positions(robot, angles)
+        return len(robot.queue)
+
+    def _frame_offset(self, robot:MockRobot, coordinate_system:str) -> np.ndarray:
+        offset = np.zeros(6)
+        if coordinate_system == StaticData.CoordinatesSystem.BASE and robot.base in self.bases:
+            frame = self.bases[robot.base].get("data") or {}
+        elif coordinate_system == StaticData.CoordinatesSystem.TOOL and robot.tool in self.tools:
+            frame = self.tools[robot.tool].get("calibration_data") or {}
+        else:
+            return offset
+        for index, key in enumerate(("x", "y", "z")):
+            offset[index] = float(frame.get(key, 0))
+        return offset
+
+    def _from_frame(self, robot:MockRobot, coordinate_system:str, positions:np.ndarray) -> np.ndarray:
+        return positions - self._frame_offset(robot, coordinate_system)
+
+    def _inverse(self, robot:MockRobot, positions:list[dict], coordinate_system:str) -> list[dict]:
+        values = np.array([[float(position.get(key, 0)) for key in ("x", "y", "z", "a", "b", "c")] for position in positions], dtype=np.float64)
+        values = values.reshape(len(positions), 6) + self._frame_offset(robot, coordinate_system)
+        joints = self.kinematics.inverse(values)
+        joints = np.column_stack([joints, np.zeros((len(joints), max(0, robot.angle_count - 6)))])[:, :robot.angle_count]
+        return [MockRobot.joints(row) for row in joints.tolist()]
+
+    def _cartesian_to_angles(self, data:dict) -> list[dict]:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        return self._inverse(robot, data["positions_data"], data.get("coordinate_system"))
+
+    def _angles_to_cartesian(self, data:dict) -> list[dict]:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        rows = []
+        for angles in data["angles_data"]:
+            if isinstance(angles, dict):
+                rows.append(self._joint_values(robot, angles))
+            else:
+                # export_to(list) of AnglePos also carries the send marker
+                rows.append([float(value) for value in angles if not isinstance(value, str)])
+        positions = self.kinematics.forward(np.array(rows, dtype=np.float64).reshape(len(rows), -1))
+        return [dict(zip(("x", "y", "z", "a", "b", "c"), row)) for row in positions.tolist()]
+
+    def _get_position_id(self, data:dict) -> Any:
+        self._check(data)
+        return self._robot(data).position_id
+
+    def _wait_changes(self, data:dict, last_ids:dict) -> tuple[dict, dict]:
+        """ Long-poll: hold the request until a position id differs from `last_ids` or the timeout passes \n
+        Returns ({robot name: changed id}, {robot name: MockRobot})
+        """
+        deadline = time.monotonic() + min(float(data.get("timeout", 10)), 60)
+        with self._changed:
+            while True:
+                with self._lock:
+                    self._check(data)
+                    robots = {name: self._robot({"robot": name}) for name in last_ids}
+                    changed = {name: robot.position_id for name, robot in robots.items() if robot.position_id != last_ids[name]}
+                    now = time.monotonic()
+                    if changed or now >= deadline:
+                        return changed, robots
+                    # Следующая точка очереди выполнится через step_time, тогда id может измениться
+                    wait = deadline - now
+                    for robot in robots.values():
+                        if robot.queue and self.step_time > 0:
+                            wait = min(wait, max(robot.moved_at + self.step_time - now, 0.001))
+                self._changed.wait(wait)
+
+    def _wait_position_id(self, data:dict) -> Any:
+        _changed, robots = self._wait_changes(data, {data.get("robot"): data.get("last")})
+        return robots[data.get("robot")].position_id
+
+    def _wait_position_ids(self, data:dict) -> dict:
+        changed, _robots = self._wait_changes(data, dict(data.get("robots", {})))
+        return changed
+
+    def _set_position_id(self, data:dict) -> None:
+        self._check(data)
+        self._robot(data, check_code=True).position_id = data["id"]
+
+    def _set_program(self, data:dict) -> None:
+        self._check(data)
+        robot = self._robot(data, check_code=True)
+        robot.program = bytes.fromhex(data["program"]).decode("utf-8")
+
+    def _delete_program(self, data:dict) -> None:
+        self._check(data)
+        self._robot(data, check_code=True).program = None
+
+    # Logs
+    @staticmethod
+    def _since(logs:list[dict], timestamp:Union[float, None]) -> list[dict]:
+        return [entry for entry in logs if timestamp is None or entry["timestamp"] >= float(timestamp)]
+
+    def _get_robot_logs(self, data:dict) -> list[dict]:
+        self._check(data)
+        return self._since(self._robot(data).logs, data.get("timestamp"))
+
+    def _add_robot_log(self, data:dict) -> None:
+        self._log(data["text"], self._robot(data), "DEBUG")
+
+    def _get_system_logs(self, data:dict) -> list[dict]:
+        self._admin(data)
+        return self._since(self.logs, data.get("timestamp"))
+
+    # Tools and bases
+    def _item(self, items:dict, data:dict, name:str) -> dict:
+        item = items.get(data.get("id"))
+        if item is None:
+            raise MockError(f"{name} not found", 422)
+        return item
+
+    def _create_tool(self, data:dict) -> None:
+        self._admin(data)
+        self.tools.setdefault(data["id"], {"config": None, "calibration_data": None})
+
+    def _delete_tool(self, data:dict) -> None:
+        self._admin(data)
+        self._item(self.tools, data, "Tool")
+        del self.tools[data["id"]]
+
+    def _get_tool(self, data:dict) -> dict:
+        self._check(data)
+        return self._item(self.tools, data, "Tool")
+
+    def _set_tool(self, data:dict) -> None:
+        self._check(data)
+        self._item(self.tools, data, "Tool")["config"] = data.get("config")
+
+    def _set_tool_calibration(self, data:dict) -> None:
+        self._admin(data)
+        self._item(self.tools, data, "Tool")["calibration_data"] = data.get("calibration_data")
+
+    def _set_robot_tool(self, data:dict) -> None:
+        self._check(data)
+        self._item(self.tools, data, "Tool")
+        self._robot(data, check_code=True).tool = data["id"]
+
+    def _create_base(self, data:dict) -> None:
+        self._admin(data)
+        self.bases.setdefault(data["id"], {"data": None})
+
+    def _delete_base(self, data:dict) -> None:
+        self._admin(data)
+        self._item(self.bases, data, "Base")
+        del self.bases[data["id"]]
+
+    def _get_base(self, data:dict) -> dict:
+        self._check(data)
+        return self._item(self.bases, data, "Base")
+
+    def _get_bases(self, data:dict) -> dict:
+        self._admin(data)
+        return self.bases
+
+    def _set_base(self, data:dict) -> None:
+        self._admin(data)
+        self._item(self.bases, data, "Base")["data"] = data.get("data")
+
+    def _set_robot_base(self, data:dict) -> None:
+        self._check(data)
+        self._item(self.bases, data, "Base")
+        self._robot(data, check_code=True).base = data["id"]
+
+    # Kinematics packages and cache
+    def _add_kinematic(self, data:dict) -> None:
+        # Архив пакета не разбирается, используется встроенная кинематика
+        self.kinematics_packages.add(data.get("id", "uploaded"))
+
+    def _bind_kinematic(self, data:dict) -> None:
+        self._admin(data)
+        self._robot(data).kinematics = data["id"]
+
+    def _export_cache(self, data:dict) -> dict:
+        self._super_admin(data)
+        robots = {name: {"code": robot.code, "password": robot.password, "angle_count": robot.angle_count,
+                         "kinematics": robot.kinematics, "tool": robot.tool, "base": robot.base} for name, robot in self.robots.items()}
+        return {"robots": robots, "tools": self.tools, "frames": self.bases}
+
+    def _import_cache(self, data:dict) -> None:
+        self._super_admin(data)
+        for name, robot in ast.literal_eval(data["robots"]).items():
+            self.robots[name] = MockRobot(name, robot["code"], robot["password"], robot["angle_count"], robot.get("kinematics", "None"),
+                                          tool=robot.get("tool"), base=robot.get("base"))
+        self.tools.update(ast.literal_eval(data["tools"]))
+        self.bases.update(ast.literal_eval(data["frames"]))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline mock of the URSystem server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--server-token", default="mock-server-token")
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--payload-size", type=int, default=0)
+    parser.add_argument("--step-time", type=float, default=0.01)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+    server = MockURSystem(args.host, args.port, args.server_token, args.latency, args.jitter, args.payload_size,
+                          args.step_time, args.certfile, args.keyfile).start()
+    print(f"Mock URSystem on {server.url}, SuperAdmin password 12345, server token {server.server_token}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,108 @@
+"""  Spline evaluation with cached basis matrices
+
+Both splines used for trajectories are linear in their control points, so for a
+given number of control points and samples the whole evaluation is one matrix:
+
+    catmull_rom_basis(samples)             (samples, 4) weights of P0..P3 for t = linspace(0, 1, samples)
+    cubic_spline_basis(count, samples)     (samples, count) CubicSpline through `count` points at
+                                           uniform t, evaluated at linspace(0, 1, samples)
+
+The matrices are computed once and cached, a curve is then one matrix product
+over all six columns (x, y, z, a, b, c) of the control points. The cubic spline
+basis grows with count * samples, so it is only used up to `BASIS_MAX_COUNT`
+control points and `BASIS_MAX_SIZE` elements, larger sets (e.g. a whole Trajectory
+passed to `Spline.add_point`) fit CubicSpline on the points directly, linear in N.
+
+`cubic_spline_arc_length` samples the cubic spline at uniform distance along the
+path (x, y, z) instead of uniform t: the length table is the spline of the
+points evaluated at `TABLE_SAMPLES` per span (not cached) and is inverted with
+linear interpolation.
+
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+TABLE_SAMPLES = 64
+# Предел кэшируемого базиса: 32 точки, 2^18 элементов (2 MiB) на матрицу
+BASIS_MAX_COUNT = 32
+BASIS_MAX_SIZE = 1 << 18
+
+# Строки - степени t (t^3, t^2, t, 1), столбцы - веса P0..P3
+CATMULL_ROM = np.array([
+    [-0.5,  1.5, -1.5,  0.5],
+    [ 1.0, -2.5,  2.0, -0.5],
+    [-0.5,  0.0,  0.5,  0.0],
+    [ 0.0,  1.0,  0.0,  0.0],
+    ])
+
+def _read_only(array:np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+@lru_cache(maxsize=64)
+def catmull_rom_basis(samples:int) -> np.ndarray:
+    t = np.linspace(0, 1, samples)
+    powers = np.stack([t ** 3, t ** 2, t, np.ones_like(t)], axis=1)
+    return _read_only(powers @ CATMULL_ROM)
+
+@lru_cache(maxsize=BASIS_MAX_COUNT)
+def _unit_cubic_spline(count:int) -> CubicSpline:
+    # Сплайн по единичной матрице: столбец k - вклад k-й контрольной точки
+    return CubicSpline(np.linspace(0, 1, count), np.eye(count), axis=0)
+
+def _cached_basis(count:int, samples:int) -> bool:
+    return count <= BASIS_MAX_COUNT and count * samples <= BASIS_MAX_SIZE
+
+@lru_cache(maxsize=16)
+def cubic_spline_basis(count:int, samples:int) -> np.ndarray:
+    """ Only for count <= BASIS_MAX_COUNT and count * samples <= BASIS_MAX_SIZE """
+    if not _cached_basis(count, samples):
+        raise ValueError(f"Basis of {count} points and {samples} samples is too large to cache.")
+    return _read_only(_unit_cubic_spline(count)(np.linspace(0, 1, samples)))
+
+def catmull_rom_chain(points:np.ndarray, samples:int) -> np.ndarray:
+    """ `samples` points per segment for every window of four control points, (segments * samples, columns) """
+    points = np.asarray(points, dtype=np.float64)
+    if samples <= 0 or len(points) < 4:
+        return np.empty((0, points.shape[1]), dtype=np.float64)
+    windows = np.lib.stride_tricks.sliding_window_view(points, 4, axis=0)
+    return np.einsum("sk,nck->nsc", catmull_rom_basis(samples), windows).reshape(-1, points.shape[1])
+
+def cubic_spline(points:np.ndarray, samples:int) -> np.ndarray:
+    """ Not-a-knot cubic spline through `points` at uniform t, `samples` points, (samples, columns) """
+    points = np.asarray(points, dtype=np.float64)
+    if _cached_basis(len(points), samples):
+        return cubic_spline_basis(len(points), samples) @ points
+    return cubic_spline_at(points, np.linspace(0, 1, samples))
+
+def cubic_spline_at(points:np.ndarray, t:np.ndarray) -> np.ndarray:
+    """ Cubic spline through `points` (uniform knots on [0, 1]) evaluated at arbitrary `t` """
+    points = np.asarray(points, dtype=np.float64)
+    return CubicSpline(np.linspace(0, 1, len(points)), points, axis=0)(t)
+
+def arc_length_table(points:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ (t, length of the path x, y, z from t = 0) at TABLE_SAMPLES points per span """
+    points = np.asarray(points, dtype=np.float64)
+    t = np.linspace(0, 1, TABLE_SAMPLES * (len(points) - 1) + 1)
+    dense = cubic_spline_at(points[:, :3], t)
+    lengths = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(dense, axis=0), axis=1))))
+    return t, lengths
+
+def cubic_spline_arc_length(points:np.ndarray, samples:int=None, spacing:float=None) -> np.ndarray:
+    """ Cubic spline through `points` sampled at uniform distance along the path \n
+    `spacing` (mm) sets the largest distance between neighbour points, otherwise `samples` points are used.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    t, lengths = arc_length_table(points)
+    total = lengths[-1]
+    if spacing is not None:
+        if spacing <= 0:
+            raise ValueError("Spacing must be greater than 0.")
+        samples = int(np.ceil(total / spacing)) + 1
+    if total == 0:
+        # Только поворот на месте - равномерно по t
+        return cubic_spline(points, samples)
+    return cubic_spline_at(points, np.interp(np.linspace(0, total, samples), lengths, t))
@@ -3,7 +3,11 @@ from typing import Union
 import numpy as np
 from scipy.interpolate import CubicSpline
 
-from data_types import XYZPos, RobotData, Spline
+from data_types import XYZPos, RobotData, Spline, Trajectory
+
+def _wrap_degrees(angles: np.ndarray) -> np.ndarray:
+    # Разность углов в [-180, 180): 179 -> -179 это 2 градуса, а не 358
+    return (angles + 180) % 360 - 180
 
 class TrajectoryConstructor:
     
@@ -157,97 +161,65 @@ class TrajectoryConstructor:
         
         return distance
         
-    def generate_arc_3d(self, start_point: XYZPos, middle_point: XYZPos, end_point: XYZPos, num_points: int = 25, distance: int = None, arc_angle: float = None):
+    def generate_arc_3d(self, start_point: XYZPos, middle_point: XYZPos, end_point: XYZPos, num_points: int = 25, distance: int = None, arc_angle: float = None) -> tuple[Trajectory, XYZPos, XYZPos]:
+        """
+        Arc through three points as one (N, 6) block: positions are computed for all angles at once,
+        orientation steps are accumulated with one cumulative sum.
+
+        :return: (Trajectory of the arc, point at `distance` from the end, point at `distance` from the start),
+            without `distance` - (Trajectory of the arc, end_point, start_point)
+        """
         arc_angle_start = arc_angle
             
-        # Конвертируем точки в список для удобства
-        converted_start_point = start_point.export_to(export_type=list)[0:3]
-        converted_middle_point = middle_point.export_to(export_type=list)[0:3]
-        converted_end_point = end_point.export_to(export_type=list)[0:3]
-        
-        p1 = np.array(converted_start_point)
-        p2 = np.array(converted_middle_point)
-        p3 = np.array(converted_end_point)
+        p1 = np.array(start_point.export_to(export_type=list)[0:3], dtype=np.float64)
+        p2 = np.array(middle_point.export_to(export_type=list)[0:3], dtype=np.float64)
+        p3 = np.array(end_point.export_to(export_type=list)[0:3], dtype=np.float64)
         center, radius, normal = self.circle_center(p1, p2, p3)
         
         # Векторы от центра к точкам
-        v1 = np.array(p1) - center
-        v3 = np.array(p3) - center
+        v1 = p1 - center
+        v3 = p3 - center
         
         if arc_angle_start is None:
             # Если угол не задан, вычисляем угол между p1 и p3
             arc_angle = np.degrees(np.arccos(np.dot(v1, v3) / (np.linalg.norm(v1) * np.linalg.norm(v3))))
         
-        # Определяем угол дуги на основе параметра arc_angle (в радианах)
-        theta_total = np.radians(arc_angle)  # Преобразуем угол в радианы
-        theta = np.linspace(0, theta_total, num_points)
+        theta = np.linspace(0, np.radians(arc_angle), num_points)
         
         # Ортонормированные базисные векторы в плоскости окружности
         u = v1 / np.linalg.norm(v1)
         w = np.cross(normal, u)
 
+        # Все точки дуги одной операцией, столбцы как в Trajectory: x, y, z, c, b, a
+        positions = np.empty((num_points, 6), dtype=np.float64)
+        positions[:, :3] = center + radius * (np.cos(theta)[:, np.newaxis] * u + np.sin(theta)[:, np.newaxis] * w)
+        
+        # Шаги углов a, b, c по точкам, первая строка - начальные углы (без distance - нули)
+        steps = np.zeros((num_points, 3), dtype=np.float64)
         if distance is not None:
-            # Вычисляем координаты всех точек дуги
-            arc_points = [XYZPos().from_list(coord) for coord in np.array([center + radius * (np.cos(t) * u + np.sin(t) * w) for t in theta]).tolist()]
-            # Применяем шаги углов для каждой точки
-            arc_points[0].a = start_point.a; arc_points[0].b = start_point.b; arc_points[0].c = start_point.c
-        else:
-            # Если distance == None, возвращаем все точки до угла (arc_angle_calc)
-            arc_points = [XYZPos().from_list(coord) for coord in np.array([center + radius * (np.cos(t) * u + np.sin(t) * w) for t in np.linspace(0, np.radians(arc_angle), num_points)])]
+            steps[0] = start_point.a, start_point.b, start_point.c
 
         if arc_angle_start is None:
-            if num_points % 2 != 0:
-                num_points += 1
-            a_delta_1 = -(start_point.a - middle_point.a)
-            a_delta_2 = -(middle_point.a - end_point.a)
-            b_delta_1 = -(start_point.b - middle_point.b)
-            b_delta_2 = -(middle_point.b - end_point.b)
-            c_delta_1 = -(start_point.c - middle_point.c)
-            c_delta_2 = -(middle_point.c - end_point.c)
+            count = num_points + num_points % 2
+            # Ближайшая к middle_point точка дуги (расстояние по всем шести столбцам, углы ещё не заданы)
+            positions[:, 3:] = steps[:, ::-1]
+            middle = np.array(middle_point.export_to(export_type=list)[0:-1], dtype=np.float64)
+            index = int(np.argmin(np.linalg.norm(positions - middle, axis=1)))
             # Поиск процентного отношения 1 и 2 отрезка к их сумме
-            finding_result = {}
-            points_distance = 9999999
-            for index, point in enumerate(arc_points):
-                new_distance = self.distance_between_points(middle_point, point)
-                if  new_distance < points_distance:
-                    points_distance = new_distance
-                    finding_result = {'point': point, 'index': index}
-            percent = (100 / num_points) * finding_result['index'] + 1
+            percent = (100 / count) * index + 1
             proportion = 100 / percent
-            # Поиск угла на 1 шаг для первого отрезка
-            a_step_1 = a_delta_1 / (num_points / proportion)
-            b_step_1 = b_delta_1 / (num_points / proportion)
-            c_step_1 = c_delta_1 / (num_points / proportion)
-            # Поиск угла на 1 шаг для второго отрезка
-            a_step_2 = a_delta_2 / (num_points / proportion)
-            b_step_2 = b_delta_2 / (num_points / proportion)
-            c_step_2 = c_delta_2 / (num_points / proportion)
-        else:
-            a_delta = -(start_point.a - middle_point.a)
-            b_delta = -(middle_point.b - end_point.b)
-            c_delta = -(start_point.c - middle_point.c)
-            
-            a_step = a_delta / num_points
-            b_step = b_delta / num_points
-            c_step = c_delta / num_points
-              
-        # Поиск дельты углов ABC
-        if arc_angle_start is None:
-            # 1 отрезок
-            for i in range(1, int(num_points / proportion) + 1):
-                arc_points[i].a = arc_points[i-1].a + a_step_1
-                arc_points[i].b = arc_points[i-1].b + b_step_1
-                arc_points[i].c = arc_points[i-1].c + c_step_1
-            # 2 отрезок
-            for i in range(int(num_points / proportion) + 1, num_points):
-                arc_points[i].a = arc_points[i-1].a + a_step_2
-                arc_points[i].b = arc_points[i-1].b + b_step_2
-                arc_points[i].c = arc_points[i-1].c + c_step_2
+            split = int(count / proportion)
+            delta_1 = -(np.array([start_point.a, start_point.b, start_point.c]) - np.array([middle_point.a, middle_point.b, middle_point.c]))
+            delta_2 = -(np.array([middle_point.a, middle_point.b, middle_point.c]) - np.array([end_point.a, end_point.b, end_point.c]))
+            steps[1:split + 1] = delta_1 / (count / proportion)
+            steps[split + 1:] = delta_2 / (count / proportion)
         else:
-            for i in range(1, num_points):
-                arc_points[i].a = arc_points[i-1].a + a_step
-                arc_points[i].b = arc_points[i-1].b + b_step
-                arc_points[i].c = arc_points[i-1].c + c_step
+            steps[1:] = np.array([
+                -(start_point.a - middle_point.a),
+                -(middle_point.b - end_point.b),
+                -(start_point.c - middle_point.c)
+                ]) / num_points
+        positions[:, 3:] = np.cumsum(steps, axis=0)[:, ::-1]
         
         if distance is not None:     
             # Длина дуги между двумя точками на окружности
@@ -257,19 +229,16 @@ class TrajectoryConstructor:
             theta_end = np.radians((1 - distance / arc_length) * arc_angle)  # Угол для точки от конца
             theta_start = np.radians(distance / arc_length * arc_angle)  # Угол для точки от начала
             
-            # Индекс точки на дуге, до которой нужно вычислить
+            # Обрезаем дугу до целевой точки
             target_index = np.searchsorted(theta, theta_end)
             
-            # Обрезаем список точек дуги до целевой точки
-            arc_points = arc_points[:target_index]
-            
             # Вычисляем точки на дуге на нужных расстояниях
             target_point_from_start = XYZPos().from_list(center + radius * (np.cos(theta_start) * u + np.sin(theta_start) * w))
             target_point_from_end = XYZPos().from_list(center + radius * (np.cos(theta_end) * u + np.sin(theta_end) * w))
             
-            return arc_points, target_point_from_end, target_point_from_start
+            return Trajectory(positions[:target_index]), target_point_from_end, target_point_from_start
         else:
-            return arc_points, end_point, start_point
+            return Trajectory(positions), end_point, start_point
     
     def point_on_trajectory(self, start_point: XYZPos, end_point: XYZPos, distance:float):
         """
@@ -280,74 +249,103 @@ class TrajectoryConstructor:
         :param distance: float, расстояние от start_point до искомой точки
         :return: XYZPos - координаты найденной точки
         """
-        getted_start_point = start_point
-        a_delta = -(start_point.a - end_point.a)
-        b_delta = -(start_point.b - end_point.b)
-        c_delta = -(start_point.c - end_point.c)
-        old_distance = self.distance_between_points(start_point, end_point)
-        
-        a_step = a_delta / old_distance
-        b_step = b_delta / old_distance
-        c_step = c_delta / old_distance
-        
-        a_new_delta = a_step * distance
-        b_new_delta = b_step * distance
-        c_new_delta = c_step * distance
-        getted_start_point = start_point
-        
-        start_point = np.array(start_point.export_to(export_type=list)[0:-1])
-        end_point = np.array(end_point.export_to(export_type=list)[0:-1])
-        direction = end_point - start_point  # Вектор направления
-        length = np.linalg.norm(direction)  # Длина вектора
-
-        if length == 0:
-            return getted_start_point
-        
-        direction = direction / length  # Нормализация вектора
-        new_point = list(start_point + direction * distance)  # Вычисление новой точки
-        new_point.extend([getted_start_point.a+a_new_delta, getted_start_point.b+b_new_delta, getted_start_point.c+c_new_delta])
-        return XYZPos.from_list(new_point)
+        index = Trajectory.from_points([start_point, end_point]).arc_length_index()
+        if index.length == 0:
+            return start_point
+        return index.point_at(distance)
     
     @staticmethod
-    def generate_line_points(start: XYZPos, end: XYZPos, num_points: int):
+    def generate_line_points(start: XYZPos, end: XYZPos, num_points: int) -> Trajectory:
         """
-        Generates a list of points located on a line between two given points,
+        Generates points located on a line between two given points,
         including smooth transition for position (x, y, z) and orientation (a, b, c).
 
         :param start: Start point with coordinates and orientation [x, y, z, a, b, c]
         :param end: End point with coordinates and orientation [x, y, z, a, b, c]
         :param num_points: Number of points to generate (must be >= 2)
-        :return: List of XYZPos instances with interpolated positions and orientations
+        :return: Trajectory with interpolated positions and orientations
         """
         if num_points < 2:
             raise ValueError("The number of points must be at least 2.")
 
         # Получаем значения из start и end
-        x1, y1, z1, a1, b1, c1, send = start.export_to(list)
-        x2, y2, z2, a2, b2, c2, send = end.export_to(list)
-
-        # Вычисляем шаги для координат и ориентации
-        x_step = (x2 - x1) / (num_points - 1)
-        y_step = (y2 - y1) / (num_points - 1)
-        z_step = (z2 - z1) / (num_points - 1)
-        a_step = (a2 - a1) / (num_points - 1)
-        b_step = (b2 - b1) / (num_points - 1)
-        c_step = (c2 - c1) / (num_points - 1)
+        start_values = np.array(start.export_to(list)[0:-1], dtype=np.float64)
+        end_values = np.array(end.export_to(list)[0:-1], dtype=np.float64)
 
         # Генерируем точки
-        points = []
-        for i in range(num_points):
-            x = x1 + i * x_step
-            y = y1 + i * y_step
-            z = z1 + i * z_step
-            a = a1 + i * a_step
-            b = b1 + i * b_step
-            c = c1 + i * c_step
-            point = XYZPos().from_list([x, y, z, a, b, c])
-            points.append(point)
-        return points
+        steps = np.arange(num_points, dtype=np.float64)[:, np.newaxis]
+        return Trajectory(start_values + steps * ((end_values - start_values) / (num_points - 1)))
     
-    def set_trigger_point_in_trajectory(self, trajectory: list[XYZPos], length:float, trigger_id:str) -> tuple[int, XYZPos, list[XYZPos]]:
+    @staticmethod
+    def simplify_indices(trajectory: Trajectory, chord_error: float, angle_error: float) -> np.ndarray:
+        """
+        Ramer-Douglas-Peucker decimation, returns the sorted indices of the kept points.
+        A point is dropped when the straight move between its kept neighbours passes within
+        `chord_error` mm (position) and `angle_error` degrees (orientation, linear between the kept
+        points the short way round ±180). First, last and `send` marker points are always kept.
+        The bound holds for the commanded poses, the controller interpolates joint angles between
+        the points, see `joint_deviation` for checking that.
+        """
+        count = len(trajectory)
+        if count < 3 or chord_error <= 0:
+            return np.arange(count)
+        positions = trajectory.positions
+        keep = np.zeros(count, dtype=bool)
+        keep[[0, -1]] = True
+        keep[list(trajectory.send)] = True
+        anchors = np.flatnonzero(keep)
+        # Стек участков вместо рекурсии, каждый участок проверяется одной векторной операцией
+        segments = list(zip(anchors[:-1].tolist(), anchors[1:].tolist()))
+        while segments:
+            start, end = segments.pop()
+            if end - start < 2:
+                continue
+            inner = positions[start + 1:end]
+            chord = positions[end, :3] - positions[start, :3]
+            offsets = inner[:, :3] - positions[start, :3]
+            chord_length = chord @ chord
+            if chord_length > 0:
+                t = np.clip(offsets @ chord / chord_length, 0, 1)
+            else:
+                t = np.arange(1, end - start) / (end - start)
+            position_error = np.linalg.norm(offsets - t[:, np.newaxis] * chord, axis=1)
+            angles = positions[start, 3:] + t[:, np.newaxis] * _wrap_degrees(positions[end, 3:] - positions[start, 3:])
+            orientation_error = np.abs(_wrap_degrees(inner[:, 3:] - angles)).max(axis=1)
+            excess = np.maximum(position_error / chord_error, orientation_error / angle_error)
+            worst = int(np.argmax(excess))
+            if excess[worst] > 1:
+                split = start + 1 + worst
+                keep[split] = True
+                segments.append((start, split))
+                segments.append((split, end))
+        return np.flatnonzero(keep)
+    
+    @staticmethod
+    def simplify(trajectory: Trajectory, chord_error: float, angle_error: float) -> Trajectory:
+        """ Trajectory of the points kept by `simplify_indices` """
+        if len(trajectory) < 3 or chord_error <= 0:
+            return trajectory
+        return trajectory.take(TrajectoryConstructor.simplify_indices(trajectory, chord_error, angle_error).tolist())
+    
+    @staticmethod
+    def joint_deviation(start: np.ndarray, end: np.ndarray, joints: np.ndarray) -> np.ndarray:
+        """
+        Largest joint error (degrees) of every row of `joints` from the straight joint-space move
+        start -> end the controller makes, (M, J) rows with (M, J) or (J,) `start` / `end`.
+        """
+        chord = end - start
+        offsets = joints - start
+        length = np.broadcast_to(np.einsum("...j,...j->...", chord, chord), offsets.shape[:-1])
+        projection = np.einsum("...j,...j->...", offsets, np.broadcast_to(chord, offsets.shape))
+        # Нулевое перемещение: отклонение от начальной точки
+        t = np.clip(np.divide(projection, length, out=np.zeros_like(projection), where=length > 0), 0, 1)
+        return np.abs(offsets - t[..., np.newaxis] * chord).max(axis=-1)
+    
+    def set_trigger_point_in_trajectory(self, trajectory: Union[list[XYZPos], Trajectory], length:float, trigger_id:str) -> tuple[int, XYZPos, Union[list[XYZPos], Trajectory]]:
+        if isinstance(trajectory, Trajectory):
+            index = trajectory.arc_length_index().trigger_index(length)
+            trajectory.set_send(index, trigger_id)
+            return index, trajectory[index], trajectory
         trajectory_length = 0
         for index, position in enumerate(trajectory):
             if index == len(trajectory) - 1:
@@ -356,243 +354,309 @@ class TrajectoryConstructor:
                 trajectory_length += self.distance_between_points(position, trajectory[index + 1])
             
             if trajectory_length > length:
-                trajectory[index].send = trigger_id
-                return index, trajectory[index], trajectory 
+                position.send = trigger_id
+                trajectory[index] = position
+                return index, position, trajectory 
         raise ValueError("The specified length exceeds the trajectory length.")
+
+    @staticmethod
+    def set_trigger_points(trajectory: Trajectory, triggers: dict) -> Trajectory:
+        """
+        Sets all triggers {trigger_id: length} in the trajectory with one binary search
+        over the cumulative length of the trajectory.
+        """
+        if not triggers:
+            return trajectory
+        indices = trajectory.arc_length_index().trigger_indices(list(triggers.values()))
+        for trigger_id, index in zip(triggers.keys(), indices.tolist()):
+            trajectory.set_send(index, trigger_id)
+        return trajectory
     
     @staticmethod
     def find_smoothing_points(updating_end_point: Union[list, XYZPos], cartesian_points: list[XYZPos]) -> list[XYZPos]:
-        while True:
-            if isinstance(updating_end_point, list):
-                if isinstance(updating_end_point[2].smooth_endPoint, list):
-                    if updating_end_point[2].smooth_endPoint[2].smooth_endPoint is None:
-                        break
-                else:
-                    if updating_end_point[2].smooth_endPoint.smooth_endPoint is None:
-                        break
-            elif isinstance(updating_end_point, XYZPos):
-                if isinstance(updating_end_point.smooth_endPoint, list):
-                    if updating_end_point.smooth_endPoint[2].smooth_endPoint is None:
-                        cartesian_points.append(updating_end_point)
-                        break
-                else:
-                    if updating_end_point.smooth_endPoint.smooth_endPoint is None:
-                        cartesian_points.append(updating_end_point)
-                        break
-                    
-            if isinstance(updating_end_point, list):
-                """Smoothing from CIRC"""
-                if isinstance(updating_end_point[2].smooth_endPoint, list):
-                    # Smooth to CIRC trajectory
-                    updating_end_point = updating_end_point[2].smooth_endPoint
-                    # cartesian_points.append(updating_end_point)
-                elif isinstance(updating_end_point[2].smooth_endPoint, XYZPos):
-                    # Smooth to LIN trajectory
-                    updating_end_point = updating_end_point[2].smooth_endPoint
-                    # cartesian_points.append(updating_end_point)
-            elif isinstance(updating_end_point, XYZPos):
-                """Smoothing from LIN"""
-                if isinstance(updating_end_point.smooth_endPoint, list):
-                    # Smooth to CIRC trajectory
-                    cartesian_points.append(updating_end_point)
-                    updating_end_point = updating_end_point.smooth_endPoint
-                elif isinstance(updating_end_point.smooth_endPoint, XYZPos):
-                    # Smooth to LIN trajectory
-                    cartesian_points.append(updating_end_point)
-                    updating_end_point = updating_end_point.smooth_endPoint
-
+        """ Corner points of a smoothing chain, see `MotionProgram.compile` """
+        cartesian_points.extend(corner for _kind, corner in MotionProgram.walk(updating_end_point))
         return cartesian_points
     
-    def smooth_trajectory(self, robot_data: RobotData, full_trajectory_points: list[XYZPos], cartesian_points: list[XYZPos], count_points: int) -> list[XYZPos]:
-        for point in cartesian_points:
+    def smooth_trajectory(self, robot_data: RobotData, full_trajectory_points: list[XYZPos], cartesian_points: list[XYZPos], count_points: int) -> Trajectory:
+        return MotionProgram([(MotionProgram.corner_kind(point), point) for point in cartesian_points], self).build(robot_data, full_trajectory_points, count_points)
+
+class PathBuffer:
+    """ Preallocated (N, 6) output of a motion program, grows by doubling when an estimate was too small """
+    
+    def __init__(self, capacity:int) -> None:
+        self.positions = np.empty((max(capacity, 1), 6), dtype=np.float64)
+        self.size = 0
+        self.send:dict[int, str] = {}
+    
+    def _reserve(self, count:int) -> None:
+        if self.size + count > len(self.positions):
+            positions = np.empty((max(2 * len(self.positions), self.size + count), 6), dtype=np.float64)
+            positions[:self.size] = self.positions[:self.size]
+            self.positions = positions
+    
+    def append(self, block:Union[Trajectory, XYZPos, list[XYZPos]]) -> None:
+        if isinstance(block, XYZPos):
+            self._reserve(1)
+            self.positions[self.size] = block.x, block.y, block.z, block.c, block.b, block.a
+            if block.send:
+                self.send[self.size] = block.send
+            self.size += 1
+            return
+        if not isinstance(block, Trajectory):
+            block = Trajectory.from_points(block)
+        self._reserve(len(block))
+        self.positions[self.size:self.size + len(block)] = block.positions
+        for index, marker in block.send.items():
+            self.send[self.size + index] = marker
+        self.size += len(block)
+    
+    def last(self) -> XYZPos:
+        point = XYZPos.from_list(self.positions[self.size - 1].tolist())
+        point.send = self.send.get(self.size - 1, "")
+        return point
+    
+    def trajectory(self) -> Trajectory:
+        return Trajectory(self.positions[:self.size].copy(), self.send)
+
+class MotionProgram:
+    """ Smoothing chain compiled to a flat table of corners \n
+    `compile` walks the `smooth_endPoint` links once and stores every corner as (kind, point),
+    `build` turns the table into the blended path in one pass, every corner writes its blocks
+    (lines, arcs, blends) straight into one preallocated PathBuffer.
+    A corner point is an XYZPos (end of a LIN) or a list of three XYZPos (a CIRC).
+    """
+    LIN_LIN, LIN_CIRC, CIRC_LIN, CIRC_CIRC = range(4)
+    # Оценка числа точек скругления (Spline по умолчанию строит 50 точек)
+    BLEND_POINTS = 50
+    
+    def __init__(self, corners:list[tuple[int, Union[XYZPos, list[XYZPos]]]], constructor:"TrajectoryConstructor"=None) -> None:
+        self.corners = corners
+        self.constructor = TrajectoryConstructor() if constructor is None else constructor
+        self._handlers = (self._lin_to_lin, self._lin_to_circ, self._circ_to_lin, self._circ_to_circ)
+    
+    @staticmethod
+    def corner_kind(point:Union[XYZPos, list[XYZPos]]) -> int:
+        if isinstance(point, XYZPos):
+            return MotionProgram.LIN_LIN if isinstance(point.smooth_endPoint, XYZPos) else MotionProgram.LIN_CIRC
+        return MotionProgram.CIRC_LIN if isinstance(point[2].smooth_endPoint, XYZPos) else MotionProgram.CIRC_CIRC
+    
+    @staticmethod
+    def walk(head:Union[XYZPos, list[XYZPos]]) -> list[tuple[int, Union[XYZPos, list[XYZPos]]]]:
+        """ Corners after `head` as (kind, point) \n
+        LIN points are corners while the chain goes on, CIRC segments after the first one are
+        blended by the corner before them.
+        """
+        corners = []
+        point = head
+        while True:
+            next_point = point[2].smooth_endPoint if isinstance(point, list) else point.smooth_endPoint
+            last = (next_point[2] if isinstance(next_point, list) else next_point).smooth_endPoint is None
             if isinstance(point, XYZPos):
-                if isinstance(point.smooth_endPoint, XYZPos):
-                    # LIN to LIN
-                    start_smoothing_point = self.point_on_trajectory(point, full_trajectory_points[-1], point.smooth_distance)
-                    end_smoothing_point = self.point_on_trajectory(point, point.smooth_endPoint, point.smooth_distance)
-                    # Find middle spline point
-                    A = np.array(end_smoothing_point.export_to(list)[:3])
-                    C = np.array(point.export_to(list)[:3])
-                    B = np.array(start_smoothing_point.export_to(list)[:3])
-                    middle_spline_point = XYZPos.from_list(self.bisector_point(A, B, C, point.smooth_distance, 0.3).tolist())
-                    middle_spline_point.a = point.a; middle_spline_point.b = point.b; middle_spline_point.c = point.c
-                    # Create smoothed trajectory
-                    smoothed_arc_points = Spline(robot_data, "", system=self).add_point(start_smoothing_point, middle_spline_point, end_smoothing_point)._create_scypy_spline_points()
-                    line_1 = self.generate_line_points(full_trajectory_points[-1], start_smoothing_point, count_points)
-                    line_2 = self.generate_line_points(smoothed_arc_points[-1], point.smooth_endPoint, count_points)
-                    full_trajectory_points.extend(line_1)
-                    full_trajectory_points.extend(smoothed_arc_points)
-                    if point.smooth_endPoint.smooth_endPoint is None:
-                        full_trajectory_points.extend(line_2)
-                else:
-                    # LIN to CIRC
-                    # Find smooth distance end LIN point
-                    end_smoothing_point = self.point_on_trajectory(point, full_trajectory_points[-1], point.smooth_distance)
-                    line_trajectory = self.generate_line_points(full_trajectory_points[-1], end_smoothing_point, count_points)
-                    # Find smooth distance start CIRC point and create CIRC trajectory
-                    circ_coords, _start_smoothing_point, _end_smoothing_point  = self.generate_arc_3d(
-                        point.smooth_endPoint[0],
-                        point.smooth_endPoint[1],
-                        point.smooth_endPoint[2],
-                        count_points,
-                        distance=0,
-                        arc_angle=point.smooth_endPoint[2].circ_angle
-                        )
-
-                    circ_coords, start_smoothing_point, _end_smoothing_point  = self.generate_arc_3d(
-                        circ_coords[-1],
-                        point.smooth_endPoint[1],
-                        point.smooth_endPoint[0],
-                        count_points,
-                        distance=point.smooth_distance,
-                        arc_angle=point.smooth_endPoint[2].circ_angle
-                        )
-                    circ_coords.reverse()
-                        
-                    # Find middle spline point
-                    smoothed_angle_point = self.point_between(end_smoothing_point, point, 80)
-                    A = np.array(end_smoothing_point.export_to(list)[:3])
-                    C = np.array(smoothed_angle_point.export_to(list)[:3])
-                    B = np.array(start_smoothing_point.export_to(list)[:3])
-                    middle_spline_point = XYZPos.from_list(self.bisector_point(A, B, C, point.smooth_endPoint[2].smooth_distance, 1).tolist())
-                    
-                    # Add LIN trajectory to full trajectory
-                    full_trajectory_points.extend(line_trajectory)
-                    
-                    # Find ABC angles
-                    end_smoothing_point.a = point.a; end_smoothing_point.b = point.b; end_smoothing_point.c = point.c
-                    if point.smooth_endPoint is not None:
-                        a_delta = -(circ_coords[-1].a - point.smooth_endPoint[0].a) / 2
-                        b_delta = -(circ_coords[-1].b - point.smooth_endPoint[0].b) / 2
-                        c_delta = -(circ_coords[-1].c - point.smooth_endPoint[0].c) / 2
-                    start_smoothing_point.a = circ_coords[0].a;\
-                        start_smoothing_point.b = circ_coords[0].b; start_smoothing_point.c = circ_coords[0].c
-                    middle_spline_point.a = end_smoothing_point.a + (a_delta / 2);\
-                        middle_spline_point.b = end_smoothing_point.b + (b_delta / 2); middle_spline_point.c = end_smoothing_point.c + (c_delta / 2)
-                    pre_start_smoothing_point = self.point_between(middle_spline_point, start_smoothing_point, 90)
-                    # Create smoothed trajectory
-                    smoothed_trajectory = Spline(robot_data, "", system=self).add_point(end_smoothing_point, middle_spline_point, \
-                        pre_start_smoothing_point, start_smoothing_point)._create_catmull_rom_spline_points()
-                    # Add smoothed and CIRC trajectory to full trajectory
-                    full_trajectory_points.extend(smoothed_trajectory)
-                    full_trajectory_points.extend([cord for cord in circ_coords])
-                    
-            elif isinstance(point, list):
-                if isinstance(point[2].smooth_endPoint, XYZPos):
-                    # CIRC to LIN
-                    # Find smooth distance start CIRC point
-                    if point[2].circ_angle is not None:
-                        if point[2].circ_angle < 18:
-                            raise ValueError("Arc angle must be greater than 18 degrees.")
-                    coords, end_smoothing_point, _start_smoothing_point = self.generate_arc_3d(
-                        point[0],
-                        point[1],
-                        point[2],
-                        count_points,
-                        distance=point[2].smooth_distance,
-                        arc_angle=point[2].circ_angle
-                        )
-                    last_circ_point = coords[-1]
-                    
-                    smoothed_coords, _end_smoothing_point, _start_smoothing_point = self.generate_arc_3d(
-                        point[0],
-                        point[1],
-                        point[2],
-                        count_points,
-                        distance=None,
-                        arc_angle=point[2].circ_angle+5 if point[2].circ_angle is not None else None,
-                        )
-                    
-                    # Find smooth distance start LIN point
-                    end_circ_point = smoothed_coords[-1]
-                    start_smoothing_point = self.point_on_trajectory(end_circ_point, point[2].smooth_endPoint, point[2].smooth_distance)
-                    
-                    # Find middle spline point
-                    A = np.array(coords[-1].export_to(list)[:3])
-                    C = np.array(smoothed_coords[-1].export_to(export_type=list)[:3])
-                    B = np.array(start_smoothing_point.export_to(list)[:3])
-                    middle_spline_point = XYZPos.from_list(self.bisector_point(A, B, C, point[2].smooth_distance, 0.33).tolist())
-                    
-                    end_smoothing_point.a = last_circ_point.a; end_smoothing_point.b = last_circ_point.b; end_smoothing_point.c = last_circ_point.c
-                    if point[2].smooth_endPoint is not None:
-                        a_delta = -(last_circ_point.a - point[2].smooth_endPoint.a) / 2
-                        b_delta = -(last_circ_point.b - point[2].smooth_endPoint.b) / 2
-                        c_delta = -(last_circ_point.c - point[2].smooth_endPoint.c) / 2
-                    start_smoothing_point.a = end_smoothing_point.a + a_delta;\
-                        start_smoothing_point.b = end_smoothing_point.b + b_delta; start_smoothing_point.c = end_smoothing_point.c + c_delta
-                    middle_spline_point.a = end_smoothing_point.a + (a_delta / 2);\
-                        middle_spline_point.b = end_smoothing_point.b + (b_delta / 2); middle_spline_point.c = end_smoothing_point.c + (c_delta / 2)
-                    # TODO: repair Spline parameters
-                    smoothed_trajectory = Spline(robot_data, "", system=self).add_point(end_smoothing_point, middle_spline_point, start_smoothing_point, start_smoothing_point)._create_catmull_rom_spline_points()
-                    full_trajectory_points.extend([cord for cord in coords])
-                    full_trajectory_points += smoothed_trajectory
-                    
-                    if point[2].smooth_endPoint.smooth_endPoint is None:
-                        full_trajectory_points.extend(self.generate_line_points(smoothed_trajectory[-1], point[2].smooth_endPoint, count_points))
-                        full_trajectory_points.append(point[2].smooth_endPoint)
-                else:
-                    # CIRC to CIRC
-                    # Find smooth distance end CIRC point
-                    if point[2].circ_angle is not None:
-                        if point[2].circ_angle < 18:
-                            raise ValueError("Arc in one angle must be greater than 18 degrees.")
-                    circ_coords1, end_smoothing_point, _start_smoothing_point = self.generate_arc_3d(
-                        point[0],
-                        point[1],
-                        point[2],
-                        count_points,
-                        distance=point[2].smooth_distance,
-                        arc_angle=point[2].circ_angle
-                        )
-                    
-                    smoothed_coords1, _end_smoothing_point, _start_smoothing_point = self.generate_arc_3d(
-                        point[0],
-                        point[1],
-                        point[2],
-                        count_points,
-                        distance=None,
-                        arc_angle=point[2].circ_angle+10 if point[2].circ_angle is not None else None,
-                        )
-                    end_circ_point = smoothed_coords1[-1]
-                    
-                    # Find smooth distance start CIRC point
-                    new_movement = point[2].smooth_endPoint
-                    if new_movement[2].circ_angle is not None:
-                        if new_movement[2].circ_angle < 18:
-                            raise ValueError("Arc in two angle must be greater than 18 degrees.")
-                    circ_coords2, start_smoothing_point, _end_smoothing_point,  = self.generate_arc_3d(
-                        new_movement[2],
-                        new_movement[1],
-                        new_movement[0],
-                        count_points,
-                        distance=new_movement[2].smooth_distance,
-                        arc_angle=new_movement[2].circ_angle
-                        )
-                    
-                    smoothed_coords2, _end_smoothing_point, _start_smoothing_point = self.generate_arc_3d(
-                        new_movement[2],
-                        new_movement[1],
-                        new_movement[0],
-                        count_points,
-                        distance=new_movement[2].smooth_distance,
-                        arc_angle=new_movement[2].circ_angle+10 if new_movement[2].circ_angle is not None else None,
-                        )
-                    start_circ_point = smoothed_coords2[-1]
-
-                    # Find middle spline point
-                    middle_spline_point = self.point_between(end_circ_point, start_circ_point, 50)   
-                    
-                    # find rebuildet end_circ_point and start_circ_point
-                    end_circ_point = self.point_between(end_circ_point, middle_spline_point, 15)
-                    start_circ_point = self.point_between(middle_spline_point, start_circ_point, 85)
-                    
-                    # Add to full trajectory 
-                    full_trajectory_points.extend([cord for cord in circ_coords1])
-                    # Create smoothed trajectory
-                    end_smoothing_point.a = circ_coords1[-1].a; end_smoothing_point.b = circ_coords1[-1].b; end_smoothing_point.c = circ_coords1[-1].c
-                    smoothed_trajectory = Spline(robot_data, "", system=self).add_point(end_smoothing_point, end_circ_point, middle_spline_point, start_circ_point, start_smoothing_point)._create_catmull_rom_spline_points()
-                    full_trajectory_points += smoothed_trajectory
-                    circ_coords2.reverse()
-                    full_trajectory_points.extend([cord for cord in circ_coords2])
-
-        return full_trajectory_points
\ No newline at end of file
+                corners.append((MotionProgram.corner_kind(point), point))
+            if last:
+                return corners
+            point = next_point
+    
+    @classmethod
+    def compile(cls, head:Union[XYZPos, list[XYZPos]], constructor:"TrajectoryConstructor"=None) -> "MotionProgram":
+        """ Program of a LIN end point or CIRC points with `smooth_endPoint` set """
+        corners = [(cls.corner_kind(head), head)] if isinstance(head, list) else []
+        return cls(corners + cls.walk(head), constructor)
+    
+    def capacity(self, start_count:int, count_points:int) -> int:
+        return start_count + len(self.corners) * (2 * count_points + self.BLEND_POINTS)
+    
+    def build(self, robot_data:RobotData, start:Union[XYZPos, list[XYZPos]], count_points:int) -> Trajectory:
+        start = [start] if isinstance(start, XYZPos) else start
+        path = PathBuffer(self.capacity(len(start), count_points))
+        path.append(start)
+        for kind, point in self.corners:
+            self._handlers[kind](robot_data, path, point, count_points)
+        return path.trajectory()
+    
+    def _lin_to_lin(self, robot_data:RobotData, path:PathBuffer, point:XYZPos, count_points:int) -> None:
+        start_smoothing_point = self.constructor.point_on_trajectory(point, path.last(), point.smooth_distance)
+        end_smoothing_point = self.constructor.point_on_trajectory(point, point.smooth_endPoint, point.smooth_distance)
+        # Find middle spline point
+        A = np.array(end_smoothing_point.export_to(list)[:3])
+        C = np.array(point.export_to(list)[:3])
+        B = np.array(start_smoothing_point.export_to(list)[:3])
+        middle_spline_point = XYZPos.from_list(self.constructor.bisector_point(A, B, C, point.smooth_distance, 0.3).tolist())
+        middle_spline_point.a = point.a; middle_spline_point.b = point.b; middle_spline_point.c = point.c
+        # Create smoothed trajectory
+        smoothed_arc_points = Spline(robot_data, "", system=self.constructor).add_point(start_smoothing_point, middle_spline_point, end_smoothing_point)._create_scypy_spline_points()
+        line_1 = self.constructor.generate_line_points(path.last(), start_smoothing_point, count_points)
+        line_2 = self.constructor.generate_line_points(smoothed_arc_points[-1], point.smooth_endPoint, count_points)
+        path.append(line_1)
+        path.append(smoothed_arc_points)
+        if point.smooth_endPoint.smooth_endPoint is None:
+            path.append(line_2)
+    
+    def _lin_to_circ(self, robot_data:RobotData, path:PathBuffer, point:XYZPos, count_points:int) -> None:
+        # Find smooth distance end LIN point
+        end_smoothing_point = self.constructor.point_on_trajectory(point, path.last(), point.smooth_distance)
+        line_trajectory = self.constructor.generate_line_points(path.last(), end_smoothing_point, count_points)
+        # Find smooth distance start CIRC point and create CIRC trajectory
+        circ_coords, _start_smoothing_point, _end_smoothing_point  = self.constructor.generate_arc_3d(
+            point.smooth_endPoint[0],
+            point.smooth_endPoint[1],
+            point.smooth_endPoint[2],
+            count_points,
+            distance=0,
+            arc_angle=point.smooth_endPoint[2].circ_angle
+            )
+
+        circ_coords, start_smoothing_point, _end_smoothing_point  = self.constructor.generate_arc_3d(
+            circ_coords[-1],
+            point.smooth_endPoint[1],
+            point.smooth_endPoint[0],
+            count_points,
+            distance=point.smooth_distance,
+            arc_angle=point.smooth_endPoint[2].circ_angle
+            )
+        circ_coords = circ_coords[::-1]
+
+        # Find middle spline point
+        smoothed_angle_point = self.constructor.point_between(end_smoothing_point, point, 80)
+        A = np.array(end_smoothing_point.export_to(list)[:3])
+        C = np.array(smoothed_angle_point.export_to(list)[:3])
+        B = np.array(start_smoothing_point.export_to(list)[:3])
+        middle_spline_point = XYZPos.from_list(self.constructor.bisector_point(A, B, C, point.smooth_endPoint[2].smooth_distance, 1).tolist())
+
+        # Add LIN trajectory to full trajectory
+        path.append(line_trajectory)
+
+        # Find ABC angles
+        end_smoothing_point.a = point.a; end_smoothing_point.b = point.b; end_smoothing_point.c = point.c
+        if point.smooth_endPoint is not None:
+            a_delta = -(circ_coords[-1].a - point.smooth_endPoint[0].a) / 2
+            b_delta = -(circ_coords[-1].b - point.smooth_endPoint[0].b) / 2
+            c_delta = -(circ_coords[-1].c - point.smooth_endPoint[0].c) / 2
+        start_smoothing_point.a = circ_coords[0].a;\
+            start_smoothing_point.b = circ_coords[0].b; start_smoothing_point.c = circ_coords[0].c
+        middle_spline_point.a = end_smoothing_point.a + (a_delta / 2);\
+            middle_spline_point.b = end_smoothing_point.b + (b_delta / 2); middle_spline_point.c = end_smoothing_point.c + (c_delta / 2)
+        pre_start_smoothing_point = self.constructor.point_between(middle_spline_point, start_smoothing_point, 90)
+        # Create smoothed trajectory
+        smoothed_trajectory = Spline(robot_data, "", system=self.constructor).add_point(end_smoothing_point, middle_spline_point, \
+            pre_start_smoothing_point, start_smoothing_point)._create_catmull_rom_spline_points()
+        # Add smoothed and CIRC trajectory to full trajectory
+        path.append(smoothed_trajectory)
+        path.append(circ_coords)
+    
+    def _circ_to_lin(self, robot_data:RobotData, path:PathBuffer, point:list[XYZPos], count_points:int) -> None:
+        # Find smooth distance start CIRC point
+        if point[2].circ_angle is not None:
+            if point[2].circ_angle < 18:
+                raise ValueError("Arc angle must be greater than 18 degrees.")
+        coords, end_smoothing_point, _start_smoothing_point = self.constructor.generate_arc_3d(
+            point[0],
+            point[1],
+            point[2],
+            count_points,
+            distance=point[2].smooth_distance,
+            arc_angle=point[2].circ_angle
+            )
+        last_circ_point = coords[-1]
+
+        smoothed_coords, _end_smoothing_point, _start_smoothing_point = self.constructor.generate_arc_3d(
+            point[0],
+            point[1],
+            point[2],
+            count_points,
+            distance=None,
+            arc_angle=point[2].circ_angle+5 if point[2].circ_angle is not None else None,
+            )
+
+        # Find smooth distance start LIN point
+        end_circ_point = smoothed_coords[-1]
+        start_smoothing_point = self.constructor.point_on_trajectory(end_circ_point, point[2].smooth_endPoint, point[2].smooth_distance)
+
+        # Find middle spline point
+        A = np.array(coords[-1].export_to(list)[:3])
+        C = np.array(smoothed_coords[-1].export_to(export_type=list)[:3])
+        B = np.array(start_smoothing_point.export_to(list)[:3])
+        middle_spline_point = XYZPos.from_list(self.constructor.bisector_point(A, B, C, point[2].smooth_distance, 0.33).tolist())
+
+        end_smoothing_point.a = last_circ_point.a; end_smoothing_point.b = last_circ_point.b; end_smoothing_point.c = last_circ_point.c
+        if point[2].smooth_endPoint is not None:
+            a_delta = -(last_circ_point.a - point[2].smooth_endPoint.a) / 2
+            b_delta = -(last_circ_point.b - point[2].smooth_endPoint.b) / 2
+            c_delta = -(last_circ_point.c - point[2].smooth_endPoint.c) / 2
+        start_smoothing_point.a = end_smoothing_point.a + a_delta;\
+            start_smoothing_point.b = end_smoothing_point.b + b_delta; start_smoothing_point.c = end_smoothing_point.c + c_delta
+        middle_spline_point.a = end_smoothing_point.a + (a_delta / 2);\
+            middle_spline_point.b = end_smoothing_point.b + (b_delta / 2); middle_spline_point.c = end_smoothing_point.c + (c_delta / 2)
+        # TODO: repair Spline parameters
+        smoothed_trajectory = Spline(robot_data, "", system=self.constructor).add_point(end_smoothing_point, middle_spline_point, start_smoothing_point, start_smoothing_point)._create_catmull_rom_spline_points()
+        path.append(coords)
+        path.append(smoothed_trajectory)
+
+        if point[2].smooth_endPoint.smooth_endPoint is None:
+            path.append(self.constructor.generate_line_points(smoothed_trajectory[-1], point[2].smooth_endPoint, count_points))
+            path.append(point[2].smooth_endPoint)
+    
+    def _circ_to_circ(self, robot_data:RobotData, path:PathBuffer, point:list[XYZPos], count_points:int) -> None:
+        # Find smooth distance end CIRC point
+        if point[2].circ_angle is not None:
+            if point[2].circ_angle < 18:
+                raise ValueError("Arc in one angle must be greater than 18 degrees.")
+        circ_coords1, end_smoothing_point, _start_smoothing_point = self.constructor.generate_arc_3d(
+            point[0],
+            point[1],
+            point[2],
+            count_points,
+            distance=point[2].smooth_distance,
+            arc_angle=point[2].circ_angle
+            )
+
+        smoothed_coords1, _end_smoothing_point, _start_smoothing_point = self.constructor.generate_arc_3d(
+            point[0],
+            point[1],
+            point[2],
+            count_points,
+            distance=None,
+            arc_angle=point[2].circ_angle+10 if point[2].circ_angle is not None else None,
+            )
+        end_circ_point = smoothed_coords1[-1]
+
+        # Find smooth distance start CIRC point
+        new_movement = point[2].smooth_endPoint
+        if new_movement[2].circ_angle is not None:
+            if new_movement[2].circ_angle < 18:
+                raise ValueError("Arc in two angle must be greater than 18 degrees.")
+        circ_coords2, start_smoothing_point, _end_smoothing_point,  = self.constructor.generate_arc_3d(
+            new_movement[2],
+            new_movement[1],
+            new_movement[0],
+            count_points,
+            distance=new_movement[2].smooth_distance,
+            arc_angle=new_movement[2].circ_angle
+            )
+
+        smoothed_coords2, _end_smoothing_point, _start_smoothing_point = self.constructor.generate_arc_3d(
+            new_movement[2],
+            new_movement[1],
+            new_movement[0],
+            count_points,
+            distance=new_movement[2].smooth_distance,
+            arc_angle=new_movement[2].circ_angle+10 if new_movement[2].circ_angle is not None else None,
+            )
+        start_circ_point = smoothed_coords2[-1]
+
+        # Find middle spline point
+        middle_spline_point = self.constructor.point_between(end_circ_point, start_circ_point, 50)   
+
+        # find rebuildet end_circ_point and start_circ_point
+        end_circ_point = self.constructor.point_between(end_circ_point, middle_spline_point, 15)
+        start_circ_point = self.constructor.point_between(middle_spline_point, start_circ_point, 85)
+
+        # Add to full trajectory 
+        path.append(circ_coords1)
+        # Create smoothed trajectory
+        end_smoothing_point.a = circ_coords1[-1].a; end_smoothing_point.b = circ_coords1[-1].b; end_smoothing_point.c = circ_coords1[-1].c
+        smoothed_trajectory = Spline(robot_data, "", system=self.constructor).add_point(end_smoothing_point, end_circ_point, middle_spline_point, start_circ_point, start_smoothing_point)._create_catmull_rom_spline_points()
+        path.append(smoothed_trajectory)
+        circ_coords2 = circ_coords2[::-1]
+        path.append(circ_coords2)
@@ -0,0 +1,208 @@
+"""  Pooled HTTPS transport shared by the role system classes
+
+One Transport is kept per host/port, so Robot, Tools, Bases and the role system
+classes reuse the same keep-alive connections instead of doing a new TCP + TLS
+handshake for every command. Every request is timed and marked with whether it
+had to open a new connection, so the handshake cost is visible in the stats.
+
+With `Config.compression` request bodies from `Config.compression_threshold`
+bytes are sent gzip or zstd compressed (Content-Encoding), a server that rejects
+them with 415 Unsupported Media Type gets the plain body and is not sent compressed
+bodies again. Other errors, e.g. 400 for invalid data, are returned without a resend. Compressed
+responses are decoded by requests/urllib3 (zstd too when `zstandard` is installed).
+Every call records its request size before and after compression, its response size
+and the time spent encoding the body, and is reported to the transport MetricsRegistry.
+
+"""
+
+from dataclasses import dataclass
+from typing import Union
+import threading
+import json
+import gzip
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from utils.config import Config
+from utils.metrics import MetricsRegistry
+
+@dataclass
+class RequestTiming:
+    endpoint: str
+    elapsed: float
+    new_connection: bool
+    status_code: int
+    request_size: int = 0
+    raw_request_size: int = 0
+    response_size: int = 0
+    encoding: Union[str, None] = None
+    encode_time: float = 0
+
+    @property
+    def ratio(self) -> float:
+        """ Request size before / after compression """
+        return self.raw_request_size / self.request_size if self.request_size else 1.0
+
+@dataclass
+class TransportStats:
+    requests: int = 0
+    connections: int = 0
+    total_time: float = 0
+    connection_time: float = 0
+    bytes_sent: int = 0
+    bytes_raw: int = 0
+    bytes_received: int = 0
+    last: Union[RequestTiming, None] = None
+
+    def add(self, timing:RequestTiming) -> None:
+        self.requests += 1
+        self.total_time += timing.elapsed
+        self.bytes_sent += timing.request_size
+        self.bytes_raw += timing.raw_request_size
+        self.bytes_received += timing.response_size
+        if timing.new_connection:
+            self.connections += 1
+            self.connection_time += timing.elapsed
+        self.last = timing
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / self.requests if self.requests else 0
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.bytes_raw / self.bytes_sent if self.bytes_sent else 1.0
+
+class Transport:
+    _transports:dict = {}
+    _lock = threading.Lock()
+
+    def __init__(self, host:str, port:int, pool_size:int=None, keep_alive:bool=None) -> None:
+        self.config = Config()
+        self.host = host
+        self.port = port
+        self.base_url = f"{self.config.scheme}://{host}:{port}"
+        self.pool_size = self.config.pool_size if pool_size is None else pool_size
+        self.keep_alive = self.config.keep_alive if keep_alive is None else keep_alive
+        self.stats = TransportStats()
+        self.metrics = MetricsRegistry({"server": f"{host}:{port}"})
+        self.unsupported:set[tuple[str, str]] = set()
+        self.compression_supported = True
+        self._stats_lock = threading.Lock()
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount(self.base_url, self._adapter)
+        if not self.keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    @classmethod
+    def get(cls, host:str, port:int) -> "Transport":
+        """ Return the shared transport for host/port, creating it on first use """
+        with cls._lock:
+            transport = cls._transports.get((host, port))
+            if transport is None:
+                transport = cls(host, port)
+                cls._transports[(host, port)] = transport
+            return transport
+
+    @classmethod
+    def close_all(cls) -> None:
+        with cls._lock:
+            for transport in cls._transports.values():
+                transport.close()
+            cls._transports.clear()
+
+    def supports(self, endpoint:str, content_type:str="application/json") -> bool:
+        """ False after the server rejected `endpoint` (or its `content_type` body) """
+        return (endpoint, content_type) not in self.unsupported
+
+    def mark_unsupported(self, endpoint:str, content_type:str="application/json") -> None:
+        self.unsupported.add((endpoint, content_type))
+
+    @staticmethod
+    def route_missing(response:requests.Response) -> bool:
+        """ True when the server has no such endpoint: 405, or a 404 that is not an API answer \n
+        Resource errors (e.g. an unknown robot) carry the {"status", "info"} JSON and don't count.
+        """
+        if response.status_code == 405:
+            return True
+        if response.status_code != 404:
+            return False
+        try:
+            answer = response.json()
+        except ValueError:
+            return True
+        return not (isinstance(answer, dict) and "status" in answer)
+
+    def _opened_connections(self) -> int:
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def _prepare(self, kwargs:dict) -> tuple[dict, Union[bytes, None], Union[str, None]]:
+        """ Request kwargs with the serialized (and compressed) body, the plain body and the used encoding """
+        if "files" in kwargs or not isinstance(kwargs.get("data", b""), (bytes, str)):
+            return kwargs, None, None
+        headers = dict(kwargs.pop("headers", None) or {})
+        if "json" in kwargs:
+            # Как в requests, но время кодирования JSON попадает в метрики
+            body = json.dumps(kwargs.pop("json"), allow_nan=False).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        else:
+            body = kwargs.pop("data", None) or b""
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+        kwargs["headers"] = headers
+        kwargs["data"] = body
+        if self.config.compression == "none" or not self.compression_supported or len(body) < self.config.compression_threshold:
+            return kwargs, body, None
+        if self.config.compression == "zstd" and zstandard is not None:
+            encoding = "zstd"
+            kwargs["data"] = zstandard.ZstdCompressor().compress(body)
+        else:
+            encoding = "gzip"
+            kwargs["data"] = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = encoding
+        return kwargs, body, encoding
+
+    def post(self, endpoint:str, **kwargs) -> requests.Response:
+        """ Send POST request to `endpoint` (e.g. "/api/get-robots") through the pooled session """
+        url = self.base_url + endpoint
+        start = time.perf_counter()
+        kwargs, body, encoding = self._prepare(kwargs)
+        encode_time = time.perf_counter() - start
+        opened_before = self._opened_connections()
+        start = time.perf_counter()
+        response = self.session.post(url, verify=self.config.verify, **kwargs)
+        if encoding is not None and response.status_code == 415:
+            # Сервер не принимает сжатые запросы, повтор без сжатия. 400 - ошибка данных, не повторяется
+            headers = {key: value for key, value in kwargs["headers"].items() if key != "Content-Encoding"}
+            response = self.session.post(url, verify=self.config.verify, **dict(kwargs, data=body, headers=headers))
+            if response.status_code != 415:
+                self.compression_supported = False
+            encoding = None
+        elapsed = time.perf_counter() - start
+        request_size = len(response.request.body or b"")
+        timing = RequestTiming(
+            endpoint=endpoint,
+            elapsed=elapsed,
+            new_connection=self._opened_connections() > opened_before,
+            status_code=response.status_code,
+            request_size=request_size,
+            raw_request_size=len(body) if body is not None else request_size,
+            response_size=int(response.headers.get("Content-Length", len(response.content))),
+            encoding=encoding,
+            encode_time=encode_time
+            )
+        with self._stats_lock:
+            self.stats.add(timing)
+        self.metrics.observe_request(timing)
+        return response
+
+    def close(self) -> None:
+        self.session.close()
@@ -1,8 +1,9 @@
-from typing import Callable, TYPE_CHECKING, Union
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, TYPE_CHECKING, Union
 import os
 import sys
 import inspect
-from threading import Thread, currentThread
+from threading import BoundedSemaphore, Event, Thread, current_thread
 import time
 
 import requests
@@ -10,32 +11,95 @@ import requests
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir) 
-from data_types import RobotData
+from data_types import RobotData, Trajectory
 
 if TYPE_CHECKING:
     import __super_admin as super_admin
     import __admin as admin
     import __user as user
 
+class TriggerHistory:
+    """ Last seen position id of a robot and the order of the send markers of its trajectory \n
+    `crossed` returns the ids to fire for a new answer of the server: nothing while the id stays
+    the same, otherwise the new id and, when the order is known, the markers the robot passed
+    between two answers (in trajectory order). A marker before the last passed one starts a new run.
+    """
+    
+    def __init__(self, order:Union[list[str], dict, Trajectory, None]=None) -> None:
+        self.last = None
+        self.seen = False
+        self.set_order(order)
+    
+    def set_order(self, order:Union[list[str], dict, Trajectory, None]) -> None:
+        """ Markers as a list, a Trajectory or the {trigger_id: length} dict passed to lin/circ """
+        if isinstance(order, Trajectory):
+            order = order.markers()
+        elif isinstance(order, dict):
+            order = sorted(order, key=order.get)
+        self.order:list[str] = [str(marker) for marker in order or []]
+        self._indices = {marker: index for index, marker in enumerate(self.order)}
+        self.index = -1
+    
+    def crossed(self, position_id:Any) -> list[Any]:
+        if self.seen and position_id == self.last:
+            return []
+        first, self.seen, self.last = not self.seen, True, position_id
+        index = self._indices.get(str(position_id))
+        if index is None:
+            return [position_id]
+        # Первый ответ - текущее состояние робота, пропущенные до запуска метки не догоняются
+        start = index if first else (self.index + 1 if index > self.index else 0)
+        self.index = index
+        return self.order[start:index + 1]
+
 def triggers_handle(system:Union["super_admin.system", "admin.system", "user.system"],
-    robot_data:RobotData, triggers:dict, refresh_timer:float) -> None:
-        url_pos_id = f"https://{system._host}:{str(system._port)}/get-position-id"
-        data_pos_id = {
-            "robot": robot_data.name,
-            "token": system._token
-        }
-        t = currentThread()
-        while getattr(t, "running", True):
-            response = requests.post(url_pos_id, verify=True, json=data_pos_id).json()["data"]
-            for key, func in triggers.items():
-                if str(response) == key:
+    robot_data:RobotData, triggers:dict, refresh_timer:float, history:TriggerHistory=None, stop:Event=None) -> None:
+        stop = Event() if stop is None else stop
+        # "auto": сервер держит запрос пока id не изменится (long-poll), без него опрос раз в refresh_timer
+        long_poll = system.config.trigger_mode == "auto"
+        last = None
+        while not stop.is_set():
+            try:
+                if long_poll:
+                    long_poll, response = system.wait_position_id(robot_data, last)
+                    if long_poll and response == last:
+                        continue
+                if not long_poll:
+                    response = system.get_position_id(robot_data, timeout=system.config.trigger_request_timeout)["data"]
+            except requests.exceptions.RequestException:
+                # Нет связи с сервером - повтор через refresh_timer, остановка не ждёт
+                stop.wait(refresh_timer)
+                continue
+            if stop.is_set():
+                break
+            last = response
+            # Без history - как раньше: при опросе триггер вызывается каждый раз, пока id равен ключу
+            for position_id in (history.crossed(response) if history is not None else [response]):
+                func = triggers.get(str(position_id))
+                if func is not None:
                     func()
-            time.sleep(refresh_timer)
+            if not long_poll:
+                stop.wait(refresh_timer)
+
+def _stop_timeout(system:Union["super_admin.system", "admin.system", "user.system"]) -> float:
+    # Самый долгий запрос потока: удержание long-poll сервером + ожидание ответа
+    return system.config.trigger_wait_timeout + system.config.trigger_request_timeout
+
+def _join(thread:Thread, timeout:Union[float, None]) -> bool:
+    # end_handling может вызываться из самого триггера
+    if thread is not current_thread():
+        thread.join(timeout)
+    return not thread.is_alive()
 
 class TriggerHandler:
+    """ Calls trigger functions when the position id of the robot equals their key \n
+    With `edge=True` every trigger fires once per crossing and, after `set_order`, markers passed
+    between two answers of the server are fired too, in trajectory order.
+    The thread is a daemon, `end_handling` stops it and waits for it (can be used as `with TriggerHandler(...):`).
+    """
     system:Union["super_admin.system", "admin.system", "user.system"]
     
-    def __init__(self, robot_data:RobotData, system: Union["super_admin.system", "admin.system", "user.system"], refresh_timer:float=1, **kwargs) -> None:
+    def __init__(self, robot_data:RobotData, system: Union["super_admin.system", "admin.system", "user.system"], refresh_timer:float=1, edge:bool=False, **kwargs) -> None:
         self.system = system
         self.triggers = {}
         self.robot_data = robot_data
@@ -43,7 +107,9 @@ class TriggerHandler:
             if getattr(func, "__call__") is not None and isinstance(key, str):
                 self.triggers[key] = func
         self.thread = None
+        self._stop = Event()
         self.refresh_timer = refresh_timer
+        self.history = TriggerHistory() if edge else None
     
     def add_trigger(self, trigger_key:str, func:Callable) -> None:
         if getattr(func, "__call__") is not None and isinstance(trigger_key, str):
@@ -52,14 +118,176 @@ class TriggerHandler:
     def remove_trigger(self, trigger_key:str) -> None:
         if trigger_key in list(self.triggers.keys()):
             del self.triggers[trigger_key]
+    
+    def set_order(self, order:Union[list[str], dict, Trajectory]) -> None:
+        """ Order of the send markers of the next motion (edge mode) """
+        if self.history is not None:
+            self.history.set_order(order)
             
     def start_handling(self) -> None:
         if self.thread is None:
-            handler = Thread(target=triggers_handle, kwargs={"system": self.system, "robot_data": self.robot_data, "triggers": self.triggers, "refresh_timer": self.refresh_timer})
+            self._stop = Event()
+            handler = Thread(target=triggers_handle, kwargs={"system": self.system, "robot_data": self.robot_data, "triggers": self.triggers,
+                                                             "refresh_timer": self.refresh_timer, "history": self.history, "stop": self._stop}, daemon=True)
             handler.start()
             self.thread = handler
     
-    def end_handling(self):
-        if self.thread is not None:
-            self.thread.running = False
-            self.thread = None
\ No newline at end of file
+    def end_handling(self, timeout:float=None) -> bool:
+        """ Stop the thread and wait up to `timeout` seconds for it (None - until it ends) \n
+        The server holds a long-poll request at most Config.trigger_wait_timeout, the thread
+        checks the stop event after it. Returns True when the thread has ended.
+        """
+        if self.thread is None:
+            return True
+        self._stop.set()
+        thread, self.thread = self.thread, None
+        return _join(thread, timeout)
+    
+    def __enter__(self) -> "TriggerHandler":
+        self.start_handling()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.end_handling(_stop_timeout(self.system))
+
+class TriggerDispatcher:
+    """ Triggers of many robots on one thread \n
+    The position ids of all watched robots are read with one /api/wait-position-ids long-poll
+    (or one request per robot every `refresh_timer` on servers without it). Callbacks run on a
+    pool of `workers` threads, at most `max_pending` callbacks may wait there, after that the
+    dispatcher waits for a free place. Triggers fire once per crossing (TriggerHistory), markers
+    passed between two answers are fired in the order given with `set_order`.
+    The delay from the id change to the callback start and the callback time are recorded in
+    `system.metrics` as the "trigger_latency" and "trigger_callback" stages.
+    The threads are daemons, `end_handling` stops them and waits for them (also `with TriggerDispatcher(...):`).
+    """
+    system:Union["super_admin.system", "admin.system", "user.system"]
+    
+    def __init__(self, system: Union["super_admin.system", "admin.system", "user.system"], refresh_timer:float=1,
+                 workers:int=4, max_pending:int=64) -> None:
+        self.system = system
+        self.refresh_timer = refresh_timer
+        self.workers = workers
+        self.robots:dict[str, RobotData] = {}
+        self.triggers:dict[str, dict[str, Callable]] = {}
+        self.histories:dict[str, TriggerHistory] = {}
+        self.thread = None
+        self._executor = None
+        self._stop = Event()
+        self._running:set[Future] = set()
+        self._pending = BoundedSemaphore(max_pending)
+    
+    def watch(self, robot_data:RobotData, **kwargs) -> None:
+        self.robots[robot_data.name] = robot_data
+        self.histories.setdefault(robot_data.name, TriggerHistory())
+        triggers = self.triggers.setdefault(robot_data.name, {})
+        for key, func in kwargs.items():
+            if getattr(func, "__call__") is not None and isinstance(key, str):
+                triggers[key] = func
+    
+    def unwatch(self, robot_data:RobotData) -> None:
+        self.robots.pop(robot_data.name, None)
+        self.triggers.pop(robot_data.name, None)
+        self.histories.pop(robot_data.name, None)
+    
+    def add_trigger(self, robot_data:RobotData, trigger_key:str, func:Callable) -> None:
+        self.watch(robot_data, **{trigger_key: func})
+    
+    def remove_trigger(self, robot_data:RobotData, trigger_key:str) -> None:
+        self.triggers.get(robot_data.name, {}).pop(trigger_key, None)
+    
+    def set_order(self, robot_data:RobotData, order:Union[list[str], dict, Trajectory]) -> None:
+        self.watch(robot_data)
+        self.histories[robot_data.name].set_order(order)
+    
+    def start_handling(self) -> None:
+        if self.thread is None:
+            self._stop = Event()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="trigger")
+            self.thread = Thread(target=self._run, args=(self._executor, self._stop), daemon=True)
+            self.thread.start()
+    
+    def end_handling(self, timeout:float=None) -> bool:
+        """ Stop the dispatcher, wait up to `timeout` seconds for it, then for the running callbacks \n
+        Callbacks that have not started yet are cancelled. Returns True when all threads have ended.
+        """
+        if self.thread is None:
+            return True
+        self._stop.set()
+        thread, self.thread = self.thread, None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stopped = _join(thread, timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        _done, running = wait(list(self._running), None if deadline is None else max(deadline - time.monotonic(), 0))
+        return stopped and not running
+    
+    def __enter__(self) -> "TriggerDispatcher":
+        self.start_handling()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.end_handling(_stop_timeout(self.system))
+    
+    def _run(self, executor:ThreadPoolExecutor, stop:Event) -> None:
+        batch = True
+        request_timeout = self.system.config.trigger_request_timeout
+        while not stop.is_set():
+            robots = dict(self.robots)
+            if not robots:
+                stop.wait(self.refresh_timer)
+                continue
+            timeout = self.system.config.trigger_wait_timeout if self.system.config.trigger_mode == "auto" else 0
+            polled = not batch
+            try:
+                if batch:
+                    try:
+                        batch, changed = self.system.wait_position_ids({name: history.last for name, history in dict(self.histories).items() if name in robots}, timeout)
+                        polled = not batch
+                    except requests.exceptions.HTTPError:
+                        # Ошибка из-за одного робота (например неизвестное имя) - этот круг опрос по одному
+                        polled = True
+                if polled:
+                    changed = {}
+                    for name, robot_data in robots.items():
+                        answer = self.system.get_position_id(robot_data, timeout=request_timeout)
+                        if answer.get("status", True):
+                            changed[name] = answer["data"]
+            except requests.exceptions.RequestException:
+                stop.wait(self.refresh_timer)
+                continue
+            received = time.perf_counter()
+            for name, position_id in changed.items():
+                history = self.histories.get(name)
+                if history is not None:
+                    for crossed_id in history.crossed(position_id):
+                        self._dispatch(executor, stop, name, crossed_id, received)
+            if polled or timeout == 0:
+                stop.wait(self.refresh_timer)
+    
+    def _dispatch(self, executor:ThreadPoolExecutor, stop:Event, robot:str, position_id:Any, received:float) -> None:
+        func = self.triggers.get(robot, {}).get(str(position_id))
+        if func is None:
+            return
+        # Ограниченная очередь: при max_pending ожидающих вызовах опрос ждёт освобождения
+        while not self._pending.acquire(timeout=0.1):
+            if stop.is_set():
+                return
+        try:
+            future = executor.submit(self._call, func, received)
+        except RuntimeError:
+            self._pending.release()
+            return
+        self._running.add(future)
+        future.add_done_callback(self._done)
+    
+    def _done(self, future:Future) -> None:
+        self._running.discard(future)
+        self._pending.release()
+    
+    def _call(self, func:Callable, received:float) -> None:
+        start = time.perf_counter()
+        self.system.metrics.observe_stage("trigger_latency", start - received)
+        try:
+            func()
+        finally:
+            self.system.metrics.observe_stage("trigger_callback", time.perf_counter() - start)
@@ -13,25 +13,33 @@ import numpy as np
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir) 
-from data_types import XYZPos
+from data_types import XYZPos, Trajectory
 
 @dataclass
 class Vizualization():
-    trajectory: Union[list[XYZPos], XYZPos] = field(default_factory=list)
+    trajectory: Union[list[XYZPos], XYZPos, Trajectory] = field(default_factory=list)
     angle_line_factor: float = 0.05  # Фактор, определяющий длину линии относительно диапазона
 
-    def add_trajectory(self, trajectory: Union[list[XYZPos], XYZPos]):
+    def add_trajectory(self, trajectory: Union[list[XYZPos], XYZPos, Trajectory]):
         if isinstance(trajectory, XYZPos):
-            self.trajectory.append(trajectory)
+            trajectory = [trajectory]
+        if isinstance(self.trajectory, Trajectory) or isinstance(trajectory, Trajectory):
+            self.trajectory = Trajectory.from_points(self.trajectory) + trajectory
         else:
             self.trajectory.extend(trajectory)
 
+    def _coordinates(self) -> np.ndarray:
+        """ (N, 3) array of XYZ coordinates of the trajectory """
+        if isinstance(self.trajectory, Trajectory):
+            return self.trajectory.positions[:, 0:3]
+        return np.array([[point.x, point.y, point.z] for point in self.trajectory], dtype=np.float64).reshape(-1, 3)
+
     def _calculate_adaptive_line_length(self):
         """Вычисляет адаптивную длину линии на основе диапазона координат."""
         if not self.trajectory:
             return 1.0  # Значение по умолчанию, если траектория пуста
 
-        all_coords = np.array([[point.x, point.y, point.z] for point in self.trajectory])
+        all_coords = self._coordinates()
         min_vals = np.min(all_coords, axis=0)
         max_vals = np.max(all_coords, axis=0)
         ranges = max_vals - min_vals
@@ -51,9 +59,8 @@ class Vizualization():
         fig = plt.figure()
         ax = fig.add_subplot(111, projection='3d')
 
-        x_vals = [point.x for point in self.trajectory]
-        y_vals = [point.y for point in self.trajectory]
-        z_vals = [point.z for point in self.trajectory]
+        coordinates = self._coordinates()
+        x_vals, y_vals, z_vals = coordinates[:, 0], coordinates[:, 1], coordinates[:, 2]
 
         ax.plot(x_vals, y_vals, z_vals, marker='o', label='Trajectory')
 
@@ -98,9 +105,8 @@ class Vizualization():
             print("No trajectory data to plot.")
             return None
 
-        x_vals = [point.x for point in self.trajectory]
-        y_vals = [point.y for point in self.trajectory]
-        z_vals = [point.z for point in self.trajectory]
+        coordinates = self._coordinates()
+        x_vals, y_vals, z_vals = coordinates[:, 0], coordinates[:, 1], coordinates[:, 2]
 
         scatter_trace = go.Scatter3d(
             x=x_vals,
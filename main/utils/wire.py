@@ -0,0 +1,101 @@
+"""  Compact binary wire format for trajectory payloads
+
+Long trajectories as JSON are lists of dicts ({"J1": .., "send": ""} per point),
+that is megabytes of text for 20k points. The binary format sends the request
+fields as a small JSON header and every point list as one packed float array
+with the send markers in a sparse sidecar dict {index: marker}:
+
+    b"URLB" | version:u8 | header length:u32 | header (JSON) | array 1 | array 2 ...
+
+    header = {"fields": {...}, "dtype": "<f8",
+              "arrays": [{"name": "angles_data", "columns": ["J1", ...], "rows": N, "send": {"3": "hello"}}]}
+
+Arrays are little endian float64 (or float32) in row order. Servers that know the
+format accept CONTENT_TYPE and may answer with it when it is listed in Accept,
+other servers answer 415 Unsupported Media Type and the client falls back to JSON
+(remembered per endpoint of the host's transport). Any other error, e.g. 400 for
+invalid data, is returned to the caller and not resent as JSON.
+
+"""
+
+from dataclasses import dataclass, field
+from typing import Union
+import json
+import struct
+
+import numpy as np
+import requests
+
+from data_types import AnglePos, Trajectory
+
+CONTENT_TYPE = "application/x-urlanguage-trajectory"
+MAGIC = b"URLB"
+VERSION = 1
+DTYPES = {"float64": "<f8", "float32": "<f4"}
+_HEADER = struct.Struct("<4sBI")
+
+@dataclass
+class WireArray:
+    name: str
+    values: np.ndarray
+    columns: tuple
+    send: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_angles(cls, name:str, angles:list[AnglePos]) -> "WireArray":
+        columns = tuple(key for key in angles[0].angles if key != "send") if angles else ()
+        values = np.array([angle.joints() for angle in angles], dtype=np.float64).reshape(len(angles), len(columns))
+        send = {index: angle["send"] for index, angle in enumerate(angles) if angle["send"]}
+        return cls(name, values, columns, send)
+
+    @classmethod
+    def from_trajectory(cls, name:str, trajectory:Trajectory) -> "WireArray":
+        # Trajectory rows are x, y, z, a, b, c as the server expects them
+        return cls(name, trajectory.positions, ("x", "y", "z", "a", "b", "c"), dict(trajectory.send))
+
+    def to_dicts(self) -> list[dict]:
+        """ Same list of dicts as the JSON format """
+        rows = [dict(zip(self.columns, row)) for row in self.values.tolist()]
+        for index, marker in self.send.items():
+            rows[index]["send"] = marker
+        return rows
+
+def encode(fields:dict, arrays:list[WireArray], dtype:str="float64") -> bytes:
+    wire_dtype = np.dtype(DTYPES[dtype])
+    header = {
+        "fields": fields,
+        "dtype": wire_dtype.str,
+        "arrays": [{"name": array.name, "columns": list(array.columns), "rows": len(array.values),
+                    "send": {str(index): marker for index, marker in array.send.items()}} for array in arrays]
+        }
+    header_data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    chunks = [_HEADER.pack(MAGIC, VERSION, len(header_data)), header_data]
+    for array in arrays:
+        chunks.append(np.ascontiguousarray(array.values, dtype=wire_dtype).tobytes())
+    return b"".join(chunks)
+
+def decode(body:bytes) -> tuple[dict, list[WireArray]]:
+    magic, version, header_length = _HEADER.unpack_from(body)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Unsupported binary trajectory payload")
+    offset = _HEADER.size
+    header = json.loads(body[offset:offset + header_length])
+    offset += header_length
+    wire_dtype = np.dtype(header["dtype"])
+    arrays = []
+    for meta in header["arrays"]:
+        count = meta["rows"] * len(meta["columns"])
+        values = np.frombuffer(body, dtype=wire_dtype, count=count, offset=offset).reshape(meta["rows"], len(meta["columns"]))
+        offset += count * wire_dtype.itemsize
+        send = {int(index): marker for index, marker in meta["send"].items()}
+        arrays.append(WireArray(meta["name"], values.astype(np.float64), tuple(meta["columns"]), send))
+    return header["fields"], arrays
+
+def read_response(response:requests.Response) -> Union[dict, list, None]:
+    """ Response body as `response.json()` would return it for both formats """
+    if response.headers.get("Content-Type", "").startswith(CONTENT_TYPE):
+        fields, arrays = decode(response.content)
+        for array in arrays:
+            fields[array.name] = array.to_dicts()
+        return fields
+    return response.json()
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main"))
+
+import auth
+from data_types import RobotData
+from utils.config import Config, config_data
+from utils.kinematics import KinematicsCache
+from utils.mock_server import MockURSystem
+from utils.transport import Transport
+
+@pytest.fixture
+def config():
+    """ Shared Config, every test gets the defaults back afterwards """
+    saved = dict(config_data)
+    config = Config()
+    config.scheme = "http"
+    yield config
+    config_data.clear()
+    config_data.update(saved)
+
+@pytest.fixture
+def server(config, request):
+    """ MockURSystem on a free port, options come from indirect parametrization """
+    options = dict(getattr(request, "param", {}))
+    with MockURSystem(port=0, step_time=options.pop("step_time", 0), **options) as server:
+        yield server
+    # Транспорт и кэш общие на host/port, следующий сервер может получить тот же порт
+    Transport.close_all()
+    KinematicsCache._caches.clear()
+
+@pytest.fixture
+def system(server):
+    return auth.Auth("127.0.0.1", server.port, server.server_token).super_admin("SuperAdmin", "12345").system("127.0.0.1", server.port)
+
+@pytest.fixture
+def robot(system, server):
+    robot = RobotData("First", "654123")
+    system.add_robot(robot, "robot-password", 6)
+    server.requests.clear()
+    return robot
@@ -0,0 +1,19 @@
+import asyncio
+
+from __async_system import AsyncSystem
+from data_types import RobotData, XYZPos
+
+def test_concurrent_motions_keep_the_last_point_per_robot(config, system, server, robot):
+    second = RobotData("Second", "123456")
+    system.add_robot(second, "robot-password", 6)
+    config.trajectory_send = False
+
+    async def move():
+        async with AsyncSystem(system, max_workers=4) as async_system:
+            await asyncio.gather(*(async_system.lin(robot_data, XYZPos().from_list([300, y, 150, 0, 0, 0]), "world", 10,
+                                                   start=XYZPos().from_list([300, 0, 150, 0, 0, 0]))
+                                   for _ in range(20) for robot_data, y in ((robot, 100), (second, -100))))
+
+    asyncio.run(move())
+    assert system.last_point(robot).y == 100
+    assert system.last_point(second).y == -100
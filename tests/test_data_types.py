@@ -0,0 +1,33 @@
+import pytest
+
+from data_types import AnglePos, Trajectory, XYZPos
+from utils.trajectory_creator import TrajectoryConstructor
+
+def test_angles_view_writes_through():
+    position = AnglePos().from_list([1, 2, 3])
+    position.angles["J1"] = 10
+    position.angles["J4"] = 4
+    del position.angles["send"]
+    assert position.joints() == [10, 2, 3, 4]
+    assert position.angles == {"J1": 10, "J2": 2, "J3": 3, "J4": 4}
+    assert str(position) == "{'J1': 10, 'J2': 2, 'J3': 3, 'J4': 4}"
+
+def test_export_and_import_copy():
+    data = {"send": "", "J1": 1, "J2": 2}
+    position = AnglePos().from_dict(data, rewrite=True)
+    data["J1"] = 5
+    exported = position.export_to(dict)
+    exported["J2"] = 7
+    assert position.joints() == [1, 2]
+
+def test_point_at_interpolates_and_extends_the_end_segments():
+    index = Trajectory.from_points([XYZPos.from_list([0, 0, 0]), XYZPos.from_list([10, 0, 0]),
+                                    XYZPos.from_list([10, 10, 0])]).arc_length_index()
+    assert [index.point_at(distance).export_to(list)[:3] for distance in (-2, 5, 15, 22)] == \
+        [[-2, 0, 0], [5, 0, 0], [10, 5, 0], [10, 12, 0]]
+
+def test_point_on_trajectory_uses_the_index():
+    start, end = XYZPos.from_list([0, 0, 0, 0, 0, 0]), XYZPos.from_list([30, 0, 40, 0, 0, 0])
+    point = TrajectoryConstructor().point_on_trajectory(start, end, 10)
+    assert (point.x, point.y, point.z) == pytest.approx((6, 0, 8))
+    assert TrajectoryConstructor().point_on_trajectory(start, start, 10) is start
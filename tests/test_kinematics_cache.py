@@ -0,0 +1,45 @@
+import sys
+import threading
+
+import numpy as np
+
+from utils.kinematics import KinematicsCache, LocalKinematics
+
+def test_set_tool_changes_keys_and_drops_robot_entries():
+    cache = KinematicsCache(size=16)
+    cache.put(cache.key("First", "world", [1, 2, 3]), {"J1": 1})
+    cache.put(cache.key("Second", "world", [1, 2, 3]), {"J1": 2})
+    cache.set_tool("First", "grip")
+    assert cache.key("First", "world", [1, 2, 3])[2] == "grip"
+    assert len(cache) == 1
+
+def test_frames_change_while_resolving():
+    cache = KinematicsCache(size=64)
+    errors = []
+
+    def resolve():
+        try:
+            for index in range(300):
+                cache.resolve("First", "world", [[index % 50, 0, 0]], lambda indices: [{"J1": 0}] * len(indices))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=resolve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for index in range(300):
+        cache.set_tool(f"Robot{index}", "grip")
+        cache.set_base("First", f"base{index % 3}")
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+def test_local_kinematics_leaves_sys_path(tmp_path):
+    (tmp_path / "helpers.py").write_text("SCALE = 2\n")
+    (tmp_path / "kinematics.py").write_text("from helpers import SCALE\n"
+                                            "def inverse(positions):\n    return positions * SCALE\n"
+                                            "def forward(angles):\n    return angles / SCALE\n")
+    before = list(sys.path)
+    kinematics = LocalKinematics(str(tmp_path))
+    assert sys.path == before
+    assert kinematics.forward(np.ones((1, 6))).tolist() == [[0.5] * 6]
@@ -0,0 +1,11 @@
+import logging
+
+def test_failing_hook_does_not_fail_the_request(system, server, robot, caplog):
+    def hook(event, data):
+        raise ValueError("broken hook")
+
+    system.metrics.add_hook(hook)
+    with caplog.at_level(logging.ERROR, logger="utils.metrics"):
+        assert system.get_position_id(robot)["status"]
+    assert "broken hook" in caplog.text
+    assert system.metrics.endpoints["/api/get-position-id"].codes == {200: 1}
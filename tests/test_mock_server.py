@@ -0,0 +1,14 @@
+import json
+
+from data_types import XYZPos
+
+def test_move_xyz_queues_the_position(system, server, robot):
+    result = system.move_xyz(robot, XYZPos().from_list([300, 0, 200, 0, 0, 0]), "world")
+    assert result.code == 200
+    assert len(server.robots["First"].queue) == 1
+
+def test_unexpected_route_error_is_a_500_answer(system, server, robot):
+    # set-position без поля "angles"
+    response = system.transport.post("/api/set-position", json={"robot": "First", "code": "654123", "token": system._token})
+    assert response.status_code == 500
+    assert json.loads(response.content)["status"] is False
@@ -0,0 +1,28 @@
+from data_types import AnglePos, RobotData, XYZPos
+
+def test_lin_sends_each_request_once(system, server, robot, capsys):
+    system.lin(robot, XYZPos().from_list([300, 100, 150, 0, 0, 0]), "world", 50,
+               start=XYZPos().from_list([300, -100, 150, 0, 0, 0]), triggers={"hello": 100})
+    assert server.requests == {"/api/get-position": 1, "/api/cartesian-to-angles": 1, "/api/set-motion": 1}
+    assert capsys.readouterr().out == ""
+
+def test_delete_program_sends_one_request(system, server, robot, capsys):
+    assert system.delete_program(robot)["status"]
+    assert server.requests == {"/api/delete-program": 1}
+    assert capsys.readouterr().out == ""
+
+def test_unknown_robot_does_not_turn_off_set_motion(system, server, robot):
+    angles = AnglePos().from_list([0, 0, 0, 0, 0, 0])
+    (_position, code), _speed = system.submit_motion(RobotData("Unknown", "0"), angles, angles)
+    assert code == 422
+    assert system.transport.supports("/api/set-motion")
+    server.requests.clear()
+    system.submit_motion(robot, angles, angles)
+    assert server.requests == {"/api/set-motion": 1}
+
+def test_missing_set_motion_falls_back_to_two_requests(system, server, robot):
+    del server._routes["/api/set-motion"]
+    angles = AnglePos().from_list([0, 0, 0, 0, 0, 0])
+    system.submit_motion(robot, angles, angles)
+    assert not system.transport.supports("/api/set-motion")
+    assert server.requests == {"/api/set-motion": 1, "/api/set-position": 1, "/api/set-speed": 1}
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from data_types import Trajectory, XYZPos
+from utils.mock_server import MockKinematics
+from utils.trajectory_creator import TrajectoryConstructor
+
+# Точки не выполняются, очередь и скорости робота остаются как загружены
+HOLD = [{"step_time": 1000}]
+
+def lin(system, robot):
+    return system.lin(robot, XYZPos().from_list([300, 200, 150, 0, 0, 0]), "world", 200,
+                      start=XYZPos().from_list([300, -200, 150, 0, 0, 0]))
+
+def uploaded(server):
+    robot = server.robots["First"]
+    return np.array([angles for angles, _send in robot.queue]), np.array(list(robot.speeds))
+
+def segment_steps(joints, speeds):
+    moves = np.abs(np.diff(np.vstack([np.zeros(joints.shape[1]), joints]), axis=0))
+    return (moves.max(axis=1) / speeds[np.arange(len(speeds)), moves.argmax(axis=1)])
+
+@pytest.mark.parametrize("server", HOLD, indirect=True)
+def test_decimation_keeps_the_timing(config, system, server, robot):
+    lin(system, robot)
+    full_joints, full_speeds = uploaded(server)
+    server.robots["First"].queue.clear()
+    server.robots["First"].speeds.clear()
+    config.simplify_chord_error = 0.1
+    lin(system, robot)
+    joints, speeds = uploaded(server)
+    assert len(joints) < len(full_joints)
+    assert segment_steps(joints, speeds).sum() == pytest.approx(segment_steps(full_joints, full_speeds).sum())
+    np.testing.assert_allclose(speeds[-1], full_speeds[-1], rtol=0.05)
+
+@pytest.mark.parametrize("server", HOLD, indirect=True)
+def test_decimated_joint_path_stays_near_the_line(config, system, server, robot):
+    config.simplify_chord_error = 0.1
+    config.simplify_joint_error = 0.01
+    lin(system, robot)
+    joints, _speeds = uploaded(server)
+    # Робот интерполирует углы суставов между загруженными точками
+    fraction = np.linspace(0, 1, 100)[:, np.newaxis]
+    path = np.vstack([MockKinematics().forward(start + (end - start) * fraction) for start, end in zip(joints[:-1], joints[1:])])
+    line = np.column_stack([np.full(200, 300.0), np.linspace(-200, 200, 200), np.full(200, 150.0)])
+    deviation = max(np.linalg.norm(path[:, :3] - point, axis=1).min() for point in line)
+    assert deviation <= 0.1
+
+@pytest.mark.parametrize("server", HOLD, indirect=True)
+def test_return_data_has_the_uploaded_trajectory(config, system, server, robot):
+    config.simplify_chord_error = 0.1
+    result = lin(system, robot)
+    joints, _speeds = uploaded(server)
+    assert len(result.trjectory) == len(joints) < 200
+    np.testing.assert_allclose(MockKinematics().inverse(result.trjectory.positions), joints, atol=1e-9)
+
+def test_decimation_solves_fewer_points(config, system, server, robot):
+    config.simplify_chord_error = 0.1
+    lin(system, robot)
+    assert system.kinematics_cache.misses < 100
+
+def test_joint_deviation_from_the_straight_joint_move():
+    start, end = np.zeros(6), np.array([10.0, 0, 0, 0, 0, 0])
+    joints = np.array([[5.0, 0.5, 0, 0, 0, 0], [20.0, 0, 0, 0, 0, 0]])
+    np.testing.assert_allclose(TrajectoryConstructor.joint_deviation(start, end, joints), [0.5, 10.0])
+
+def test_orientation_wraps_around_180():
+    positions = np.column_stack([np.linspace(0, 100, 11), np.zeros((11, 2)), (175 + np.arange(11)) % 360 - 180, np.zeros((11, 2))])
+    assert TrajectoryConstructor.simplify_indices(Trajectory(positions), 0.1, 0.5).tolist() == [0, 10]
@@ -0,0 +1,31 @@
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+from utils import splines
+
+def control_points(count):
+    return np.cumsum(np.random.default_rng(0).normal(size=(count, 6)), axis=0)
+
+def direct(points, samples):
+    return CubicSpline(np.linspace(0, 1, len(points)), points, axis=0)(np.linspace(0, 1, samples))
+
+def test_small_spline_uses_the_cached_basis():
+    points = control_points(8)
+    np.testing.assert_allclose(splines.cubic_spline(points, 200), direct(points, 200), atol=1e-9)
+    assert splines.cubic_spline_basis.cache_info().currsize >= 1
+
+def test_large_spline_is_not_cached():
+    splines.cubic_spline_basis.cache_clear()
+    points = control_points(2000)
+    np.testing.assert_allclose(splines.cubic_spline(points, 5000), direct(points, 5000), atol=1e-9)
+    assert splines.cubic_spline_basis.cache_info().currsize == 0
+
+def test_arc_length_spacing_without_cached_basis():
+    splines.cubic_spline_basis.cache_clear()
+    # Спираль: 1000 точек, 5 витков
+    angle = np.linspace(0, 10 * np.pi, 1000)
+    points = np.column_stack([100 * np.cos(angle), 100 * np.sin(angle), 20 * angle, np.zeros((1000, 3))])
+    curve = splines.cubic_spline_arc_length(points, spacing=1.0)
+    gaps = np.linalg.norm(np.diff(curve[:, :3], axis=0), axis=1)
+    assert gaps.max() <= 1.0 and gaps.min() > 0.95
+    assert splines.cubic_spline_basis.cache_info().currsize == 0
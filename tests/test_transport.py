@@ -0,0 +1,26 @@
+import pytest
+
+def big_request(system):
+    # Тело больше compression_threshold
+    return {"robot": "First", "code": "654123", "token": system._token, "coordinate_system": "world",
+            "positions_data": [{"x": 300 + index, "y": 0, "z": 150, "a": 0, "b": 0, "c": 0} for index in range(40)]}
+
+@pytest.mark.parametrize("server", [{"encodings": ()}], indirect=True)
+def test_compression_falls_back_on_415(config, system, server, robot):
+    config.compression = "gzip"
+    response = system.transport.post("/api/cartesian-to-angles", json=big_request(system))
+    assert response.status_code == 200
+    assert server.requests["/api/cartesian-to-angles"] == 2
+    assert not system.transport.compression_supported
+    system.transport.post("/api/cartesian-to-angles", json=big_request(system))
+    assert server.requests["/api/cartesian-to-angles"] == 3
+
+def test_compressed_validation_error_is_not_resent(config, system, server, robot):
+    config.compression = "gzip"
+    # Повторное создание аккаунта - 400 "Account already exists"
+    data = {"token": system._token, "name": "Operator", "password": "1" * 2048, "user_role": "user"}
+    system.transport.post("/api/create-account", json=data)
+    response = system.transport.post("/api/create-account", json=data)
+    assert response.status_code == 400 and system.transport.stats.last.encoding == "gzip"
+    assert server.requests == {"/api/create-account": 2}
+    assert system.transport.compression_supported
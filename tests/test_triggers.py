@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from data_types import RobotData, XYZPos
+from utils.triggers import TriggerDispatcher, TriggerHandler, TriggerHistory
+
+def test_poll_mode_reads_the_api_endpoint(config, system, server, robot):
+    config.trigger_mode = "poll"
+    fired = threading.Event()
+    with TriggerHandler(robot, system, refresh_timer=0.01, hello=fired.set):
+        system.lin(robot, XYZPos().from_list([300, 100, 150, 0, 0, 0]), "world", 50,
+                   start=XYZPos().from_list([300, -100, 150, 0, 0, 0]), triggers={"hello": 100})
+        assert fired.wait(5)
+    assert server.requests["/api/get-position-id"] >= 1
+    assert set(server.requests) <= {"/api/get-position", "/api/cartesian-to-angles", "/api/set-motion", "/api/get-position-id"}
+
+def test_handler_leaves_with_block_quickly(config, system, server, robot):
+    assert config.trigger_mode == "auto"
+    with TriggerHandler(robot, system, hello=lambda: None) as handler:
+        # Поток уже ждёт ответа long-poll
+        time.sleep(0.2)
+        thread = handler.thread
+        start = time.monotonic()
+    assert time.monotonic() - start < 1.5
+    assert not thread.is_alive()
+
+def test_dispatcher_stops_within_timeout(config, system, server, robot):
+    dispatcher = TriggerDispatcher(system)
+    dispatcher.watch(robot, hello=lambda: None)
+    dispatcher.start_handling()
+    time.sleep(0.2)
+    start = time.monotonic()
+    assert dispatcher.end_handling(timeout=1.5)
+    assert time.monotonic() - start < 1.5
+
+def test_unknown_robot_does_not_turn_off_long_poll(system, server, robot):
+    with pytest.raises(requests.HTTPError):
+        system.wait_position_id(RobotData("Unknown", "0"), None, timeout=0.1)
+    assert system.transport.supports("/api/wait-position-id")
+    assert system.wait_position_id(robot, None, timeout=0.1) == (True, "")
+
+def test_unknown_robot_does_not_turn_off_batched_long_poll(system, server, robot):
+    with pytest.raises(requests.HTTPError):
+        system.wait_position_ids({"Unknown": None}, timeout=0.1)
+    assert system.transport.supports("/api/wait-position-ids")
+    assert system.wait_position_ids({"First": None}, timeout=0.1) == (True, {"First": ""})
+
+def test_dispatcher_keeps_firing_next_to_an_unknown_robot(config, system, server, robot):
+    fired = threading.Event()
+    with TriggerDispatcher(system, refresh_timer=0.05) as dispatcher:
+        dispatcher.watch(RobotData("Unknown", "0"), hello=lambda: None)
+        dispatcher.watch(robot, hello=fired.set)
+        system.lin(robot, XYZPos().from_list([300, 100, 150, 0, 0, 0]), "world", 50,
+                   start=XYZPos().from_list([300, -100, 150, 0, 0, 0]), triggers={"hello": 100})
+        assert fired.wait(5)
+    assert system.transport.supports("/api/wait-position-ids")
+
+def test_history_fires_the_markers_passed_between_answers():
+    history = TriggerHistory(["a", "b", "c"])
+    assert history.crossed("a") == ["a"]
+    assert history.crossed("c") == ["b", "c"]
+    assert history.crossed("c") == []
+
+def test_history_starts_a_new_run_from_an_earlier_marker():
+    history = TriggerHistory(["a", "b", "c"])
+    history.crossed("a")
+    history.crossed("c")
+    assert history.crossed("a") == ["a"]
+    assert history.crossed("b") == ["b"]
+
+def test_history_fires_only_an_unknown_id():
+    history = TriggerHistory(["a", "b", "c"])
+    history.crossed("a")
+    assert history.crossed("z") == ["z"]
+    assert history.crossed("c") == ["b", "c"]
@@ -0,0 +1,26 @@
+import pytest
+
+from data_types import AnglePos, XYZPos
+from utils import wire
+
+def lin(system, robot):
+    return system.lin(robot, XYZPos().from_list([300, 100, 150, 0, 0, 0]), "world", 50,
+                      start=XYZPos().from_list([300, -100, 150, 0, 0, 0]))
+
+@pytest.mark.parametrize("server", [{"binary": False}], indirect=True)
+def test_binary_falls_back_to_json_on_415(config, system, server, robot):
+    config.wire_format = "binary"
+    assert lin(system, robot).code == {"Set position": 200, "Set speed": 200}
+    assert server.requests["/api/set-motion"] == 2
+    assert not system.transport.supports("/api/set-motion", wire.CONTENT_TYPE)
+    server.requests.clear()
+    lin(system, robot)
+    assert server.requests["/api/set-motion"] == 1
+
+def test_binary_validation_error_is_not_resent(config, system, server, robot):
+    config.wire_format = "binary"
+    angles = [AnglePos().from_list([0, 0, 0, 0, 0, 0])] * 3
+    (position, code), _speed = system.submit_motion(robot, angles, angles[:2], is_multi_point=True)
+    assert code == 400 and position["status"] is False
+    assert server.requests == {"/api/set-motion": 1}
+    assert system.transport.supports("/api/set-motion", wire.CONTENT_TYPE)